@@ -1,16 +1,465 @@
+import argparse
+import csv
+import json
+import os
 import sqlite3
+import sys
+from archive import ORDER_COLUMNS, archive_path_for
+from inventory import init_inventory, stock_levels, take_snapshots
+from landing_pages import publish_landing_pages
+from search import SEARCH_TABLE, init_search_index, rebuild_search_index
+from store import get_db_path, init_db, init_users_db, read_products, commit_catalog, sync_inventory, format_order_id
+from user_admin import USER_COLUMNS
 
-username = input("Enter username to make admin: ")
+# --- BULK ADMINISTRATION CLI (no Streamlit) ---
+# Every command works in batches of --batch-size rows, one short transaction
+# per batch, so the store keeps taking orders while a bulk job runs. Progress
+# goes to stderr, which keeps stdout free for exports.
+BATCH_SIZE = 500
+REBUILD_TARGETS = ['counters', 'search', 'inventory', 'pages']
 
-conn = sqlite3.connect("glambeauty.db")
-c = conn.cursor()
 
-c.execute("UPDATE users SET is_admin = 1 WHERE username = ?", (username,))
-conn.commit()
+class Progress:
+    """Progress line on stderr, redrawn in place on a terminal"""
 
-if c.rowcount > 0:
-    print(f"✅ {username} is now an admin!")
-else:
-    print(f"❌ User {username} not found!")
+    def __init__(self, label, total=None, quiet=False):
+        self.label = label
+        self.total = total
+        self.quiet = quiet
+        self._tty = sys.stderr.isatty()
 
-conn.close()
+    def __call__(self, done):
+        if self.quiet:
+            return
+        text = f"{self.label}: {done}" + (f"/{self.total}" if self.total is not None else "")
+        print(text, end="\r" if self._tty else "\n", file=sys.stderr, flush=True)
+
+    def finish(self, message=None):
+        if self._tty and not self.quiet:
+            print(file=sys.stderr)
+        if message:
+            print(message, file=sys.stderr)
+
+
+def batches(items, size):
+    """Split an iterable into lists of at most `size` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def connect(db_path):
+    return sqlite3.connect(db_path, timeout=30)
+
+
+def read_identifiers(names, file_path):
+    """Usernames or emails from the command line and from a file (one per line, '-' for stdin)"""
+    identifiers = list(names)
+    if file_path:
+        handle = sys.stdin if file_path == "-" else open(file_path)
+        with handle:
+            identifiers += [line.strip() for line in handle if line.strip()]
+    return list(dict.fromkeys(identifiers))
+
+
+# --- USERS ---
+def set_admin(db_path, identifiers, is_admin, batch_size=BATCH_SIZE, progress=None):
+    """Grant or revoke admin rights by username or email, one transaction per batch.
+
+    A demotion batch that would leave the store without any admin is rolled
+    back and stops the run. Returns (changed, not_found).
+    """
+    flag = 1 if is_admin else 0
+    changed = 0
+    found = set()
+    done = 0
+    conn = connect(db_path)
+    c = conn.cursor()
+    try:
+        for batch in batches(identifiers, batch_size):
+            placeholders = ",".join("?" * len(batch))
+            c.execute("BEGIN IMMEDIATE")
+            rows = c.execute(f"SELECT user_id, username, email FROM users WHERE username IN ({placeholders})", batch).fetchall()
+            rows += c.execute(f"SELECT user_id, username, email FROM users WHERE email COLLATE NOCASE IN ({placeholders})", batch).fetchall()
+            for _, username, email in rows:
+                found.update((username, email.lower()))
+            user_ids = {user_id for user_id, _, _ in rows}
+            c.executemany(
+                "UPDATE users SET is_admin = ? WHERE user_id = ? AND is_admin != ?",
+                [(flag, user_id, flag) for user_id in user_ids]
+            )
+            batch_changed = c.rowcount if user_ids else 0
+            if not is_admin and batch_changed and c.execute("SELECT COUNT(*) FROM users WHERE is_admin = 1").fetchone()[0] == 0:
+                conn.rollback()
+                raise ValueError(f"Refusing to demote the last admin ({changed} user(s) changed before stopping)")
+            conn.commit()
+            changed += batch_changed
+            done += len(batch)
+            if progress:
+                progress(done)
+    finally:
+        conn.close()
+    not_found = [name for name in identifiers if name not in found and name.lower() not in found]
+    return changed, not_found
+
+
+# --- CATALOG ---
+def read_catalog_csv(csv_path, value_columns):
+    """Rows of a restock/reprice CSV as (line, product_id, {column: number}); bad rows come back as (line, None, error)"""
+    with open(csv_path, newline="") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        if 'id' not in fields or not any(column in fields for column in value_columns):
+            raise ValueError(f"{csv_path} needs an 'id' column and one of: {', '.join(value_columns)}")
+        for row in reader:
+            try:
+                values = {column: float(row[column]) for column in value_columns if (row.get(column) or "").strip()}
+                if 'quantity' in values and not values['quantity'].is_integer():
+                    raise ValueError("quantity must be a whole number")
+                if not values:
+                    raise ValueError(f"no {' or '.join(value_columns)}")
+                yield reader.line_num, int(row['id']), values
+            except (TypeError, ValueError) as e:
+                yield reader.line_num, None, str(e)
+
+
+def apply_catalog_csv(db_path, csv_path, mode, batch_size=BATCH_SIZE, progress=None):
+    """Restock (add `quantity` units) or reprice (set `price`, or change it by `percent`) from a CSV.
+
+    Each batch of rows is one commit_catalog call: restocks are recorded as
+    ledger movements and prices are applied to the catalog as read under the
+    write lock, so concurrent catalog edits are never overwritten. Returns
+    (updated products, [(line, problem)]).
+    """
+    columns = ['quantity'] if mode == 'restock' else ['price', 'percent']
+    ref = f"admin.py {mode} {os.path.basename(csv_path)}"
+    updated = {}
+    problems = []
+    done = 0
+    conn = connect(db_path)
+    try:
+        for batch in batches(read_catalog_csv(csv_path, columns), batch_size):
+            known_ids = {p['id'] for p in read_products()}
+            movements = []
+            reprices = []
+            for line, product_id, values in batch:
+                if product_id is None:
+                    problems.append((line, values))
+                elif product_id not in known_ids:
+                    problems.append((line, f"unknown product {product_id}"))
+                elif mode == 'restock':
+                    quantity = int(values['quantity'])
+                    if quantity <= 0:
+                        problems.append((line, "quantity must be positive"))
+                        continue
+                    movements.append((product_id, quantity, 'restock', ref))
+                else:
+                    reprices.append((line, product_id, values))
+            batch_ids = {product_id for product_id, _, _, _ in movements} | {product_id for _, product_id, _ in reprices}
+            if batch_ids:
+                written = commit_catalog(conn, None, movements, transform=lambda products: reprice(products, reprices, problems))
+                updated.update((p['id'], p) for p in written if p['id'] in batch_ids)
+            done += len(batch)
+            if progress:
+                progress(done)
+    finally:
+        conn.close()
+    return list(updated.values()), sorted(problems)
+
+
+def reprice(products, rows, problems):
+    """Apply reprice CSV rows ((line, product_id, {'price' or 'percent'})) to a catalog list in place"""
+    by_id = {p['id']: p for p in products}
+    for line, product_id, values in rows:
+        product = by_id.get(product_id)
+        if product is None:
+            problems.append((line, f"product {product_id} was deleted"))
+        elif 'price' in values:
+            product['price'] = max(1, round(values['price']))
+        else:
+            product['price'] = max(1, round(product['price'] * (100 + values['percent']) / 100))
+    return products
+
+
+# --- EXPORTS ---
+def export_rows(db_path, table, since=None, include_archived=False):
+    """(columns, total, row iterator) for streaming the orders or users table, archived orders after the recent ones"""
+    if table == 'users':
+        columns, date_column = USER_COLUMNS, 'created_at'
+    else:
+        columns, date_column = ORDER_COLUMNS, 'date'
+    where, params = (f"WHERE {date_column} >= ?", [since]) if since else ("", [])
+    sources = [db_path]
+    if table == 'orders' and include_archived and os.path.exists(archive_path_for(db_path)):
+        sources.append(archive_path_for(db_path))
+
+    total = 0
+    for source in sources:
+        conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        total += conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+        conn.close()
+
+    def rows():
+        for source in sources:
+            conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+            try:
+                c = conn.execute(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {date_column}", params)
+                while True:
+                    batch = c.fetchmany(BATCH_SIZE)
+                    if not batch:
+                        break
+                    yield from batch
+            finally:
+                conn.close()
+    return columns, total, rows()
+
+
+def write_export(out, columns, rows, fmt, batch_size=BATCH_SIZE, progress=None):
+    """Write rows as CSV or JSON lines, flushing every batch; returns rows written"""
+    writer = csv.writer(out) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    written = 0
+    for batch in batches(rows, batch_size):
+        if writer:
+            writer.writerows(batch)
+        else:
+            out.write("".join(json.dumps(dict(zip(columns, row))) + "\n" for row in batch))
+        out.flush()
+        written += len(batch)
+        if progress:
+            progress(written)
+    return written
+
+
+# --- REBUILDS ---
+def rebuild_order_counter(db_path):
+    """Set the order number counter to at least the highest order number in use (archive included)"""
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        highest = conn.execute("SELECT COALESCE(MAX(CAST(SUBSTR(order_id, 4) AS INTEGER)), 0) FROM orders").fetchone()[0]
+        if os.path.exists(archive_path_for(db_path)):
+            conn.execute("ATTACH DATABASE ? AS archive", (archive_path_for(db_path),))
+            highest = max(highest, conn.execute(
+                "SELECT COALESCE(MAX(CAST(SUBSTR(order_id, 4) AS INTEGER)), 0) FROM archive.orders"
+            ).fetchone()[0])
+        current = conn.execute("SELECT value FROM counters WHERE name = 'order_number'").fetchone()[0]
+        conn.execute("UPDATE counters SET value = ? WHERE name = 'order_number'", (max(current, highest),))
+        conn.commit()
+    finally:
+        conn.close()
+    return current, max(current, highest)
+
+
+def compact_inventory(db_path, batch_size=BATCH_SIZE, progress=None):
+    """Open missing ledger rows, then snapshot every product with a ledger tail, one batch per transaction"""
+    opened = sync_inventory(db_path)
+    conn = connect(db_path)
+    c = conn.cursor()
+    snapshots = 0
+    done = 0
+    try:
+        product_ids = [row[0] for row in c.execute("SELECT DISTINCT product_id FROM inventory_snapshots").fetchall()]
+        for batch in batches(product_ids, batch_size):
+            c.execute("BEGIN IMMEDIATE")
+            snapshots += take_snapshots(c, batch, every=1)
+            conn.commit()
+            done += len(batch)
+            if progress:
+                progress(done)
+    finally:
+        conn.close()
+    return opened, snapshots
+
+
+# --- INTEGRITY CHECKS ---
+def check_database(db_path, full=False, batch_size=BATCH_SIZE, progress=None):
+    """Run the integrity checks; returns [(check, problems)] where problems is a list of strings"""
+    results = []
+    pragma = "integrity_check" if full else "quick_check"
+    sources = [db_path] + ([archive_path_for(db_path)] if os.path.exists(archive_path_for(db_path)) else [])
+    for source in sources:
+        conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        rows = [row[0] for row in conn.execute(f"PRAGMA {pragma}").fetchall()]
+        conn.close()
+        results.append((f"{pragma} {os.path.basename(source)}", [] if rows == ["ok"] else rows))
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        counter = conn.execute("SELECT value FROM counters WHERE name = 'order_number'").fetchone()[0]
+        highest = conn.execute("SELECT COALESCE(MAX(CAST(SUBSTR(order_id, 4) AS INTEGER)), 0) FROM orders").fetchone()[0]
+        if len(sources) > 1:
+            conn.execute("ATTACH DATABASE ? AS archive", (f"file:{sources[1]}?mode=ro",))
+            highest = max(highest, conn.execute(
+                "SELECT COALESCE(MAX(CAST(SUBSTR(order_id, 4) AS INTEGER)), 0) FROM archive.orders"
+            ).fetchone()[0])
+            duplicates = [row[0] for row in conn.execute(
+                "SELECT order_id FROM main.orders WHERE order_id IN (SELECT order_id FROM archive.orders) LIMIT 20"
+            ).fetchall()]
+            results.append(("orders not both live and archived", [f"{order_id} is in both" for order_id in duplicates]))
+        results.append(("order counter", [] if counter >= highest else [f"counter is {counter} but {format_order_id(highest)} exists (run: rebuild counters)"]))
+
+        bad_items = []
+        done = 0
+        c = conn.execute("SELECT order_id, items_json FROM main.orders")
+        while True:
+            batch = c.fetchmany(batch_size)
+            if not batch:
+                break
+            for order_id, items_json in batch:
+                try:
+                    items = json.loads(items_json or "")
+                    if not isinstance(items, list) or not all('id' in item for item in items):
+                        raise ValueError
+                except (ValueError, TypeError):
+                    bad_items.append(f"{order_id} has unreadable items")
+            done += len(batch)
+            if progress:
+                progress(done)
+        results.append(("order items", bad_items))
+
+        products = read_products()
+        levels = stock_levels(conn)
+        stock_problems = []
+        for p in products:
+            if p['id'] not in levels:
+                stock_problems.append(f"product {p['id']} has no ledger rows (run: rebuild inventory)")
+            elif levels[p['id']] < 0:
+                stock_problems.append(f"product {p['id']} has negative stock {levels[p['id']]}")
+            elif levels[p['id']] != p.get('stock', 0):
+                stock_problems.append(f"product {p['id']} catalog stock {p.get('stock', 0)} != ledger {levels[p['id']]}")
+        results.append(("catalog stock matches ledger", stock_problems))
+
+        indexed = conn.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").fetchone()[0]
+        results.append(("search index", [] if indexed == len(products) else [f"{indexed} indexed, {len(products)} in catalog (run: rebuild search)"]))
+    finally:
+        conn.close()
+    return results
+
+
+# --- COMMAND LINE ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GlamBeauty bulk administration")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument("--quiet", action="store_true", help="No progress output")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("promote", "Make users admins"), ("demote", "Make admins customers")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("users", nargs="*", help="Usernames or emails")
+        command.add_argument("--file", help="File with one username or email per line ('-' for stdin)")
+
+    command = commands.add_parser("restock", help="Add stock from a CSV with id,quantity columns")
+    command.add_argument("csv")
+    command = commands.add_parser("reprice", help="Reprice from a CSV with id and price (or percent) columns")
+    command.add_argument("csv")
+
+    command = commands.add_parser("export", help="Stream orders or users as CSV or JSON lines")
+    command.add_argument("table", choices=["orders", "users"])
+    command.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    command.add_argument("--output", "-o", help="File to write (default: stdout)")
+    command.add_argument("--since", help="Only rows on or after this date (YYYY-MM-DD)")
+    command.add_argument("--archived", action="store_true", help="Include archived orders")
+
+    command = commands.add_parser("rebuild", help="Rebuild derived tables and counters")
+    command.add_argument("targets", nargs="*", help=f"Any of {', '.join(REBUILD_TARGETS)} (default: all)")
+
+    command = commands.add_parser("check", help="Run integrity checks (exit status 1 on problems)")
+    command.add_argument("--full", action="store_true", help="Full integrity_check instead of quick_check")
+
+    args = parser.parse_args(argv)
+    db_path = get_db_path()
+    init_db()
+    init_users_db()
+    init_inventory(db_path)
+    init_search_index(db_path)
+
+    def progress(label, total=None):
+        return Progress(label, total, args.quiet)
+
+    if args.command in ("promote", "demote"):
+        identifiers = read_identifiers(args.users, args.file)
+        if not identifiers:
+            parser.error("no users given")
+        bar = progress(args.command, len(identifiers))
+        try:
+            changed, not_found = set_admin(db_path, identifiers, args.command == "promote", args.batch_size, bar)
+        except ValueError as e:
+            bar.finish(f"❌ {e}")
+            return 1
+        for name in not_found:
+            print(f"❌ User {name} not found!", file=sys.stderr)
+        bar.finish(f"✅ {changed} user(s) {'promoted to admin' if args.command == 'promote' else 'changed to customer'}")
+        return 1 if not_found else 0
+
+    if args.command in ("restock", "reprice"):
+        bar = progress(f"{args.command} rows")
+        try:
+            updated, problems = apply_catalog_csv(db_path, args.csv, args.command, args.batch_size, bar)
+        except (OSError, ValueError) as e:
+            bar.finish(f"❌ {e}")
+            return 1
+        for line, problem in problems:
+            print(f"❌ line {line}: {problem}", file=sys.stderr)
+        if updated:
+            publish_landing_pages(updated)
+        bar.finish(f"✅ {len(updated)} product(s) updated, {len(problems)} row(s) skipped")
+        return 1 if problems else 0
+
+    if args.command == "export":
+        columns, total, rows = export_rows(db_path, args.table, args.since, args.archived)
+        bar = progress(f"{args.table} exported", total)
+        out = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            written = write_export(out, columns, rows, args.format, args.batch_size, bar)
+        finally:
+            if args.output:
+                out.close()
+        bar.finish(f"✅ {written} {args.table} exported")
+        return 0
+
+    if args.command == "rebuild":
+        targets = args.targets or REBUILD_TARGETS
+        unknown = set(targets) - set(REBUILD_TARGETS)
+        if unknown:
+            parser.error(f"unknown rebuild target(s): {', '.join(sorted(unknown))}")
+        if 'counters' in targets:
+            before, after = rebuild_order_counter(db_path)
+            print(f"✅ order counter: {before} → {after}", file=sys.stderr)
+        if 'search' in targets:
+            products = read_products()
+            rebuild_search_index(db_path, products)
+            print(f"✅ search index: {len(products)} products", file=sys.stderr)
+        if 'inventory' in targets:
+            bar = progress("products compacted")
+            opened, snapshots = compact_inventory(db_path, args.batch_size, bar)
+            bar.finish(f"✅ inventory: {opened} product(s) opened, {snapshots} snapshot(s) taken")
+        if 'pages' in targets:
+            stats = publish_landing_pages(read_products(), prune=True)
+            print(f"✅ product pages: {stats['written']} written, {stats['unchanged']} unchanged, {stats['removed']} removed", file=sys.stderr)
+        return 0
+
+    if args.command == "check":
+        bar = progress("orders scanned")
+        results = check_database(db_path, args.full, args.batch_size, bar)
+        bar.finish()
+        failed = 0
+        for check, problems in results:
+            if problems:
+                failed += 1
+                print(f"❌ {check}: {len(problems)} problem(s)")
+                for problem in problems[:20]:
+                    print(f"   {problem}")
+            else:
+                print(f"✅ {check}")
+        return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
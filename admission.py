@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+# --- ADMISSION CONTROL / WAITING ROOM ---
+THROUGHPUT_WINDOW_SECONDS = 300
+
+
+class AdmissionController:
+    """Caps concurrently active shopping sessions and checkouts for this process.
+
+    Sessions call enter() on every rerun. Up to `max_active` sessions are
+    admitted; the rest wait in a FIFO queue and are admitted as active sessions
+    go idle for `idle_timeout` seconds or leave(). Checkouts additionally need
+    one of `max_checkouts` slots.
+    """
+
+    def __init__(self, max_active=200, max_checkouts=20, idle_timeout=300):
+        self.max_active = max_active
+        self.max_checkouts = max_checkouts
+        self.idle_timeout = idle_timeout
+        self._active = {}
+        self._waiting = OrderedDict()
+        self._lock = threading.Lock()
+        self._checkout_slots = threading.BoundedSemaphore(max_checkouts)
+        self._admissions = deque()
+        self._checkouts = deque()
+        self.stats = {
+            'admitted_total': 0,
+            'queued_total': 0,
+            'abandoned_total': 0,
+            'total_wait_seconds': 0.0,
+            'checkouts_in_flight': 0,
+            'checkouts_rejected': 0,
+        }
+
+    def _trim(self, events, now):
+        while events and events[0] < now - THROUGHPUT_WINDOW_SECONDS:
+            events.popleft()
+
+    def _expire(self, now):
+        cutoff = now - self.idle_timeout
+        for token in [t for t, last_seen in self._active.items() if last_seen < cutoff]:
+            del self._active[token]
+        for token in [t for t, (_, last_seen) in self._waiting.items() if last_seen < cutoff]:
+            del self._waiting[token]
+            self.stats['abandoned_total'] += 1
+
+    def _admit(self, token, now, joined_at):
+        self._active[token] = now
+        self._admissions.append(now)
+        self.stats['admitted_total'] += 1
+        self.stats['total_wait_seconds'] += now - joined_at
+
+    def _admit_waiting(self, now):
+        while self._waiting and len(self._active) < self.max_active:
+            token, (joined_at, _) = self._waiting.popitem(last=False)
+            self._admit(token, now, joined_at)
+
+    def _admissions_per_second(self, now):
+        self._trim(self._admissions, now)
+        if not self._admissions:
+            return 0.0
+        window = max(1.0, min(THROUGHPUT_WINDOW_SECONDS, now - self._admissions[0]))
+        return len(self._admissions) / window
+
+    def enter(self, token):
+        """Register a rerun of a session; returns (admitted, queue_position, estimated_wait_seconds)"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if token in self._active:
+                self._active[token] = now
+                return True, 0, 0
+
+            if token in self._waiting:
+                joined_at, _ = self._waiting[token]
+                self._waiting[token] = (joined_at, now)
+            elif not self._waiting and len(self._active) < self.max_active:
+                self._admit(token, now, now)
+                return True, 0, 0
+            else:
+                self._waiting[token] = (now, now)
+                self.stats['queued_total'] += 1
+
+            self._admit_waiting(now)
+            if token in self._active:
+                return True, 0, 0
+
+            position = list(self._waiting).index(token) + 1
+            rate = self._admissions_per_second(now)
+            estimated_wait = position / rate if rate else None
+            return False, position, estimated_wait
+
+    def leave(self, token):
+        """Free a session's slot right away (e.g. on logout)"""
+        with self._lock:
+            self._active.pop(token, None)
+            self._waiting.pop(token, None)
+            self._admit_waiting(time.time())
+
+    @contextmanager
+    def checkout_slot(self, timeout=10):
+        """Context manager yielding True when a checkout slot was acquired within `timeout`"""
+        acquired = self._checkout_slots.acquire(timeout=timeout)
+        with self._lock:
+            if acquired:
+                self.stats['checkouts_in_flight'] += 1
+            else:
+                self.stats['checkouts_rejected'] += 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with self._lock:
+                    self.stats['checkouts_in_flight'] -= 1
+                    self._checkouts.append(time.time())
+                self._checkout_slots.release()
+
+    def metrics(self):
+        """Snapshot of admission and throughput figures"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            self._trim(self._checkouts, now)
+            admitted = self.stats['admitted_total']
+            return dict(
+                self.stats,
+                active=len(self._active),
+                waiting=len(self._waiting),
+                max_active=self.max_active,
+                max_checkouts=self.max_checkouts,
+                avg_wait_seconds=self.stats['total_wait_seconds'] / admitted if admitted else 0.0,
+                admissions_per_minute=self._admissions_per_second(now) * 60,
+                checkouts_per_minute=len(self._checkouts) * 60 / THROUGHPUT_WINDOW_SECONDS,
+            )
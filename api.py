@@ -0,0 +1,395 @@
+import argparse
+import hashlib
+import json
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+from facets import FacetIndex
+from search import init_search_index, ensure_search_index, search_products
+from mailer import init_outbox
+from session_store import init_session_store, load_signing_key, SessionStore
+from login_buffer import LastLoginBuffer
+from group_commit import GroupCommitQueue
+from landing_pages import publish_landing_pages
+from inventory import init_inventory
+from store import (
+    get_db_path, init_db, init_users_db, read_products, catalog_version, authenticate_user,
+    get_user_by_id, place_orders, sync_inventory, validate_email, validate_phone
+)
+
+# --- HEADLESS JSON API (WSGI, no Streamlit) ---
+MAX_PAGE_SIZE = 100
+PAYMENT_METHODS = ["Cash on Delivery", "UPI", "Credit/Debit Card"]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ConnectionPool:
+    """Fixed set of SQLite connections shared by the request threads"""
+
+    def __init__(self, db_path, size=8, timeout=30):
+        self._connections = queue.LifoQueue()
+        for _ in range(size):
+            self._connections.put(sqlite3.connect(db_path, timeout=timeout, check_same_thread=False))
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._connections.put(conn)
+
+
+class CatalogCache:
+    """In-memory catalog and facet index, reloaded when products.json changes"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.version = None
+        self.products = []
+        self.by_id = {}
+        self.facets = FacetIndex([])
+
+    def current(self):
+        """(version, by_id, facets) for the catalog on disk"""
+        version = catalog_version()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    products = read_products()
+                    ensure_search_index(self.db_path, products)
+                    self.facets.rebuild(products, version)
+                    self.products = products
+                    self.by_id = {p['id']: p for p in products}
+                    self.version = version
+        return self.version, self.by_id, self.facets
+
+
+def etag_for(*parts):
+    return '"' + hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20] + '"'
+
+
+def product_json(product):
+    return {
+        'id': product['id'],
+        'name': product['name'],
+        'price': product['price'],
+        'category': product['category'],
+        'description': product.get('description', ''),
+        'image': product.get('image', ''),
+        'stock': product.get('stock', 0),
+    }
+
+
+class ShopAPI:
+    """WSGI application exposing catalog, login, cart and checkout as JSON.
+
+    Carts live in the same session store as the Streamlit app, so a cart started
+    on the phone shows up in the browser with the same token. Checkouts go
+    through a group-commit queue into store.place_orders().
+    """
+
+    def __init__(self, db_path=None, pool_size=8):
+        self.db_path = db_path or get_db_path()
+        init_db(self.db_path)
+        init_users_db(self.db_path)
+        init_outbox(self.db_path)
+        init_search_index(self.db_path)
+        init_session_store(self.db_path)
+        init_inventory(self.db_path)
+        sync_inventory(self.db_path)
+        self.pool = ConnectionPool(self.db_path, size=pool_size)
+        self.catalog = CatalogCache(self.db_path)
+        self.sessions = SessionStore(self.db_path, load_signing_key(self.db_path)).start()
+        self.login_buffer = LastLoginBuffer(self.db_path).start()
+        self.checkouts = GroupCommitQueue(self._commit_checkouts, name="api-checkout-writer").start()
+        self.routes = [
+            ("GET", re.compile(r"^/api/products$"), self.list_products),
+            ("GET", re.compile(r"^/api/products/(\d+)$"), self.product_detail),
+            ("POST", re.compile(r"^/api/session$"), self.new_session),
+            ("POST", re.compile(r"^/api/login$"), self.login),
+            ("GET", re.compile(r"^/api/me$"), self.me),
+            ("GET", re.compile(r"^/api/cart$"), self.get_cart),
+            ("POST", re.compile(r"^/api/cart/items$"), self.add_cart_item),
+            ("DELETE", re.compile(r"^/api/cart/items/(\d+)$"), self.remove_cart_item),
+            ("POST", re.compile(r"^/api/checkout$"), self.checkout),
+        ]
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO', '')
+        try:
+            for route_method, pattern, handler in self.routes:
+                match = pattern.match(path)
+                if match and route_method == method:
+                    status, body, headers = handler(environ, *match.groups())
+                    break
+            else:
+                raise HTTPError(404, "Not found")
+        except HTTPError as e:
+            status, body, headers = e.status, {'error': e.message}, []
+        except Exception as e:
+            status, body, headers = 500, {'error': str(e)}, []
+
+        payload = b"" if status == 304 else json.dumps(body).encode()
+        headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(payload)))] + headers
+        start_response(f"{status} {STATUS_TEXT.get(status, '')}", headers)
+        return [payload]
+
+    # --- helpers ---
+    def _query(self, environ):
+        return {k: v[0] for k, v in parse_qs(environ.get('QUERY_STRING', '')).items()}
+
+    def _body(self, environ):
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            body = json.loads(environ['wsgi.input'].read(length) or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return body
+
+    def _token(self, environ, required=True):
+        header = environ.get('HTTP_AUTHORIZATION', '')
+        token = header[7:] if header.startswith('Bearer ') else None
+        if token and self.sessions.session_id_from_token(token):
+            return token
+        if required:
+            raise HTTPError(401, "Missing or invalid session token")
+        return None
+
+    def _session(self, environ):
+        token = self._token(environ)
+        state = self.sessions.load(token)
+        if state is None:
+            raise HTTPError(401, "Session expired")
+        return token, state[0], state[1]
+
+    def _cart_json(self, cart_ids, by_id):
+        counts = {}
+        for pid in cart_ids:
+            if pid in by_id:
+                counts[pid] = counts.get(pid, 0) + 1
+        items = [dict(product_json(by_id[pid]), quantity=qty) for pid, qty in counts.items()]
+        return {
+            'items': items,
+            'count': sum(counts.values()),
+            'total': sum(by_id[pid]['price'] * qty for pid, qty in counts.items()),
+        }
+
+    def _not_modified(self, environ, etag):
+        return environ.get('HTTP_IF_NONE_MATCH') == etag
+
+    # --- catalog ---
+    def list_products(self, environ):
+        params = self._query(environ)
+        version, by_id, facets = self.catalog.current()
+        etag = etag_for(version, environ.get('QUERY_STRING', ''))
+        headers = [('ETag', etag), ('Cache-Control', 'no-cache')]
+        if self._not_modified(environ, etag):
+            return 304, None, headers
+
+        try:
+            page = max(1, int(params.get('page', 1)))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('page_size', 12))))
+        except ValueError:
+            raise HTTPError(400, "page and page_size must be integers")
+
+        if params.get('q', '').strip():
+            ids, total = search_products(self.db_path, params['q'], page=page, page_size=page_size)
+        else:
+            ids, total = facets.search(
+                params.get('category'),
+                params.get('price_band'),
+                params.get('in_stock') == '1',
+                params.get('low_stock') == '1',
+                offset=(page - 1) * page_size,
+                limit=page_size
+            )
+        return 200, {
+            'items': [product_json(by_id[pid]) for pid in ids if pid in by_id],
+            'page': page,
+            'page_size': page_size,
+            'total': total,
+        }, headers
+
+    def product_detail(self, environ, product_id):
+        version, by_id, _ = self.catalog.current()
+        product = by_id.get(int(product_id))
+        if not product:
+            raise HTTPError(404, "Product not found")
+        etag = etag_for(version, product_id)
+        headers = [('ETag', etag), ('Cache-Control', 'no-cache')]
+        if self._not_modified(environ, etag):
+            return 304, None, headers
+        return 200, product_json(product), headers
+
+    # --- sessions & login ---
+    def new_session(self, environ):
+        token = self.sessions.new_token()
+        self.sessions.save(token, None, [], flush=True)
+        return 201, {'token': token}, []
+
+    def login(self, environ):
+        body = self._body(environ)
+        with self.pool.connection() as conn:
+            user = authenticate_user(conn, body.get('username_or_email', ''), body.get('password', ''))
+        if not user:
+            raise HTTPError(401, "Invalid username/email or password")
+        self.login_buffer.record(user['user_id'], datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+        # Always a fresh token, so a guest token handed out earlier never becomes a login;
+        # the guest cart moves over and the old token is deleted
+        old_token = self._token(environ, required=False)
+        state = self.sessions.load(old_token) if old_token else None
+        cart_ids = state[1] if state else []
+        token = self.sessions.new_token()
+        self.sessions.save(token, user['user_id'], cart_ids, flush=True)
+        if state:
+            self.sessions.delete(old_token)
+        return 200, {'token': token, 'user': user}, []
+
+    def me(self, environ):
+        _, user_id, _ = self._session(environ)
+        if not user_id:
+            raise HTTPError(401, "Not logged in")
+        with self.pool.connection() as conn:
+            user = get_user_by_id(conn, user_id)
+        if not user:
+            raise HTTPError(404, "User not found")
+        return 200, user, []
+
+    # --- cart ---
+    def get_cart(self, environ):
+        _, _, cart_ids = self._session(environ)
+        _, by_id, _ = self.catalog.current()
+        return 200, self._cart_json(cart_ids, by_id), []
+
+    def add_cart_item(self, environ):
+        token, user_id, cart_ids = self._session(environ)
+        body = self._body(environ)
+        _, by_id, _ = self.catalog.current()
+        try:
+            product_id = int(body.get('product_id'))
+            quantity = int(body.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "product_id and quantity must be integers")
+        product = by_id.get(product_id)
+        if not product:
+            raise HTTPError(404, "Product not found")
+        if quantity < 1:
+            raise HTTPError(400, "quantity must be at least 1")
+        if cart_ids.count(product_id) + quantity > product.get('stock', 0):
+            raise HTTPError(409, f"Only {product.get('stock', 0)} items in stock")
+        cart_ids = cart_ids + [product_id] * quantity
+        self.sessions.save(token, user_id, cart_ids)
+        return 200, self._cart_json(cart_ids, by_id), []
+
+    def remove_cart_item(self, environ, product_id):
+        token, user_id, cart_ids = self._session(environ)
+        product_id = int(product_id)
+        if product_id not in cart_ids:
+            raise HTTPError(404, "Product is not in the cart")
+        cart_ids = list(cart_ids)
+        cart_ids.remove(product_id)
+        self.sessions.save(token, user_id, cart_ids)
+        _, by_id, _ = self.catalog.current()
+        return 200, self._cart_json(cart_ids, by_id), []
+
+    # --- checkout ---
+    def _commit_checkouts(self, requests):
+        with self.pool.connection() as conn:
+            results, changed = place_orders(conn, requests)
+        if changed:
+            try:
+                publish_landing_pages(changed)
+            except OSError:
+                pass  # the orders are committed; pages catch up on the next rebuild
+        return results
+
+    def checkout(self, environ):
+        token, user_id, cart_ids = self._session(environ)
+        body = self._body(environ)
+        _, by_id, _ = self.catalog.current()
+        items = [dict(by_id[pid]) for pid in cart_ids if pid in by_id]
+        if not items:
+            raise HTTPError(400, "Cart is empty")
+
+        customer = {field: str(body.get(field, '')).strip() for field in ('name', 'email', 'phone', 'address')}
+        if not all(customer.values()):
+            raise HTTPError(400, "name, email, phone and address are required")
+        if not validate_email(customer['email']):
+            raise HTTPError(400, "Invalid email address")
+        if not validate_phone(customer['phone']):
+            raise HTTPError(400, "Invalid phone number")
+        payment_method = body.get('payment_method', "Cash on Delivery")
+        if payment_method not in PAYMENT_METHODS:
+            raise HTTPError(400, f"payment_method must be one of: {', '.join(PAYMENT_METHODS)}")
+
+        request = {
+            'customer_name': customer['name'],
+            'customer_email': customer['email'],
+            'customer_phone': customer['phone'],
+            'customer_address': customer['address'],
+            'items': items,
+            'total_amount': sum(item['price'] for item in items),
+            'payment_method': payment_method,
+            'payment_details': body.get('payment_details') or {},
+            'status': 'Confirmed',
+            'user_id': user_id
+        }
+        try:
+            order_id = self.checkouts.submit(request)
+        except ValueError as e:
+            raise HTTPError(409, str(e))
+        self.sessions.save(token, user_id, [], flush=True)
+        return 201, {'order_id': order_id, 'total': request['total_amount']}, []
+
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+    404: "Not Found", 409: "Conflict", 500: "Internal Server Error",
+}
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def make_api_server(host="127.0.0.1", port=8000, pool_size=8, quiet=False):
+    """Build a threaded WSGI server for the API (call serve_forever() on it)"""
+    handler = QuietRequestHandler if quiet else WSGIRequestHandler
+    return make_server(host, port, ShopAPI(pool_size=pool_size), server_class=ThreadingWSGIServer, handler_class=handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GlamBeauty JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--quiet", action="store_true", help="Do not log every request")
+    args = parser.parse_args()
+    server = make_api_server(args.host, args.port, args.pool_size, args.quiet)
+    print(f"GlamBeauty API on http://{args.host}:{args.port}/api/products")
+    server.serve_forever()
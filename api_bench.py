@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# --- API THROUGHPUT BENCHMARK ---
+# Runs the API against a throwaway copy of the database and catalog, so the
+# checkout scenario never touches real orders or stock.
+
+
+def request(base_url, method, path, body=None, token=None, headers=None):
+    """Send one request; returns (status, parsed_json_or_None, response_headers)"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method, headers=dict(headers or {}))
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(req) as resp:
+            payload = resp.read()
+            return resp.status, json.loads(payload) if payload else None, resp.headers
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        return e.code, json.loads(payload) if payload else None, e.headers
+
+
+def run_scenario(name, call, total, concurrency):
+    """Run `call(i)` `total` times over `concurrency` threads and print throughput and latency"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(i):
+        nonlocal errors
+        start = time.perf_counter()
+        ok = call(i)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(total)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<28} {total / wall:8.0f} req/s   p50 {statistics.median(latencies):6.1f} ms   p95 {p95:6.1f} ms   errors {errors}")
+
+
+def prepare_sandbox(source_dir):
+    """Copy the database and catalog into a temp dir"""
+    sandbox = tempfile.mkdtemp(prefix="glambeauty-bench-")
+    for name in ("glambeauty.db", "products.json"):
+        if os.path.exists(os.path.join(source_dir, name)):
+            shutil.copy(os.path.join(source_dir, name), sandbox)
+    return sandbox
+
+
+def stock_up(quantity=1_000_000):
+    """Give every product in the current directory's catalog plenty of stock for checkout runs"""
+    from inventory import init_inventory
+    from store import get_db_path, read_products, commit_catalog, sync_inventory
+    init_inventory(get_db_path())
+    sync_inventory()
+    products = read_products()
+    conn = sqlite3.connect(get_db_path())
+    commit_catalog(conn, products, [(p['id'], quantity - p['stock'], 'adjustment', 'benchmark') for p in products])
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GlamBeauty JSON API")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per read scenario")
+    parser.add_argument("--checkouts", type=int, default=300, help="Checkouts in the checkout scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    source_dir = os.getcwd()
+    sandbox = prepare_sandbox(source_dir)
+    os.chdir(sandbox)
+    stock_up()
+    from api import make_api_server
+    from store import register_user
+
+    server = make_api_server("127.0.0.1", 0, pool_size=args.pool_size, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Benchmarking {base_url} (sandbox {sandbox}), concurrency {args.concurrency}, pool {args.pool_size}")
+
+    status, first_page, headers = request(base_url, "GET", "/api/products?page=1&page_size=12")
+    etag = headers['ETag']
+    product_ids = [p['id'] for p in first_page['items']]
+
+    run_scenario("catalog page", lambda i: request(base_url, "GET", f"/api/products?page={i % 3 + 1}&page_size=12")[0] == 200, args.requests, args.concurrency)
+    run_scenario("catalog page (ETag hit)", lambda i: request(base_url, "GET", "/api/products?page=1&page_size=12", headers={'If-None-Match': etag})[0] == 304, args.requests, args.concurrency)
+    run_scenario("product detail", lambda i: request(base_url, "GET", f"/api/products/{product_ids[i % len(product_ids)]}")[0] == 200, args.requests, args.concurrency)
+
+    register_user("benchuser", "bench@example.com", "Bench@1234", "Bench User", "9876543210", "1 Benchmark Road, Test City")
+    run_scenario("login", lambda i: request(base_url, "POST", "/api/login", {'username_or_email': "benchuser", 'password': "Bench@1234"})[0] == 200, args.requests // 4, args.concurrency)
+
+    def checkout(i):
+        _, session, _ = request(base_url, "POST", "/api/session")
+        token = session['token']
+        request(base_url, "POST", "/api/cart/items", {'product_id': product_ids[i % len(product_ids)], 'quantity': 2}, token=token)
+        status, _, _ = request(base_url, "POST", "/api/checkout", {
+            'name': "Bench User", 'email': "bench@example.com", 'phone': "9876543210", 'address': "1 Benchmark Road, Test City"
+        }, token=token)
+        return status == 201
+
+    run_scenario("session + cart + checkout", checkout, args.checkouts, args.concurrency)
+    metrics = server.get_app().checkouts.metrics()
+    print(f"checkout batches: {metrics['batches']}, avg batch {metrics['avg_batch']:.1f}, largest {metrics['largest_batch']}")
+
+    server.shutdown()
+    shutil.rmtree(sandbox, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
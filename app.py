@@ -3,419 +3,146 @@ import qrcode
 from PIL import Image, ImageDraw
 import io
 import base64
-import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+import time
 import csv
 import pandas as pd
 import sqlite3
-import hashlib
-import re
-
-def safe_json_loads(s):
-    """Safely parse a JSON string. Returns {} if invalid or empty."""
-    try:
-        if not s or not s.strip():
-            return {}
-        return json.loads(s)
-    except Exception:
-        return {}
-
-# --- DATABASE & FILE PATHS ---
-DB_PATH = "glambeauty.db"
-PRODUCTS_JSON = "products.json"
-THEME_JSON = "theme.json"
-
-# Check if running on Streamlit Cloud
-def is_streamlit_cloud():
-    """Check if app is running on Streamlit Cloud"""
-    return os.getenv("STREAMLIT_SHARING_MODE") is not None or os.getenv("STREAMLIT_RUNTIME_ENV") == "cloud"
-
-# Use secrets for database configuration on cloud
-def get_db_path():
-    """Get database path - use secrets on cloud"""
-    if is_streamlit_cloud():
-        # On Streamlit Cloud, ensure data directory exists
-        data_dir = os.path.join(os.path.expanduser("~"), ".streamlit_data")
-        os.makedirs(data_dir, exist_ok=True)
-        return os.path.join(data_dir, "glambeauty.db")
-    return DB_PATH
-
-def get_products_path():
-    """Get products JSON path"""
-    if is_streamlit_cloud():
-        data_dir = os.path.join(os.path.expanduser("~"), ".streamlit_data")
-        os.makedirs(data_dir, exist_ok=True)
-        return os.path.join(data_dir, "products.json")
-    return PRODUCTS_JSON
-
-# --- DATABASE INITIALIZATION ---
-def init_db():
-    """Initialize SQLite database and create tables"""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS orders (
-            order_id TEXT PRIMARY KEY,
-            date TEXT,
-            customer_name TEXT,
-            email TEXT,
-            phone TEXT,
-            address TEXT,
-            items_json TEXT,
-            total INTEGER,
-            payment_method TEXT,
-            payment_details_json TEXT,
-            status TEXT,
-            user_id INTEGER
-        )
-    """)
-    
-    c.execute("PRAGMA table_info(orders)")
-    columns = [column[1] for column in c.fetchall()]
-    
-    if 'payment_method' not in columns:
-        try:
-            c.execute("ALTER TABLE orders ADD COLUMN payment_method TEXT DEFAULT 'Cash on Delivery'")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass
-    
-    if 'payment_details_json' not in columns:
-        try:
-            c.execute("ALTER TABLE orders ADD COLUMN payment_details_json TEXT DEFAULT '{}'")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass
-    
-    if 'user_id' not in columns:
-        try:
-            c.execute("ALTER TABLE orders ADD COLUMN user_id INTEGER")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass
-    
-    conn.commit()
-    conn.close()
-
-def init_users_db():
-    """Initialize users table in database"""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            full_name TEXT,
-            phone TEXT,
-            address TEXT,
-            created_at TEXT,
-            last_login TEXT,
-            is_admin INTEGER DEFAULT 0
-        )
-    """)
-    
-    # Create default admin if no users exist
-    c.execute("SELECT COUNT(*) FROM users")
-    user_count = c.fetchone()[0]
-    
-    if user_count == 0 and is_streamlit_cloud():
-        # Create default admin account
-        password_hash = hash_password("Admin@123")
-        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        c.execute("""
-            INSERT INTO users (username, email, password_hash, full_name, phone, address, created_at, is_admin)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
-        """, ("admin", "admin@glambeauty.com", password_hash, "Admin User", "+91 9999999999", "Admin Office", created_at))
-        
-        conn.commit()
-    
-    conn.commit()
-    conn.close()
-
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def validate_email(email):
-    """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_phone(phone):
-    """Validate phone number format"""
-    clean_phone = phone.replace(" ", "").replace("-", "")
-    pattern = r'^(\+91)?[6-9]\d{9}$'
-    return re.match(pattern, clean_phone) is not None
-
-def validate_name(name):
-    """Validate name format"""
-    if len(name) < 2:
-        return False
-    pattern = r'^[a-zA-Z\s]+$'
-    return re.match(pattern, name) is not None
-
-def validate_address(address):
-    """Validate address format"""
-    if len(address) < 10:
-        return False
-    return True
+from search import init_search_index, ensure_search_index, search_products, apply_search_changes
+from facets import FacetIndex, PRICE_BANDS
+from catalog_io import (
+    PRODUCT_CATEGORIES, read_product_upload, validate_product_frame, diff_products,
+    diff_summary_frames, apply_product_diff, iter_products_csv, iter_products_json, spool_export,
+    products_frame, diff_edited_frame, bulk_restock_diff, bulk_reprice_diff, bulk_delete_diff,
+    restock_quantities_diff
+)
+from user_admin import USER_COLUMNS, init_user_indexes, search_users, count_users, set_users_admin
+from order_lookup import init_order_indexes, find_orders
+from mailer import init_outbox, get_smtp_config, smtp_sender, outbox_stats, OutboxWorker
+from login_buffer import LastLoginBuffer
+from group_commit import GroupCommitQueue
+from admission import AdmissionController
+from replica import SnapshotReplica
+from maintenance import init_maintenance, MaintenanceScheduler, maintenance_history, list_backups, database_pages
+from archive import (
+    init_archive, archive_old_orders, fetch_archived_orders, archived_user_stats, archive_stats
+)
+from order_history import init_order_history_index, fetch_order_summaries, count_user_orders, fetch_order_details
+from fulfillment import (
+    init_fulfillment, ORDER_STATUSES, NEXT_STATUSES, QUEUE_COLUMNS, status_counts, fulfillment_queue,
+    transition_orders, order_status_history, current_statuses
+)
+from session_store import init_session_store, load_signing_key, SessionStore
+from theme import load_theme_file, compile_stylesheet, publish_stylesheet, theme_version
+from recommendations import CoOccurrenceIndex
+from forecast import SalesHistory, restock_forecast
+from events import init_events, EventCollector, load_events, funnel_report, ABANDON_AFTER_MINUTES
+from inventory import init_inventory, stock_movements, stock_levels, product_movements, inventory_stats
+from landing_pages import publish_landing_pages, landing_page_url, landing_pages_status, landing_pages_dir
+from store import (
+    safe_json_loads, THEME_JSON, is_streamlit_cloud, get_db_path, init_db, init_users_db,
+    validate_email, validate_phone, validate_password, register_user, authenticate_user,
+    update_user_profile, change_password, read_products, catalog_version,
+    place_orders, commit_catalog, sync_inventory, get_user_by_id
+)
+import uuid
+from collections import Counter
 
-def validate_password(password):
-    """Validate password strength"""
-    if len(password) < 8:
-        return False, "Password must be at least 8 characters long"
-    if not re.search(r'[A-Z]', password):
-        return False, "Password must contain at least one uppercase letter"
-    if not re.search(r'[a-z]', password):
-        return False, "Password must contain at least one lowercase letter"
-    if not re.search(r'\d', password):
-        return False, "Password must contain at least one digit"
-    return True, "Password is strong"
-
-def register_user(username, email, password, full_name, phone, address):
-    """Register a new user"""
-    try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        password_hash = hash_password(password)
-        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        c.execute("""
-            INSERT INTO users (username, email, password_hash, full_name, phone, address, created_at, is_admin)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
-        """, (username, email, password_hash, full_name, phone, address, created_at))
-        
-        conn.commit()
-        conn.close()
-        return True, "Registration successful!"
-    except sqlite3.IntegrityError as e:
-        if 'username' in str(e):
-            return False, "Username already exists"
-        elif 'email' in str(e):
-            return False, "Email already registered"
-        return False, "Registration failed"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 
+# --- USERS, ORDERS & CATALOG (Streamlit side; the shared logic lives in store.py) ---
 def login_user(username_or_email, password):
     """Authenticate user login"""
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        password_hash = hash_password(password)
-        
-        c.execute("""
-            SELECT user_id, username, email, full_name, phone, address, is_admin
-            FROM users 
-            WHERE (username = ? OR email = ?) AND password_hash = ?
-        """, (username_or_email, username_or_email, password_hash))
-        
-        user = c.fetchone()
+        conn = sqlite3.connect(get_db_path())
+        user_data = authenticate_user(conn, username_or_email, password)
+        conn.close()
         
-        if user:
-            c.execute("""
-                UPDATE users 
-                SET last_login = ? 
-                WHERE user_id = ?
-            """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user[0]))
-            conn.commit()
-            
-            user_data = {
-                'user_id': user[0],
-                'username': user[1],
-                'email': user[2],
-                'full_name': user[3],
-                'phone': user[4],
-                'address': user[5],
-                'is_admin': user[6]
-            }
-            conn.close()
+        if user_data:
+            # Written behind in batches, keeping the login path free of write locks
+            LOGIN_BUFFER.record(user_data['user_id'], datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
             return True, "Login successful!", user_data
         else:
-            conn.close()
             return False, "Invalid username/email or password", None
     except Exception as e:
         return False, f"Error: {str(e)}", None
 
-def update_user_profile(user_id, full_name, phone, address):
-    """Update user profile information"""
+def fetch_orders_from_db():
+    """Fetch all orders from the reporting snapshot"""
+    conn = REPLICA.connect()
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
         c = conn.cursor()
-        
-        c.execute("""
-            UPDATE users 
-            SET full_name = ?, phone = ?, address = ?
-            WHERE user_id = ?
-        """, (full_name, phone, address, user_id))
-        
-        conn.commit()
+        c.execute("SELECT * FROM orders ORDER BY date DESC")
+        return c.fetchall()
+    finally:
         conn.close()
-        return True, "Profile updated successfully!"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
 
-def change_password(user_id, old_password, new_password):
-    """Change user password"""
+@st.cache_data
+def load_catalog(version):
+    """Catalog as of a given file version (cached per version)"""
+    return read_products()
+
+def load_products():
+    """Load products from JSON file, reloading when another process (e.g. the API) changed it"""
+    return load_catalog(catalog_version())
+
+def commit_catalog_changes(new_products, upserted, deleted_ids, stock_kind='adjustment'):
+    """Persist a batch of catalog changes with one catalog write and one index update.
+    
+    Stock differences from the catalog the admin was looking at are recorded in
+    the inventory ledger as `stock_kind` movements.
+    """
+    conn = sqlite3.connect(get_db_path(), timeout=30)
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        old_hash = hash_password(old_password)
-        
-        c.execute("SELECT password_hash FROM users WHERE user_id = ?", (user_id,))
-        result = c.fetchone()
-        
-        if not result or result[0] != old_hash:
-            conn.close()
-            return False, "Current password is incorrect"
-        
-        new_hash = hash_password(new_password)
-        c.execute("UPDATE users SET password_hash = ? WHERE user_id = ?", (new_hash, user_id))
-        
-        conn.commit()
+        written = commit_catalog(conn, new_products, stock_movements(PRODUCTS, new_products, stock_kind))
+    finally:
         conn.close()
-        return True, "Password changed successfully!"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
-
-def save_order_to_db(order):
-    """Save order to database"""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    items_json = json.dumps(order['items'])
-    payment_details_json = json.dumps(order.get('payment_details', {}))
-    
-    c.execute("""
-        INSERT INTO orders (
-            order_id, date, customer_name, email, 
-            phone, address, items_json, total, payment_method, payment_details_json, status, user_id
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        order['order_id'],
-        order['order_date'],
-        order['customer_name'],
-        order['customer_email'],
-        order['customer_phone'],
-        order['customer_address'],
-        items_json,
-        order['total_amount'],
-        order['payment_method'],
-        payment_details_json,
-        order['status'],
-        order.get('user_id')
-    ))
-    
-    conn.commit()
-    conn.close()
+    load_catalog.clear()
+    written_by_id = {p['id']: p for p in written}
+    upserted = [written_by_id[p['id']] for p in upserted]
+    apply_search_changes(get_db_path(), upserted, deleted_ids)
+    FACETS.update_products(upserted)
+    FACETS.remove_products(deleted_ids)
+    publish_landing_pages(upserted, deleted_ids)
 
-def fetch_orders_from_db():
-    """Fetch all orders from database"""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("SELECT * FROM orders ORDER BY date DESC")
-    rows = c.fetchall()
-    conn.close()
-    return rows
+STATUS_ACTIONS = {
+    'Packed': "📦 Mark Packed",
+    'Shipped': "🚚 Mark Shipped",
+    'Delivered': "✅ Mark Delivered",
+    'Cancelled': "❌ Cancel",
+}
 
-@st.cache_data
-def load_products():
-    """Load products from JSON file"""
-    products_path = get_products_path()
-    if os.path.exists(products_path):
-        with open(products_path, 'r') as f:
-            products = json.load(f)
-            # Ensure all products have stock field
-            for p in products:
-                if 'stock' not in p:
-                    p['stock'] = 15
-            return products
-    else:
-        default_products = [
-            {
-                "id": 1,
-                "name": "Ruby Red Lipstick",
-                "price": 899,
-                "category": "Lips",
-                "description": "Long-lasting matte finish lipstick with rich pigmentation. Perfect for all-day wear.",
-                "image": "https://images.pexels.com/photos/14839822/pexels-photo-14839822.jpeg",
-                "stock": 15
-            },
-            {
-                "id": 2,
-                "name": "Rose Petal Blush",
-                "price": 749,
-                "category": "Face",
-                "description": "Silky smooth blush that gives you a natural rosy glow. Buildable formula.",
-                "image": "https://images.pexels.com/photos/17354882/pexels-photo-17354882.jpeg",
-                "stock": 15
-            },
-            {
-                "id": 3,
-                "name": "Midnight Black Eyeliner",
-                "price": 599,
-                "category": "Eyes",
-                "description": "Waterproof gel eyeliner with precision applicator. Smudge-proof formula.",
-                "image": "https://images.pexels.com/photos/2697787/pexels-photo-2697787.jpeg",
-                "stock": 15
-            },
-            {
-                "id": 4,
-                "name": "Hydrating Face Cream",
-                "price": 1299,
-                "category": "Skincare",
-                "description": "24-hour moisturizing cream with hyaluronic acid. Suitable for all skin types.",
-                "image": "https://images.pexels.com/photos/10221859/pexels-photo-10221859.jpeg",
-                "stock": 15
-            },
-            {
-                "id": 5,
-                "name": "Nude Matte Lipstick",
-                "price": 899,
-                "category": "Lips",
-                "description": "Everyday nude shade with comfortable matte finish. Non-drying formula.",
-                "image": "https://images.pexels.com/photos/28968376/pexels-photo-28968376.jpeg",
-                "stock": 15
-            }
-        ]
-        with open(products_path, "w") as f:
-            json.dump(default_products, f, indent=2)
-        return default_products
-
-def save_products(products):
-    """Save products to JSON file"""
-    products_path = get_products_path()
-    with open(products_path, "w") as f:
-        json.dump(products, f, indent=2)
-    load_products.clear()
+def apply_order_transition(order_ids, to_status):
+    """Move orders to a new status in one transaction; returns (moved, rejected).
+    
+    Stock given back by cancellations is pushed to the facets and product pages
+    the same way catalog edits are, and the order list snapshot is refreshed in
+    the background.
+    """
+    conn = sqlite3.connect(get_db_path(), timeout=30)
+    try:
+        moved, rejected, changed = transition_orders(conn, order_ids, to_status, changed_by=st.session_state.user['username'])
+    finally:
+        conn.close()
+    if changed:
+        load_catalog.clear()
+        FACETS.update_products(changed)
+        publish_landing_pages(changed)
+    get_admin_stats.clear()
+    if moved:
+        REPLICA.request_refresh()
+    return moved, rejected
 
-@st.cache_data
-def load_theme():
-    """Load theme configuration"""
-    if os.path.exists(THEME_JSON):
-        with open(THEME_JSON, "r") as f:
-            return json.load(f)
-    return {
-        "primary_color": "#8b4789",
-        "background": "#ffffff",
-        "card_shadow": "0 4px 6px rgba(0,0,0,0.1)"
-    }
+@st.cache_resource
+def build_theme(version):
+    """Compile theme.json into a content-hashed stylesheet (once per process and theme version)"""
+    tokens = load_theme_file(THEME_JSON)
+    css, digest = compile_stylesheet(tokens)
+    href = None
+    if st.get_option("server.enableStaticServing"):
+        href = "app/static/" + publish_stylesheet(css, digest, STATIC_DIR)
+    return {'css': css, 'digest': digest, 'href': href, 'tokens': tokens}
 
 def get_app_url():
     """Get the current Streamlit app URL"""
@@ -427,6 +154,17 @@ def get_app_url():
         return st.session_state.app_url
     return "http://localhost:8501"
 
+def get_landing_pages_url():
+    """Public base URL of the static product pages, if QR codes should point at them"""
+    return os.getenv('LANDING_PAGES_URL') or st.session_state.get('landing_pages_url')
+
+def get_product_qr_url(product_id):
+    """QR target for a product: its static landing page when configured, else the app"""
+    landing_url = get_landing_pages_url()
+    if landing_url:
+        return landing_page_url(landing_url, product_id)
+    return f"{get_app_url()}?product_id={product_id}"
+
 def generate_qr_code(data, product_name):
     """Generate QR code without center overlay"""
     qr = qrcode.QRCode(
@@ -437,7 +175,7 @@ def generate_qr_code(data, product_name):
     )
     qr.add_data(data)
     qr.make(fit=True)
-    img = qr.make_image(fill_color="#8b4789", back_color="white")
+    img = qr.make_image(fill_color=THEME['tokens']['primary_color'], back_color="white")
     img = img.convert('RGB')
     return img
 
@@ -463,6 +201,8 @@ def add_to_cart(product):
     else:
         st.session_state.cart_count[product_id] = 1
     st.session_state.cart_update_trigger += 1
+    persist_session()
+    track_event('add_to_cart', product_id, product['price'])
     st.success(f"✅ {product['name']} added to cart!")
     st.rerun()
 
@@ -476,20 +216,150 @@ def remove_from_cart(index):
             del st.session_state.cart_count[product_id]
     st.session_state.cart.pop(index)
     st.session_state.cart_update_trigger += 1
+    persist_session()
+    track_event('remove_from_cart', product_id, product['price'])
     st.rerun()
 
+LOGIN_COOKIE = 'glam_login'
+
+def restore_session():
+    """Pick up the login and cart from the session store, or start a new session.
+
+    Runs once per browser session; afterwards session_state is the cache and
+    persist_session() writes changes back. A logged-in session's token is kept
+    in the LOGIN_COOKIE cookie, so the login follows the browser to any replica.
+    A guest token travels in the ?session= URL and only ever restores a cart.
+    """
+    token = st.context.cookies.get(LOGIN_COOKIE)
+    state = SESSIONS.load(token) if token else None
+    user = None
+    if state and state[0]:
+        conn = sqlite3.connect(get_db_path())
+        try:
+            user = get_user_by_id(conn, state[0])
+        finally:
+            conn.close()
+    if user:
+        st.session_state.logged_in = True
+        st.session_state.user = user
+        st.session_state.page = 'admin_dashboard' if user['is_admin'] else 'customer_dashboard'
+        st.query_params.pop('session', None)
+    else:
+        if token:
+            set_login_cookie(None)
+        token = st.query_params.get('session')
+        state = SESSIONS.load(token) if token else None
+        if state:
+            if state[0]:
+                # A token that carries a login never comes from a URL; keep the cart, not the token
+                token = SESSIONS.new_token()
+                st.query_params['session'] = token
+            elif state[1]:
+                st.session_state.page = 'home'
+        else:
+            token = SESSIONS.new_token()
+            st.query_params['session'] = token
+    if state:
+        st.session_state.cart = [PRODUCTS_BY_ID[pid] for pid in state[1] if pid in PRODUCTS_BY_ID]
+        st.session_state.cart_count = dict(Counter(p['id'] for p in st.session_state.cart))
+    st.session_state.session_token = token
+    # Funnel events keep one id for the whole visit, across token rotations
+    st.session_state.event_session_id = token.partition(".")[0]
+
+def persist_session(flush=False):
+    """Queue the current cart and login for the session store (flush=True writes immediately)"""
+    user = st.session_state.user if st.session_state.get('logged_in') else None
+    SESSIONS.save(
+        st.session_state.session_token,
+        user['user_id'] if user else None,
+        [p['id'] for p in st.session_state.cart],
+        flush=flush
+    )
+
+def set_login_cookie(token):
+    """Have the next run store the login token in the browser's cookie (None removes it)"""
+    st.session_state.login_cookie_update = token or ""
+
+def write_login_cookie():
+    """Send a pending login cookie change to the browser.
+
+    The cookie is set from a script, so it cannot be HttpOnly; it is kept out
+    of URLs, history and Referer headers and is only sent back to this site.
+    """
+    if 'login_cookie_update' not in st.session_state:
+        return
+    token = st.session_state.pop('login_cookie_update')
+    max_age = SESSIONS.ttl if token else 0
+    st.html(
+        f"<script>document.cookie = '{LOGIN_COOKIE}={token}; path=/; max-age={max_age}; SameSite=Strict'"
+        " + (location.protocol === 'https:' ? '; Secure' : '');</script>",
+        unsafe_allow_javascript=True
+    )
+
+ORDER_HISTORY_STATE = ('order_page_cursors', 'show_archived_orders', 'opened_orders')
+
+def clear_order_history_state():
+    """Forget the order list position of the previous user (on login and logout)"""
+    for key in ORDER_HISTORY_STATE:
+        st.session_state.pop(key, None)
+
+def rotate_session():
+    """Move the cart to a fresh session token and delete the old one (on login and logout).
+
+    A token that was seen before the login, e.g. in a shared link, never
+    belongs to the logged-in visit. A logged-in token goes to the login cookie
+    and leaves the URL; after logout the new guest token goes back to the URL.
+    Deleting the old token also ends the login on every other replica.
+    """
+    old_token = st.session_state.session_token
+    st.session_state.session_token = SESSIONS.new_token()
+    if st.session_state.get('logged_in'):
+        st.query_params.pop('session', None)
+        set_login_cookie(st.session_state.session_token)
+    else:
+        st.query_params['session'] = st.session_state.session_token
+        set_login_cookie(None)
+    persist_session(flush=True)
+    SESSIONS.delete(old_token)
+
+def track_event(event, product_id=None, value=None):
+    """Queue a shopper event for the current session (buffered, never blocks the page)"""
+    user = st.session_state.user if st.session_state.get('logged_in') else None
+    EVENTS.track(
+        event,
+        session_id=st.session_state.event_session_id,
+        user_id=user['user_id'] if user else None,
+        product_id=product_id,
+        value=value
+    )
+
+def commit_checkout_batch(requests):
+    """Commit a batch of checkouts: one transaction for the orders, one catalog write for the stock"""
+    conn = sqlite3.connect(get_db_path(), timeout=30)
+    try:
+        results, changed = place_orders(conn, requests)
+    finally:
+        conn.close()
+    
+    if changed:
+        load_catalog.clear()
+        FACETS.update_products(changed)
+        RECOMMENDATIONS.catch_up()
+        try:
+            publish_landing_pages(changed)
+        except OSError:
+            pass  # the orders are committed; pages catch up on the next rebuild
+        if OUTBOX_WORKER:
+            OUTBOX_WORKER.wake()
+    return results
+
 def save_order(customer_info, cart_items, total_amount, payment_method, payment_details=None, user_id=None):
-    """Save order to database and update stock"""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM orders")
-    order_count = c.fetchone()[0]
-    conn.close()
+    """Save order to database and update stock.
     
-    order = {
-        'order_id': f"ORD{order_count + 1:04d}",
-        'order_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    Checkouts go through the group-commit pipeline, which commits concurrent
+    orders together. Returns (success, order_id or error message).
+    """
+    request = {
         'customer_name': customer_info['name'],
         'customer_email': customer_info['email'],
         'customer_phone': customer_info['phone'],
@@ -501,21 +371,15 @@ def save_order(customer_info, cart_items, total_amount, payment_method, payment_
         'status': 'Confirmed',
         'user_id': user_id
     }
-    save_order_to_db(order)
-    
-    # Update stock for each product
-    for item in cart_items:
-        for product in PRODUCTS:
-            if product['id'] == item['id']:
-                product['stock'] = max(0, product.get('stock', 15) - 1)
-                break
-    save_products(PRODUCTS)
-    
-    return order['order_id']
+    try:
+        return True, CHECKOUT_PIPELINE.submit(request)
+    except Exception as e:
+        return False, str(e)
 
-def export_orders_csv():
+def export_orders_csv(rows=None):
     """Export orders to CSV format"""
-    rows = fetch_orders_from_db()
+    if rows is None:
+        rows = fetch_orders_from_db()
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(['Order ID', 'Date', 'Customer Name', 'Email', 'Phone', 'Address', 'Items', 'Total', 'Payment Method', 'Status'])
@@ -533,11 +397,137 @@ def export_orders_csv():
     
     return output.getvalue()
 
+@st.cache_resource
+def prepare_search_index(product_count):
+    """Create the search index and rebuild it if it does not match the catalog (once per process)"""
+    init_search_index(get_db_path())
+    ensure_search_index(get_db_path(), PRODUCTS)
+    return True
+
+@st.cache_resource
+def prepare_landing_pages(product_count):
+    """Bring the static product pages up to date once per process (only changed pages are written)"""
+    return publish_landing_pages(load_products(), prune=True)
+
+@st.cache_resource
+def get_recommendations():
+    """Build the co-occurrence index from order history once per process"""
+    return CoOccurrenceIndex(get_db_path()).build()
+
+@st.cache_resource
+def prepare_inventory():
+    """Open ledger rows for products that have none and align catalog stock with the ledger, once per process"""
+    return sync_inventory(get_db_path())
+
+@st.cache_resource
+def get_sales_history():
+    """Per-process sales history for the restock forecast (refreshed incrementally on use)"""
+    return SalesHistory(get_db_path(), window_days=int(os.getenv("FORECAST_WINDOW_DAYS", "28")))
+
+@st.cache_resource
+def get_facet_index():
+    """Build the catalog facet index once per process"""
+    version = catalog_version()
+    return FacetIndex(load_catalog(version), version)
+
+@st.cache_resource
+def start_outbox_worker():
+    """Start the confirmation email worker once per process (only when SMTP is configured)"""
+    config = get_smtp_config()
+    if not config:
+        return None
+    worker = OutboxWorker(get_db_path(), smtp_sender(config))
+    worker.start()
+    return worker
+
+@st.cache_resource
+def start_event_collector():
+    """Start the shopper event buffer once per process"""
+    init_events(get_db_path())
+    return EventCollector(get_db_path()).start()
+
+@st.cache_resource
+def start_login_buffer():
+    """Start the last_login write-behind buffer once per process"""
+    return LastLoginBuffer(get_db_path()).start()
+
+@st.cache_resource
+def start_checkout_pipeline():
+    """Start the single checkout writer once per process; batch size and wait are tunable by env"""
+    return GroupCommitQueue(
+        commit_checkout_batch,
+        max_batch_size=int(os.getenv("CHECKOUT_BATCH_SIZE", "100")),
+        max_wait_ms=float(os.getenv("CHECKOUT_BATCH_WAIT_MS", "5")),
+        name="checkout-writer"
+    ).start()
+
+@st.cache_resource
+def start_admission_controller():
+    """Create the per-process admission controller; limits come from the environment"""
+    return AdmissionController(
+        max_active=int(os.getenv("MAX_ACTIVE_SESSIONS", "200")),
+        max_checkouts=int(os.getenv("MAX_CONCURRENT_CHECKOUTS", "20")),
+        idle_timeout=int(os.getenv("SESSION_IDLE_TIMEOUT", "300"))
+    )
+
+@st.cache_resource
+def start_snapshot_replica():
+    """Start the reporting snapshot refresher once per process"""
+    return SnapshotReplica(get_db_path(), refresh_interval=int(os.getenv("SNAPSHOT_REFRESH_SECONDS", "60"))).start()
+
+@st.cache_resource
+def start_maintenance():
+    """Start the database maintenance scheduler once per process (intervals in hours from the environment)"""
+    init_maintenance(get_db_path())
+    return MaintenanceScheduler(
+        get_db_path(),
+        backup_dir=os.getenv("BACKUP_DIR", os.path.join(os.path.dirname(get_db_path()), "backups")),
+        backup_interval=float(os.getenv("BACKUP_INTERVAL_HOURS", "6")) * 3600,
+        keep_backups=int(os.getenv("BACKUP_KEEP", "7")),
+        optimize_interval=float(os.getenv("OPTIMIZE_INTERVAL_HOURS", "24")) * 3600,
+        free_page_ratio=float(os.getenv("VACUUM_FREE_RATIO", "0.2"))
+    ).start()
+
+@st.cache_resource
+def start_session_store():
+    """Start the shared session/cart store once per process; TTL is set by SESSION_TTL_SECONDS"""
+    init_session_store(get_db_path())
+    return SessionStore(
+        get_db_path(),
+        load_signing_key(get_db_path()),
+        ttl=int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+    ).start()
+
 # Initialize database and load data
 init_db()
 init_users_db()
-PRODUCTS = load_products()
-THEME = load_theme()
+init_user_indexes(get_db_path())
+init_outbox(get_db_path())
+init_archive(get_db_path())
+init_order_indexes(get_db_path())
+init_order_history_index(get_db_path())
+init_fulfillment(get_db_path())
+init_inventory(get_db_path())
+prepare_inventory()
+OUTBOX_WORKER = start_outbox_worker()
+LOGIN_BUFFER = start_login_buffer()
+EVENTS = start_event_collector()
+CHECKOUT_PIPELINE = start_checkout_pipeline()
+ADMISSION = start_admission_controller()
+REPLICA = start_snapshot_replica()
+MAINTENANCE = start_maintenance()
+SESSIONS = start_session_store()
+CATALOG_VERSION = catalog_version()
+PRODUCTS = load_catalog(CATALOG_VERSION)
+PRODUCTS_BY_ID = {p['id']: p for p in PRODUCTS}
+prepare_search_index(len(PRODUCTS))
+prepare_landing_pages(len(PRODUCTS))
+FACETS = get_facet_index()
+RECOMMENDATIONS = get_recommendations()
+# Stock and catalog edits from the API, admin.py or another replica change the catalog version
+if FACETS.version != CATALOG_VERSION:
+    FACETS.rebuild(PRODUCTS, CATALOG_VERSION)
+THEME = build_theme(theme_version(THEME_JSON))
 
 # --- PAGE CONFIG & ENHANCED CSS ---
 st.set_page_config(
@@ -547,146 +537,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown("""
-    <style>
-    .main {
-        background: linear-gradient(135deg, #fef9f3 0%, #fef3f8 25%, #f3f9fe 50%, #fef6f0 75%, #f8f3fe 100%);
-        padding: 1rem 2rem;
-    }
-    
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #e8f4f8 0%, #f0e8f8 50%, #f8f0e8 100%);
-        border-right: 4px solid #b8a8d8;
-    }
-    
-    .product-card {
-        background: #ffffff !important;
-        border: 3px solid #d4a8c8 !important;
-        border-radius: 25px !important;
-        padding: 30px !important;
-        margin: 20px 10px !important;
-        box-shadow: 0 10px 30px rgba(139, 71, 137, 0.15) !important;
-        transition: all 0.4s ease !important;
-    }
-    
-    .product-card:hover {
-        transform: translateY(-8px) !important;
-        box-shadow: 0 15px 40px rgba(139, 71, 137, 0.25) !important;
-        border-color: #b89cc8 !important;
-    }
-    
-    .price-tag {
-        font-size: 28px;
-        color: #ffffff;
-        font-weight: 900;
-        background: linear-gradient(135deg, #9b5d9d 0%, #7a4a7c 100%);
-        padding: 10px 24px;
-        border-radius: 15px;
-        display: inline-block;
-        border: 3px solid #b89cc8;
-        box-shadow: 0 6px 15px rgba(139, 71, 137, 0.3);
-    }
-    
-    .header-title {
-        text-align: center;
-        background: linear-gradient(135deg, #8b4789 0%, #6b3669 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        font-size: 52px;
-        font-weight: bold;
-        margin-bottom: 10px;
-    }
-    
-    .subtitle {
-        text-align: center;
-        color: #7a4a7c;
-        font-size: 20px;
-        margin-bottom: 30px;
-        font-weight: 600;
-    }
-    
-    .stButton > button {
-        background: linear-gradient(135deg, #8b4789 0%, #9b5d9d 100%) !important;
-        color: white !important;
-        border: 2px solid #b89cc8 !important;
-        border-radius: 12px !important;
-        padding: 12px 24px !important;
-        font-weight: 700 !important;
-        box-shadow: 0 4px 12px rgba(139, 71, 137, 0.3) !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #9b5d9d 0%, #8b4789 100%) !important;
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 16px rgba(139, 71, 137, 0.4) !important;
-    }
-    
-    .stAlert {
-        border-radius: 15px !important;
-        border-left: 5px solid #8b4789 !important;
-        background: #ffffff !important;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.08) !important;
-    }
-    
-    .stTabs [data-baseweb="tab-list"] {
-        background: #ffffff;
-        border-radius: 15px;
-        padding: 10px;
-        border: 2px solid #d4a8c8;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: #fef5f9;
-        border-radius: 10px;
-        color: #8b4789;
-        font-weight: 600;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #8b4789 0%, #9b5d9d 100%);
-        color: white !important;
-    }
-    
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea,
-    .stSelectbox > div > div > select {
-        background: #ffffff !important;
-        border: 2px solid #d4a8c8 !important;
-        border-radius: 12px !important;
-        padding: 12px !important;
-        color: #333 !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > div > textarea:focus {
-        border-color: #8b4789 !important;
-        box-shadow: 0 0 0 2px rgba(139, 71, 137, 0.2) !important;
-    }
-    
-    .streamlit-expanderHeader {
-        background: #ffffff !important;
-        border: 2px solid #d4a8c8 !important;
-        border-radius: 12px !important;
-        color: #8b4789 !important;
-        font-weight: 600 !important;
-    }
-    
-    hr {
-        border-color: #d4a8c8 !important;
-        margin: 30px 0 !important;
-    }
-    
-    .cart-item-box {
-        background: #ffffff;
-        border: 2px solid #d4a8c8;
-        border-radius: 15px;
-        padding: 20px;
-        margin: 15px 0;
-        box-shadow: 0 4px 12px rgba(139, 71, 137, 0.1);
-    }
-    </style>
-""", unsafe_allow_html=True)
+# The stylesheet is served as a static file, so each rerun only sends a one-line import
+if THEME['href']:
+    st.markdown(f"<style>@import url('{THEME['href']}');</style>", unsafe_allow_html=True)
+else:
+    st.markdown(f"<style>{THEME['css']}</style>", unsafe_allow_html=True)
 
 # --- SESSION STATE ---
 if 'cart' not in st.session_state:
@@ -709,6 +564,11 @@ if 'checkout_as_guest' not in st.session_state:
     st.session_state.checkout_as_guest = False
 if 'app_url' not in st.session_state:
     st.session_state.app_url = None
+if 'admission_token' not in st.session_state:
+    st.session_state.admission_token = uuid.uuid4().hex
+if 'session_token' not in st.session_state:
+    restore_session()
+write_login_cookie()
 
 # --- HANDLE QR CODE ---
 query_params = st.query_params
@@ -718,7 +578,7 @@ if 'product_id' in query_params:
         if any(p['id'] == product_id for p in PRODUCTS):
             st.session_state.selected_product = product_id
             st.session_state.page = 'product'
-        st.query_params.clear()
+        del st.query_params['product_id']
     except (ValueError, TypeError):
         pass
 
@@ -731,9 +591,9 @@ def display_product_card(product, col):
         
         st.markdown(f"""
             <div class="product-card">
-                <div style='text-align: center; margin-bottom: 15px;'>
-                    <h3 style="color: #8b4789; margin-bottom: 8px;">{product['name']}</h3>
-                    <span style="background: #e8d5f2; padding: 5px 15px; border-radius: 20px; color: #8b4789; font-size: 12px; font-weight: 600;">
+                <div class="gb-card-head">
+                    <h3 class="gb-card-name">{product['name']}</h3>
+                    <span class="gb-tag">
                         {product['category']}
                     </span>
                 </div>
@@ -741,24 +601,24 @@ def display_product_card(product, col):
         """, unsafe_allow_html=True)
         
         st.markdown(f"""
-            <div style='padding: 0 10px; position: relative;'>
-                <img src='{product['image']}' style='width: 100%; height: 280px; object-fit: contain; border-radius: 15px; border: 2px solid #d4a8c8; background: #fefefe; {"opacity: 0.5;" if is_out_of_stock else ""}'>
-                {f"<div style='position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%); background: rgba(255,0,0,0.8); color: white; padding: 10px 20px; border-radius: 10px; font-weight: bold; font-size: 18px;'>OUT OF STOCK</div>" if is_out_of_stock else ""}
+            <div class='gb-product-media'>
+                <img src='{product['image']}' class='gb-product-img{" gb-faded" if is_out_of_stock else ""}'>
+                {"<div class='gb-out-overlay'>OUT OF STOCK</div>" if is_out_of_stock else ""}
             </div>
         """, unsafe_allow_html=True)
         
-        st.markdown(f"<div style='text-align: center; margin: 15px 0;'><span class='price-tag'>₹{product['price']}</span></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='gb-price-row'><span class='price-tag'>₹{product['price']}</span></div>", unsafe_allow_html=True)
         
         # Stock indicator
         if is_out_of_stock:
-            st.markdown("<p style='text-align: center; color: red; font-weight: bold;'>⚠️ Out of Stock</p>", unsafe_allow_html=True)
+            st.markdown("<p class='gb-stock-out'>⚠️ Out of Stock</p>", unsafe_allow_html=True)
         elif stock <= 5:
-            st.markdown(f"<p style='text-align: center; color: orange; font-weight: bold;'>⚠️ Only {stock} left!</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='gb-stock-low'>⚠️ Only {stock} left!</p>", unsafe_allow_html=True)
         else:
-            st.markdown(f"<p style='text-align: center; color: green;'>✅ In Stock ({stock} available)</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='gb-stock-ok'>✅ In Stock ({stock} available)</p>", unsafe_allow_html=True)
         
         desc = product['description'][:80] + ("..." if len(product['description']) > 80 else "")
-        st.markdown(f"<p style='text-align: center; color: #666; font-size: 14px; padding: 0 10px;'>{desc}</p>", unsafe_allow_html=True)
+        st.markdown(f"<p class='gb-card-desc'>{desc}</p>", unsafe_allow_html=True)
         
         col1, col2 = st.columns(2)
         with col1:
@@ -773,75 +633,138 @@ def display_product_card(product, col):
                 if st.button("🛒 Add", key=f"add_{product['id']}", use_container_width=True):
                     add_to_cart(product)
 
+def pagination_controls(total_items, page_size, key):
+    """Render a page selector and return the selected page (1-based)"""
+    total_pages = max(1, (total_items + page_size - 1) // page_size)
+    if st.session_state.get(key, 1) > total_pages:
+        st.session_state[key] = 1
+    if total_pages == 1:
+        return 1
+    return st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, step=1, key=key)
+
 def display_user_orders(user_id, limit=None):
-    """Display orders for specific user"""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
+    """Display a customer's orders a page at a time (just the latest `limit` when given).
     
+    Only order summaries are read for the list; an order's address and items
+    are fetched when the customer opens it.
+    """
+    db_path = get_db_path()
+    # Older orders live in the archive file and are only read when asked for
+    include_archived = not limit and st.session_state.get('show_archived_orders', False)
     if limit:
-        c.execute("SELECT * FROM orders WHERE user_id = ? ORDER BY date DESC LIMIT ?", (user_id, limit))
+        cursor = None
     else:
-        c.execute("SELECT * FROM orders WHERE user_id = ? ORDER BY date DESC", (user_id,))
+        if 'order_page_cursors' not in st.session_state:
+            st.session_state.order_page_cursors = [None]
+        cursor = st.session_state.order_page_cursors[-1]
     
-    rows = c.fetchall()
-    conn.close()
+    rows, next_cursor = fetch_order_summaries(db_path, user_id, cursor=cursor, limit=limit or 10, include_archived=include_archived)
     
-    if not rows:
+    if not rows and cursor is None:
         st.info("You haven't placed any orders yet. Start shopping!")
         if st.button("Start Shopping", key="start_shop_orders"):
             st.session_state.page = 'home'
             st.rerun()
         return
     
-    st.write(f"### Total Orders: {len(rows)}")
+    st.write(f"### Total Orders: {count_user_orders(db_path, user_id, include_archived=include_archived)}")
     
-    for row in rows:
-        if len(row) >= 11:
-            order_id, date, name, email, phone, address, items_json, total, payment_method, payment_details_json, status = row[:11]
-            payment_details = safe_json_loads(payment_details_json)
-        else:
-            order_id, date, name, email, phone, address, items_json, total, status = row[:9]
-            payment_method = "Cash on Delivery"
-            payment_details = {}
+    if 'opened_orders' not in st.session_state:
+        st.session_state.opened_orders = set()
+    for order_id, date, total, status, payment_method in rows:
+        is_open = order_id in st.session_state.opened_orders
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.write(f"🛍️ **Order #{order_id}** - {date} - ₹{total} - {status}")
+        with col2:
+            if st.button("🔼 Hide" if is_open else "🔽 Details", use_container_width=True, key=f"order_toggle_{'recent' if limit else 'all'}_{order_id}"):
+                st.session_state.opened_orders ^= {order_id}
+                st.rerun()
+        if is_open:
+            show_order_details(user_id, order_id, status, payment_method or "Cash on Delivery")
+    
+    if limit:
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("← Previous", use_container_width=True, disabled=len(st.session_state.order_page_cursors) == 1, key="orders_prev"):
+            st.session_state.order_page_cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next →", use_container_width=True, disabled=next_cursor is None, key="orders_next"):
+            st.session_state.order_page_cursors.append(next_cursor)
+            st.rerun()
+    
+    if next_cursor is None and not include_archived:
+        if st.button("📜 Show Older Orders", key="show_archived_orders_btn"):
+            st.session_state.show_archived_orders = True
+            st.rerun()
+
+def show_order_details(user_id, order_id, status, payment_method):
+    """Delivery details and items of one order, read only when it is opened"""
+    details = fetch_order_details(get_db_path(), order_id, user_id)
+    if details is None:
+        st.warning("This order is no longer available.")
+        return
+    address, phone, items_json = details
+    items = safe_json_loads(items_json)
+    
+    with st.expander(f"Order #{order_id}", expanded=True):
+        col1, col2 = st.columns(2)
         
-        items = safe_json_loads(items_json)
+        with col1:
+            st.write("#### 📍 Delivery Details")
+            st.write(f"**Address:** {address}")
+            st.write(f"**Phone:** {phone}")
         
-        with st.expander(f"🛍️ Order #{order_id} - {date} - ₹{total} - {status}"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.write("#### 📍 Delivery Details")
-                st.write(f"**Address:** {address}")
-                st.write(f"**Phone:** {phone}")
-            
-            with col2:
-                st.write("#### 💳 Payment Details")
-                st.write(f"**Status:** {status}")
-                st.write(f"**Payment Method:** {payment_method}")
-            
-            st.divider()
-            st.write("#### 🛍️ Order Items:")
-            for item in items:
-                c1, c2, c3 = st.columns([2, 4, 2])
-                with c1:
-                    st.image(item['image'], width=80)
-                with c2:
-                    st.write(f"**{item['name']}**")
-                    st.write(f"{item['category']}")
-                with c3:
-                    st.write(f"₹{item['price']}")
+        with col2:
+            st.write("#### 💳 Payment Details")
+            st.write(f"**Status:** {status}")
+            st.write(f"**Payment Method:** {payment_method}")
+        
+        st.divider()
+        st.write("#### 🛍️ Order Items:")
+        for item in items:
+            c1, c2, c3 = st.columns([2, 4, 2])
+            with c1:
+                st.image(item['image'], width=80)
+            with c2:
+                st.write(f"**{item['name']}**")
+                st.write(f"{item['category']}")
+            with c3:
+                st.write(f"₹{item['price']}")
 
 # --- PAGE FUNCTIONS ---
+WAITING_ROOM_REFRESH_SECONDS = 5
+
+def waiting_room_page(queue_position, estimated_wait):
+    """Display the waiting room while the store is at capacity"""
+    st.markdown(f"""
+        <div class='gb-panel gb-panel-narrow'>
+            <h1 class='gb-title'>💄 GlamBeauty</h1>
+            <h2 class='gb-title'>⏳ You're in the queue!</h2>
+            <p class='gb-lead'>Our sale is very popular right now. You'll be let in automatically, please keep this page open.</p>
+            <h1 class='gb-queue-number'>#{queue_position}</h1>
+            <p class='gb-muted'>Your place in line</p>
+        </div>
+    """, unsafe_allow_html=True)
+    if estimated_wait is None:
+        st.info("⏱️ Estimating your wait time...")
+    else:
+        minutes, seconds = divmod(int(estimated_wait), 60)
+        st.info(f"⏱️ Estimated wait: {minutes} min {seconds} s" if minutes else f"⏱️ Estimated wait: {seconds} s")
+    time.sleep(WAITING_ROOM_REFRESH_SECONDS)
+    st.rerun()
+
 def login_page():
     """Display login/registration page"""
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col2:
         st.markdown("""
-            <div style='padding: 40px; background: #ffffff; border-radius: 20px; box-shadow: 0 8px 24px rgba(0,0,0,0.08); border: 3px solid #d4a8c8;'>
-                <h1 style='text-align: center; color: #8b4789; font-size: 36px; margin-bottom: 10px;'>💄 GlamBeauty</h1>
-                <p style='text-align: center; color: #666; margin-bottom: 30px;'>Welcome to Premium Cosmetics</p>
+            <div class='gb-panel'>
+                <h1 class='gb-brand'>💄 GlamBeauty</h1>
+                <p class='gb-tagline'>Welcome to Premium Cosmetics</p>
             </div>
         """, unsafe_allow_html=True)
         
@@ -880,6 +803,8 @@ def login_page():
                     if success:
                         st.session_state.logged_in = True
                         st.session_state.user = user_data
+                        clear_order_history_state()
+                        rotate_session()
                         if user_data['is_admin']:
                             st.session_state.page = 'admin_dashboard'
                         else:
@@ -948,8 +873,8 @@ def home_page():
     
     if st.session_state.get('logged_in') and st.session_state.get('user'):
         st.markdown(f"""
-            <div style='background: linear-gradient(135deg, #b8e6d5 0%, #95d5b2 100%); padding: 20px; border-radius: 15px; margin-bottom: 20px; text-align: center; border: 3px solid #74c69d;'>
-                <h3 style='color: #1b4332; margin: 0;'>👋 Welcome back, {st.session_state.user['full_name']}!</h3>
+            <div class='gb-welcome'>
+                <h3>👋 Welcome back, {st.session_state.user['full_name']}!</h3>
             </div>
         """, unsafe_allow_html=True)
         
@@ -1005,11 +930,67 @@ def home_page():
         except:
             pass  # Silently fail if QR scanner has issues
     
-    categories = ["All"] + sorted(list(set(p['category'] for p in PRODUCTS)))
-    selected_category = st.selectbox("🎨 Select Category", categories)
-    filtered = PRODUCTS if selected_category == "All" else [p for p in PRODUCTS if p['category'] == selected_category]
-    
-    st.markdown(f"<h2 style='color: #8b4789; text-align: center; margin: 30px 0;'>🛍️ {len(filtered)} Products Available</h2>", unsafe_allow_html=True)
+    page_size = 12
+    search_query = st.text_input("🔍 Search Products", placeholder="Search by name, category or description", key="search_query")
+    
+    if search_query.strip():
+        if st.session_state.get('last_search_query') != search_query:
+            st.session_state.search_page = 1
+            st.session_state.last_search_query = search_query
+        page = st.session_state.get('search_page', 1)
+        product_ids, total_matches = search_products(get_db_path(), search_query, page=page, page_size=page_size)
+        filtered = [PRODUCTS_BY_ID[pid] for pid in product_ids if pid in PRODUCTS_BY_ID]
+        st.markdown(f"<h2 class='gb-section-heading'>🔍 {total_matches} Results for \"{search_query}\"</h2>", unsafe_allow_html=True)
+        if total_matches == 0:
+            st.info("No products match your search. Try a different keyword.")
+        pagination_key = 'search_page'
+    else:
+        # Widget values are already in session_state at the start of a rerun, so the
+        # facet counts can be computed before the filter widgets are drawn
+        selected_category = st.session_state.get('facet_category', "All")
+        selected_band = st.session_state.get('facet_price', "All")
+        in_stock_only = st.session_state.get('facet_in_stock', False)
+        low_stock_only = st.session_state.get('facet_low_stock', False)
+        counts = FACETS.counts(
+            None if selected_category == "All" else selected_category,
+            None if selected_band == "All" else selected_band,
+            in_stock_only,
+            low_stock_only
+        )
+        
+        categories = ["All"] + sorted(set(counts['category']) - {"All"})
+        if selected_category not in categories:
+            st.session_state.facet_category = "All"
+        bands = ["All"] + [label for label, _, _ in PRICE_BANDS]
+        
+        col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+        with col1:
+            selected_category = st.selectbox("🎨 Select Category", categories, key="facet_category",
+                                             format_func=lambda c: f"{c} ({counts['category'].get(c, 0)})")
+        with col2:
+            selected_band = st.selectbox("💰 Price Range", bands, key="facet_price",
+                                         format_func=lambda b: f"{b} ({counts['price'].get(b, 0)})")
+        with col3:
+            in_stock_only = st.checkbox(f"In stock only ({counts['in_stock']})", key="facet_in_stock")
+        with col4:
+            low_stock_only = st.checkbox(f"Low stock ({counts['low_stock']})", key="facet_low_stock")
+        
+        filters = (selected_category, selected_band, in_stock_only, low_stock_only)
+        if st.session_state.get('last_facet_filters') != filters:
+            st.session_state.catalog_page = 1
+            st.session_state.last_facet_filters = filters
+        page = st.session_state.get('catalog_page', 1)
+        product_ids, total_matches = FACETS.search(
+            None if selected_category == "All" else selected_category,
+            None if selected_band == "All" else selected_band,
+            in_stock_only,
+            low_stock_only,
+            offset=(page - 1) * page_size,
+            limit=page_size
+        )
+        filtered = [PRODUCTS_BY_ID[pid] for pid in product_ids if pid in PRODUCTS_BY_ID]
+        st.markdown(f"<h2 class='gb-section-heading'>🛍️ {total_matches} Products Available</h2>", unsafe_allow_html=True)
+        pagination_key = 'catalog_page'
     
     cols_per_row = 3
     for i in range(0, len(filtered), cols_per_row):
@@ -1017,16 +998,18 @@ def home_page():
         for j in range(cols_per_row):
             if i + j < len(filtered):
                 display_product_card(filtered[i + j], cols[j])
+    
+    pagination_controls(total_matches, page_size, pagination_key)
 
 def cart_page():
     """Display shopping cart"""
-    st.markdown(f"<h1 style='color: #8b4789; text-align: center;'>🛒 Shopping Cart</h1>", unsafe_allow_html=True)
+    st.markdown(f"<h1 class='gb-title gb-center'>🛒 Shopping Cart</h1>", unsafe_allow_html=True)
     
     if not st.session_state.cart:
         st.markdown("""
-            <div style='background: #ffffff; padding: 40px; border-radius: 20px; text-align: center; border: 3px solid #d4a8c8; margin: 40px 0;'>
-                <h2 style='color: #8b4789;'>Your cart is empty! 🛍️</h2>
-                <p style='color: #666; font-size: 18px;'>Start adding products</p>
+            <div class='gb-empty'>
+                <h2 class='gb-title'>Your cart is empty! 🛍️</h2>
+                <p class='gb-lead'>Start adding products</p>
             </div>
         """, unsafe_allow_html=True)
         if st.button("🌟 Start Shopping", use_container_width=True):
@@ -1034,6 +1017,11 @@ def cart_page():
             st.rerun()
         return
     
+    # Once per cart state, so reruns of the checkout form are not counted again
+    if st.session_state.get('checkout_started_for') != st.session_state.cart_update_trigger:
+        st.session_state.checkout_started_for = st.session_state.cart_update_trigger
+        track_event('checkout_start', value=sum(item['price'] for item in st.session_state.cart))
+    
     total = 0
     for idx, item in enumerate(st.session_state.cart):
         st.markdown('<div class="cart-item-box">', unsafe_allow_html=True)
@@ -1042,8 +1030,8 @@ def cart_page():
         with col1:
             st.image(item['image'], width=120)
         with col2:
-            st.markdown(f"<h3 style='color: #8b4789;'>{item['name']}</h3>", unsafe_allow_html=True)
-            st.markdown(f"<p style='color: #666;'>{item['category']}</p>", unsafe_allow_html=True)
+            st.markdown(f"<h3 class='gb-title'>{item['name']}</h3>", unsafe_allow_html=True)
+            st.markdown(f"<p class='gb-muted'>{item['category']}</p>", unsafe_allow_html=True)
         with col3:
             st.markdown(f"<div class='price-tag'>₹{item['price']}</div>", unsafe_allow_html=True)
         with col4:
@@ -1056,17 +1044,17 @@ def cart_page():
     col1, col2 = st.columns(2)
     with col1:
         st.markdown(f"""
-            <div style='background: #fff; padding: 25px; border-radius: 15px; text-align: center; border: 3px solid #d4a8c8;'>
-                <h4 style='color: #8b4789;'>Total Items</h4>
-                <h1 style='color: #8b4789;'>{len(st.session_state.cart)}</h1>
+            <div class='gb-stat gb-stat-large'>
+                <h4>Total Items</h4>
+                <h1>{len(st.session_state.cart)}</h1>
             </div>
         """, unsafe_allow_html=True)
     
     with col2:
         st.markdown(f"""
-            <div style='background: #fff; padding: 25px; border-radius: 15px; text-align: center; border: 3px solid #b8e6d5;'>
-                <h4 style='color: #2d6a4f;'>Total Amount</h4>
-                <h1 style='color: #8b4789;'>₹{total}</h1>
+            <div class='gb-stat gb-stat-large gb-stat-success'>
+                <h4>Total Amount</h4>
+                <h1>₹{total}</h1>
             </div>
         """, unsafe_allow_html=True)
     
@@ -1139,12 +1127,21 @@ def cart_page():
             else:
                 customer_info = {'name': name, 'email': email, 'phone': phone, 'address': address}
                 user_id = st.session_state.user['user_id'] if st.session_state.get('logged_in') else None
-                order_id = save_order(customer_info, st.session_state.cart, total, payment_method, payment_details, user_id)
-                st.session_state.cart = []
-                st.session_state.cart_count = {}
-                st.balloons()
-                st.success(f"✅ Order #{order_id} placed successfully!")
-                st.info(f"📧 Confirmation sent to {email}")
+                with ADMISSION.checkout_slot() as has_slot:
+                    if has_slot:
+                        success, result = save_order(customer_info, st.session_state.cart, total, payment_method, payment_details, user_id)
+                    else:
+                        success, result = False, "Checkout is very busy right now, please try again in a moment"
+                if success:
+                    track_event('purchase', value=total)
+                    st.session_state.cart = []
+                    st.session_state.cart_count = {}
+                    persist_session(flush=True)
+                    st.balloons()
+                    st.success(f"✅ Order #{result} placed successfully!")
+                    st.info(f"📧 A confirmation email will be sent to {email}")
+                else:
+                    st.error(f"❌ Could not place order: {result}")
 
 def product_page():
     """Display product detail page"""
@@ -1160,7 +1157,12 @@ def product_page():
         st.session_state.page = 'home'
         st.rerun()
     
-    st.markdown(f"<h1 style='color: #8b4789;'>{product['name']}</h1>", unsafe_allow_html=True)
+    # One view per visit, not one per rerun of the page
+    if st.session_state.get('last_viewed_product') != product['id']:
+        st.session_state.last_viewed_product = product['id']
+        track_event('product_view', product['id'], product['price'])
+    
+    st.markdown(f"<h1 class='gb-title'>{product['name']}</h1>", unsafe_allow_html=True)
     
     col1, col2 = st.columns([1, 1])
     with col1:
@@ -1173,10 +1175,27 @@ def product_page():
     
     with col2:
         st.write("### 📱 Product QR Code")
-        base_url = get_app_url()
-        product_url = f"{base_url}?product_id={product['id']}"
+        product_url = get_product_qr_url(product['id'])
         qr_img = generate_qr_code(product_url, product['name'])
         st.image(qr_img, width=300)
+    
+    # Picks up orders placed by other processes at most every 30 s; our own checkouts update it directly
+    RECOMMENDATIONS.catch_up(min_interval=30)
+    related = [
+        PRODUCTS_BY_ID[pid] for pid, _ in RECOMMENDATIONS.related(product['id'])
+        if pid in PRODUCTS_BY_ID and PRODUCTS_BY_ID[pid].get('stock', 0) > 0
+    ][:4]
+    if related:
+        st.divider()
+        st.write("### 💞 Frequently Bought Together")
+        cols = st.columns(4)
+        for col, item in zip(cols, related):
+            with col:
+                st.image(item['image'], use_container_width=True)
+                st.markdown(f"<p class='gb-card-name gb-center'><b>{item['name']}</b><br>₹{item['price']}</p>", unsafe_allow_html=True)
+                if st.button("👁️ View", key=f"related_{item['id']}", use_container_width=True):
+                    st.session_state.selected_product = item['id']
+                    st.rerun()
 
 def customer_dashboard():
     """Display customer dashboard"""
@@ -1188,7 +1207,7 @@ def customer_dashboard():
         return
     
     user = st.session_state.user
-    st.markdown(f"<h1 style='color: #8b4789;'>👤 Customer Dashboard</h1>", unsafe_allow_html=True)
+    st.markdown(f"<h1 class='gb-title'>👤 Customer Dashboard</h1>", unsafe_allow_html=True)
     st.write(f"### Welcome, {user['full_name']}! 💖")
     
     db_path = get_db_path()
@@ -1199,16 +1218,19 @@ def customer_dashboard():
     total_orders = stats[0] if stats[0] else 0
     total_spent = stats[1] if stats[1] else 0
     conn.close()
+    archived_orders, archived_spent = archived_user_stats(get_db_path(), user['user_id'])
+    total_orders += archived_orders
+    total_spent += archived_spent
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #d4a8c8; text-align: center;'><h4 style='color: #8b4789;'>Total Orders</h4><h2>{total_orders}</h2></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='gb-stat'><h4>Total Orders</h4><h2>{total_orders}</h2></div>", unsafe_allow_html=True)
     with col2:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #b8e6d5; text-align: center;'><h4 style='color: #2d6a4f;'>Total Spent</h4><h2>₹{total_spent}</h2></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='gb-stat gb-stat-success'><h4>Total Spent</h4><h2>₹{total_spent}</h2></div>", unsafe_allow_html=True)
     with col3:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #cce3ff; text-align: center;'><h4 style='color: #1e6091;'>Cart Items</h4><h2>{len(st.session_state.cart)}</h2></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='gb-stat gb-stat-info'><h4>Cart Items</h4><h2>{len(st.session_state.cart)}</h2></div>", unsafe_allow_html=True)
     with col4:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #f0e6f6; text-align: center;'><h4 style='color: #8b4789;'>Member</h4><p>{user['username']}</p></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='gb-stat gb-stat-member'><h4>Member</h4><p>{user['username']}</p></div>", unsafe_allow_html=True)
     
     st.divider()
     col1, col2, col3 = st.columns(3)
@@ -1229,312 +1251,887 @@ def customer_dashboard():
     st.write("### 📦 Recent Orders")
     display_user_orders(user['user_id'], limit=5)
 
-def admin_dashboard():
-    """Display admin dashboard with product management"""
-    if not st.session_state.get('logged_in') or not st.session_state.user.get('is_admin'):
-        st.error("🚫 Access Denied - Admin privileges required")
-        if st.button("← Back"):
-            st.session_state.page = 'home'
-            st.rerun()
-        return
-    
-    st.markdown("<h1 style='color: #8b4789;'>🧑‍💼 Admin Dashboard</h1>", unsafe_allow_html=True)
-    st.success(f"Welcome, Admin {st.session_state.user['full_name']}!")
+def admin_products_section():
+    """Grid editor and bulk actions for the catalog"""
+    st.write("### 📦 Product Management")
     
-    # Statistics
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM orders")
-    total_orders = c.fetchone()[0]
-    c.execute("SELECT SUM(total) FROM orders")
-    total_revenue = c.fetchone()[0] or 0
-    c.execute("SELECT COUNT(*) FROM users WHERE is_admin = 0")
-    total_customers = c.fetchone()[0]
-    conn.close()
+    if len(PRODUCTS) == 0:
+        st.info("No products available. Add your first product!")
+    else:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            name_filter = st.text_input("🔍 Filter by name", key="grid_name_filter")
+        with col2:
+            category_filter = st.selectbox("Category", ["All"] + PRODUCT_CATEGORIES, key="grid_category_filter")
+        
+        matching = PRODUCTS
+        if category_filter != "All":
+            matching = [p for p in matching if p['category'] == category_filter]
+        if name_filter.strip():
+            needle = name_filter.strip().lower()
+            matching = [p for p in matching if needle in p['name'].lower()]
+        
+        grid_page_size = 50
+        filters = (name_filter, category_filter)
+        if st.session_state.get('last_grid_filters') != filters:
+            st.session_state.grid_page = 1
+            st.session_state.last_grid_filters = filters
+        grid_page = st.session_state.get('grid_page', 1)
+        page_products = matching[(grid_page - 1) * grid_page_size:grid_page * grid_page_size]
+        
+        st.caption(f"{len(matching)} products. Edit cells directly, tick rows for bulk actions, then save.")
+        
+        if 'product_grid_version' not in st.session_state:
+            st.session_state.product_grid_version = 0
+        grid_df = products_frame(page_products)
+        grid_df.insert(0, "select", False)
+        edited_df = st.data_editor(
+            grid_df,
+            key=f"product_grid_{st.session_state.product_grid_version}_{grid_page}_{hash(filters)}",
+            hide_index=True,
+            use_container_width=True,
+            num_rows="fixed",
+            disabled=["id"],
+            column_config={
+                "select": st.column_config.CheckboxColumn("✔", width="small"),
+                "id": st.column_config.NumberColumn("ID", width="small"),
+                "name": st.column_config.TextColumn("Name", required=True),
+                "price": st.column_config.NumberColumn("Price (₹)", min_value=1, step=1, required=True),
+                "stock": st.column_config.NumberColumn("Stock", min_value=0, step=1, required=True),
+                "category": st.column_config.SelectboxColumn("Category", options=PRODUCT_CATEGORIES, required=True),
+                "description": st.column_config.TextColumn("Description"),
+                "image": st.column_config.ImageColumn("Image"),
+            }
+        )
+        pagination_controls(len(matching), grid_page_size, 'grid_page')
+        
+        edit_diff = diff_edited_frame(page_products, edited_df.drop(columns=["select"]))
+        _, changed_cells, _ = diff_summary_frames(edit_diff)
+        selected_ids = edited_df.loc[edited_df["select"], "id"].astype(int).tolist()
+        
+        def apply_grid_diff(diff, message, stock_kind='adjustment'):
+            new_products = apply_product_diff(PRODUCTS, diff)
+            upserted = [new for _, new in diff['updates']]
+            commit_catalog_changes(new_products, upserted, [p['id'] for p in diff['deletes']], stock_kind)
+            st.session_state.product_grid_version += 1
+            st.success(message)
+            st.rerun()
+        
+        if not changed_cells.empty:
+            with st.expander(f"✏️ Unsaved changes: {len(changed_cells)} cell(s) in {len(edit_diff['updates'])} product(s)"):
+                st.dataframe(changed_cells.astype(str), hide_index=True, use_container_width=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("💾 Save Changes", type="primary", use_container_width=True, disabled=changed_cells.empty, key="grid_save"):
+                apply_grid_diff(edit_diff, f"✅ Saved {len(edit_diff['updates'])} product(s)!")
+        with col2:
+            if st.button("↩️ Discard Changes", use_container_width=True, disabled=changed_cells.empty, key="grid_discard"):
+                st.session_state.product_grid_version += 1
+                st.rerun()
+        
+        st.write(f"#### ⚡ Bulk Actions ({len(selected_ids)} selected)")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            restock_amount = st.number_input("Restock Amount", min_value=1, max_value=1000, value=15, key="bulk_restock_amount")
+            if st.button(f"📦 Restock (+{restock_amount})", use_container_width=True, disabled=not selected_ids, key="bulk_restock_btn"):
+                apply_grid_diff(bulk_restock_diff(PRODUCTS, selected_ids, restock_amount),
+                                f"✅ Added {restock_amount} items to {len(selected_ids)} product(s)!", stock_kind='restock')
+        with col2:
+            price_percent = st.number_input("Price Change (%)", min_value=-90, max_value=500, value=10, key="bulk_price_percent")
+            if st.button(f"💰 Change Price ({price_percent:+d}%)", use_container_width=True, disabled=not selected_ids, key="bulk_price_btn"):
+                apply_grid_diff(bulk_reprice_diff(PRODUCTS, selected_ids, price_percent),
+                                f"✅ Repriced {len(selected_ids)} product(s)!")
+        with col3:
+            confirm_delete = st.checkbox("Confirm delete", key="bulk_delete_confirm")
+            if st.button("🗑️ Delete Selected", use_container_width=True, disabled=not (selected_ids and confirm_delete), key="bulk_delete_btn"):
+                apply_grid_diff(bulk_delete_diff(PRODUCTS, selected_ids),
+                                f"✅ Deleted {len(selected_ids)} product(s)!")
+
+def admin_add_product_section():
+    """Single product form plus bulk import/export"""
+    st.write("### ➕ Add New Product")
     
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #d4a8c8; text-align: center;'><h4 style='color: #8b4789;'>Total Products</h4><h2>{len(PRODUCTS)}</h2></div>", unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #b8e6d5; text-align: center;'><h4 style='color: #2d6a4f;'>Total Revenue</h4><h2>₹{total_revenue}</h2></div>", unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #cce3ff; text-align: center;'><h4 style='color: #1e6091;'>Total Orders</h4><h2>{total_orders}</h2></div>", unsafe_allow_html=True)
-    with col4:
-        st.markdown(f"<div style='background: #fff; padding: 20px; border-radius: 15px; border: 3px solid #ffd6e8; text-align: center;'><h4 style='color: #c9184a;'>Customers</h4><h2>{total_customers}</h2></div>", unsafe_allow_html=True)
+    with st.form("add_product_form"):
+        st.write("#### Enter Product Details")
+        
+        new_name = st.text_input("Product Name *", placeholder="e.g., Ruby Red Lipstick")
+        new_price = st.number_input("Price (₹) *", min_value=1, value=499)
+        new_stock = st.number_input("Initial Stock *", min_value=0, value=15)
+        new_category = st.selectbox("Category *", PRODUCT_CATEGORIES)
+        new_description = st.text_area("Description *", placeholder="Enter product description...")
+        new_image = st.text_input("Image URL *", placeholder="https://example.com/image.jpg")
+        
+        st.info("💡 Tip: Use high-quality product images from Pexels, Unsplash, or your own hosting.")
+        
+        add_btn = st.form_submit_button("✨ Add Product", use_container_width=True, type="primary")
+        
+        if add_btn:
+            if not all([new_name, new_price, new_category, new_description, new_image]):
+                st.error("⚠️ Please fill all required fields")
+            else:
+                # Generate new product ID
+                new_id = max([p['id'] for p in PRODUCTS]) + 1 if PRODUCTS else 1
+                
+                new_product = {
+                    "id": new_id,
+                    "name": new_name,
+                    "price": new_price,
+                    "stock": new_stock,
+                    "category": new_category,
+                    "description": new_description,
+                    "image": new_image
+                }
+                
+                commit_catalog_changes(PRODUCTS + [new_product], [new_product], [])
+                st.success(f"✅ Product '{new_name}' added successfully with {new_stock} items in stock!")
+                st.balloons()
+                st.rerun()
     
     st.divider()
+    st.write("### 📤 Bulk Import")
+    st.caption(f"Upload a CSV or JSON file with columns: id (optional), name, price, stock, category, description, image and optionally action (upsert/delete). Categories: {', '.join(PRODUCT_CATEGORIES)}.")
     
-    # Tabs for different admin functions
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📦 Manage Products", "➕ Add Product", "📊 View Orders", "👥 Manage Users", "⚙️ Settings"])
-    
-    with tab1:
-        st.write("### 📦 Product Management")
-        
-        if len(PRODUCTS) == 0:
-            st.info("No products available. Add your first product!")
-        else:
-            for product in PRODUCTS:
-                stock = product.get('stock', 0)
-                stock_status = "🔴 Out of Stock" if stock <= 0 else f"🟢 In Stock ({stock})"
-                
-                with st.expander(f"🛍️ {product['name']} - ₹{product['price']} - {stock_status}"):
-                    col1, col2 = st.columns([1, 2])
-                    
-                    with col1:
-                        st.image(product['image'], width=200)
-                        st.write(f"**Current Stock:** {stock}")
-                        
-                        # Quick restock button
-                        restock_amount = st.number_input("Restock Amount", min_value=1, max_value=100, value=15, key=f"restock_{product['id']}")
-                        if st.button(f"📦 Restock (+{restock_amount})", key=f"restock_btn_{product['id']}", use_container_width=True):
-                            for p in PRODUCTS:
-                                if p['id'] == product['id']:
-                                    p['stock'] = p.get('stock', 0) + restock_amount
-                                    break
-                            save_products(PRODUCTS)
-                            st.success(f"✅ Added {restock_amount} items to stock!")
-                            st.rerun()
-                    
-                    with col2:
-                        with st.form(f"edit_product_{product['id']}"):
-                            st.write("#### Edit Product Details")
-                            new_name = st.text_input("Product Name", value=product['name'], key=f"name_{product['id']}")
-                            new_price = st.number_input("Price (₹)", value=product['price'], min_value=1, key=f"price_{product['id']}")
-                            new_stock = st.number_input("Stock Quantity", value=product.get('stock', 15), min_value=0, key=f"stock_{product['id']}")
-                            new_category = st.selectbox("Category", ["Lips", "Face", "Eyes", "Skincare", "Nails", "Fragrance", "Tools"], 
-                                                       index=["Lips", "Face", "Eyes", "Skincare", "Nails", "Fragrance", "Tools"].index(product['category']) if product['category'] in ["Lips", "Face", "Eyes", "Skincare", "Nails", "Fragrance", "Tools"] else 0,
-                                                       key=f"cat_{product['id']}")
-                            new_description = st.text_area("Description", value=product['description'], key=f"desc_{product['id']}")
-                            new_image = st.text_input("Image URL", value=product['image'], key=f"img_{product['id']}")
-                            
-                            col_a, col_b = st.columns(2)
-                            with col_a:
-                                update_btn = st.form_submit_button("💾 Update Product", use_container_width=True, type="primary")
-                            with col_b:
-                                delete_btn = st.form_submit_button("🗑️ Delete Product", use_container_width=True)
-                            
-                            if update_btn:
-                                # Update product
-                                for p in PRODUCTS:
-                                    if p['id'] == product['id']:
-                                        p['name'] = new_name
-                                        p['price'] = new_price
-                                        p['stock'] = new_stock
-                                        p['category'] = new_category
-                                        p['description'] = new_description
-                                        p['image'] = new_image
-                                        break
-                                save_products(PRODUCTS)
-                                st.success(f"✅ Product '{new_name}' updated successfully!")
-                                st.rerun()
-                            
-                            if delete_btn:
-                                # Delete product
-                                updated_products = [p for p in PRODUCTS if p['id'] != product['id']]
-                                save_products(updated_products)
-                                st.success(f"✅ Product '{product['name']}' deleted successfully!")
-                                st.rerun()
+    uploaded_catalog = st.file_uploader("Product file", type=["csv", "json"], key="bulk_import_file")
+    delete_missing = st.checkbox("Delete products that are not in the file", key="bulk_import_delete_missing")
     
-    with tab2:
-        st.write("### ➕ Add New Product")
+    if uploaded_catalog:
+        try:
+            import_df = read_product_upload(uploaded_catalog, uploaded_catalog.name)
+        except Exception as e:
+            st.error(f"❌ Could not read file: {e}")
+            import_df = None
         
-        with st.form("add_product_form"):
-            st.write("#### Enter Product Details")
+        if import_df is not None:
+            clean_df, import_errors = validate_product_frame(import_df)
+            diff = diff_products(PRODUCTS, clean_df, delete_missing=delete_missing)
             
-            new_name = st.text_input("Product Name *", placeholder="e.g., Ruby Red Lipstick")
-            new_price = st.number_input("Price (₹) *", min_value=1, value=499)
-            new_stock = st.number_input("Initial Stock *", min_value=0, value=15)
-            new_category = st.selectbox("Category *", ["Lips", "Face", "Eyes", "Skincare", "Nails", "Fragrance", "Tools"])
-            new_description = st.text_area("Description *", placeholder="Enter product description...")
-            new_image = st.text_input("Image URL *", placeholder="https://example.com/image.jpg")
+            if import_errors:
+                st.warning(f"⚠️ {len(import_errors)} problem(s) found. Rows with errors will be skipped.")
+                st.dataframe(pd.DataFrame(import_errors, columns=["Row", "Problem"]), hide_index=True, use_container_width=True)
             
-            st.info("💡 Tip: Use high-quality product images from Pexels, Unsplash, or your own hosting.")
+            st.write("#### 🔎 Dry Run")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("New Products", len(diff['inserts']))
+            with col2:
+                st.metric("Updated Products", len(diff['updates']))
+            with col3:
+                st.metric("Deleted Products", len(diff['deletes']))
             
-            add_btn = st.form_submit_button("✨ Add Product", use_container_width=True, type="primary")
+            inserts_df, changes_df, deletes_df = diff_summary_frames(diff)
+            if not inserts_df.empty:
+                with st.expander(f"➕ New products ({len(inserts_df)})"):
+                    st.dataframe(inserts_df, hide_index=True, use_container_width=True)
+            if not changes_df.empty:
+                with st.expander(f"✏️ Changed fields ({len(changes_df)})"):
+                    st.dataframe(changes_df.astype(str), hide_index=True, use_container_width=True)
+            if not deletes_df.empty:
+                with st.expander(f"🗑️ Deleted products ({len(deletes_df)})"):
+                    st.dataframe(deletes_df, hide_index=True, use_container_width=True)
             
-            if add_btn:
-                if not all([new_name, new_price, new_category, new_description, new_image]):
-                    st.error("⚠️ Please fill all required fields")
-                else:
-                    # Generate new product ID
-                    new_id = max([p['id'] for p in PRODUCTS]) + 1 if PRODUCTS else 1
-                    
-                    new_product = {
-                        "id": new_id,
-                        "name": new_name,
-                        "price": new_price,
-                        "stock": new_stock,
-                        "category": new_category,
-                        "description": new_description,
-                        "image": new_image
-                    }
-                    
-                    PRODUCTS.append(new_product)
-                    save_products(PRODUCTS)
-                    st.success(f"✅ Product '{new_name}' added successfully with {new_stock} items in stock!")
-                    st.balloons()
-                    st.rerun()
+            has_changes = any(diff[kind] for kind in ('inserts', 'updates', 'deletes'))
+            if st.button("✅ Apply Import", type="primary", disabled=not has_changes, key="bulk_import_apply"):
+                new_products = apply_product_diff(PRODUCTS, diff)
+                upserted = diff['inserts'] + [new for _, new in diff['updates']]
+                commit_catalog_changes(new_products, upserted, [p['id'] for p in diff['deletes']])
+                st.success(f"✅ Imported {len(diff['inserts'])} new, {len(diff['updates'])} updated and {len(diff['deletes'])} deleted products!")
+                st.rerun()
     
-    with tab3:
-        st.write("### 📊 All Orders")
-        
-        rows = fetch_orders_from_db()
+    st.write("### 📥 Bulk Export")
+    export_format = st.radio("Format", ["CSV", "JSON"], horizontal=True, key="bulk_export_format")
+    export_chunks = iter_products_csv if export_format == "CSV" else iter_products_json
+    export_mime = "text/csv" if export_format == "CSV" else "application/json"
+    products = PRODUCTS
+    # Built only when the button is clicked, streamed chunk by chunk into a temporary file
+    st.download_button(
+        label=f"📥 Export {len(PRODUCTS)} Products ({export_format})",
+        data=lambda: spool_export(export_chunks(products)),
+        file_name=f"products_{datetime.now().strftime('%Y%m%d')}.{export_format.lower()}",
+        mime=export_mime
+    )
+
+def admin_orders_section():
+    """All orders with CSV export"""
+    st.write("### 📊 All Orders")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        snapshot_notice()
+    with col2:
+        if st.button("🔄 Refresh Snapshot", use_container_width=True, key="refresh_snapshot"):
+            REPLICA.refresh()
+            get_admin_stats.clear()
+            st.rerun()
+    
+    include_archived = st.checkbox("Include archived orders", key="admin_include_archived")
+    lookup = st.text_input("🔎 Find orders", placeholder="Order ID, email, phone or customer name", key="admin_order_lookup")
+    if lookup.strip():
+        start = time.perf_counter()
+        kind, matches = find_orders(get_db_path(), lookup, include_archived=include_archived)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        st.caption(f"{len(matches)} order(s) by {kind} in {elapsed_ms:.1f} ms")
+        if not matches:
+            st.info("No matching orders.")
+        for row in matches:
+            admin_order_expander(row[:-1], archived=row[-1])
+        return
+    
+    rows = fetch_orders_from_db()
+    archived_ids = set()
+    if include_archived:
+        archived_rows = fetch_archived_orders(get_db_path())
+        archived_ids = {row[0] for row in archived_rows}
+        rows = sorted(rows + archived_rows, key=lambda row: row[1] or "", reverse=True)
+    
+    if not rows:
+        st.info("No orders yet!")
+    else:
+        st.write(f"**Total Orders:** {len(rows)}")
         
-        if not rows:
-            st.info("No orders yet!")
-        else:
-            st.write(f"**Total Orders:** {len(rows)}")
-            
-            # Export button
-            csv_data = export_orders_csv()
-            st.download_button(
-                label="📥 Export Orders to CSV",
-                data=csv_data,
-                file_name=f"orders_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
-            
-            st.divider()
-            
-            for row in rows:
-                if len(row) >= 11:
-                    order_id, date, name, email, phone, address, items_json, total, payment_method, payment_details_json, status = row[:11]
-                else:
-                    order_id, date, name, email, phone, address, items_json, total, status = row[:9]
-                    payment_method = "Cash on Delivery"
-                
-                items = safe_json_loads(items_json)
-                
-                with st.expander(f"🛍️ Order #{order_id} - {name} - ₹{total} - {status}"):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.write("#### 📅 Order Details")
-                        st.write(f"**Order ID:** {order_id}")
-                        st.write(f"**Date:** {date}")
-                        st.write(f"**Status:** {status}")
-                        st.write(f"**Payment:** {payment_method}")
-                    
-                    with col2:
-                        st.write("#### 👤 Customer Details")
-                        st.write(f"**Name:** {name}")
-                        st.write(f"**Email:** {email}")
-                        st.write(f"**Phone:** {phone}")
-                        st.write(f"**Address:** {address}")
-                    
-                    st.divider()
-                    st.write("#### 🛍️ Order Items:")
-                    
-                    for item in items:
-                        c1, c2, c3 = st.columns([2, 4, 2])
-                        with c1:
-                            st.image(item['image'], width=80)
-                        with c2:
-                            st.write(f"**{item['name']}**")
-                            st.write(f"{item['category']}")
-                        with c3:
-                            st.write(f"**₹{item['price']}**")
-                    
-                    st.divider()
-                    st.write(f"### Total: ₹{total}")
-    
-    with tab4:
-        st.write("### 👥 User Management")
+        # Export button
+        csv_data = export_orders_csv(rows)
+        st.download_button(
+            label="📥 Export Orders to CSV",
+            data=csv_data,
+            file_name=f"orders_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv"
+        )
         
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        c.execute("SELECT user_id, username, email, full_name, phone, created_at, is_admin FROM users ORDER BY created_at DESC")
-        users = c.fetchall()
-        conn.close()
+        st.divider()
         
-        if not users:
-            st.info("No users registered yet!")
-        else:
-            st.write(f"**Total Users:** {len(users)}")
-            
-            for user in users:
-                user_id, username, email, full_name, phone, created_at, is_admin = user
-                
-                role = "🧑‍💼 Admin" if is_admin else "👤 Customer"
-                
-                with st.expander(f"{role} {username} - {full_name}"):
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.write(f"**User ID:** {user_id}")
-                        st.write(f"**Username:** {username}")
-                        st.write(f"**Email:** {email}")
-                    
-                    with col2:
-                        st.write(f"**Full Name:** {full_name}")
-                        st.write(f"**Phone:** {phone}")
-                        st.write(f"**Joined:** {created_at}")
-                    
-                    if not is_admin:
-                        if st.button(f"🧑‍💼 Make Admin", key=f"admin_{user_id}"):
-                            db_path = get_db_path()
-                            conn = sqlite3.connect(db_path)
-                            c = conn.cursor()
-                            c.execute("UPDATE users SET is_admin = 1 WHERE user_id = ?", (user_id,))
-                            conn.commit()
-                            conn.close()
-                            st.success(f"✅ {username} is now an admin!")
-                            st.rerun()
+        # The snapshot can be a minute old; status buttons must follow the live status
+        live = current_statuses(get_db_path(), [row[0] for row in rows if row[0] not in archived_ids])
+        for row in rows:
+            if row[0] in archived_ids or row[0] not in live:
+                admin_order_expander(row, archived=True)
+            else:
+                admin_order_expander(row, status=live[row[0]])
+
+def admin_order_expander(row, archived=False, status=None):
+    """One order as an expander with order, customer and item details (and status buttons unless archived).
+
+    `status` overrides the status in `row`, e.g. the live status of a snapshot row.
+    """
+    if len(row) >= 11:
+        order_id, date, name, email, phone, address, items_json, total, payment_method, payment_details_json, row_status = row[:11]
+    else:
+        order_id, date, name, email, phone, address, items_json, total, row_status = row[:9]
+        payment_method = "Cash on Delivery"
+    status = status or row_status
     
-    with tab5:
-        st.write("### ⚙️ App Configuration")
-        
-        st.write("#### 🔗 QR Code URL Configuration")
-        st.info("Configure the base URL for QR codes. This should be your Streamlit app's public URL.")
+    items = safe_json_loads(items_json)
+    
+    with st.expander(f"🛍️ Order #{order_id} - {name} - ₹{total} - {status}"):
+        col1, col2 = st.columns(2)
         
-        current_url = get_app_url()
-        st.write(f"**Current URL:** `{current_url}`")
+        with col1:
+            st.write("#### 📅 Order Details")
+            st.write(f"**Order ID:** {order_id}")
+            st.write(f"**Date:** {date}")
+            st.write(f"**Status:** {status}")
+            st.write(f"**Payment:** {payment_method}")
         
-        with st.form("url_config_form"):
-            st.write("**Update App URL:**")
-            new_url = st.text_input(
-                "Streamlit App URL *",
-                value=current_url,
-                placeholder="https://your-app-name.streamlit.app",
-                help="Enter your app's public URL from Streamlit Cloud"
-            )
-            
-            st.caption("📝 **How to find your app URL:**")
-            st.caption("1. Go to your Streamlit Cloud dashboard")
-            st.caption("2. Find your deployed app")
-            st.caption("3. Copy the URL (e.g., https://your-app-name.streamlit.app)")
-            
-            if st.form_submit_button("💾 Save URL", use_container_width=True, type="primary"):
-                if new_url and new_url.startswith(('http://', 'https://')):
-                    st.session_state.app_url = new_url
-                    st.success(f"✅ App URL updated to: {new_url}")
-                    st.info("🔄 QR codes will now use this URL")
-                else:
-                    st.error("⚠️ Please enter a valid URL starting with http:// or https://")
+        with col2:
+            st.write("#### 👤 Customer Details")
+            st.write(f"**Name:** {name}")
+            st.write(f"**Email:** {email}")
+            st.write(f"**Phone:** {phone}")
+            st.write(f"**Address:** {address}")
         
         st.divider()
+        st.write("#### 🛍️ Order Items:")
         
-        st.write("#### 📊 Stock Management Summary")
+        for item in items:
+            c1, c2, c3 = st.columns([2, 4, 2])
+            with c1:
+                st.image(item['image'], width=80)
+            with c2:
+                st.write(f"**{item['name']}**")
+                st.write(f"{item['category']}")
+            with c3:
+                st.write(f"**₹{item['price']}**")
         
-        # Calculate stock statistics
-        total_stock = sum(p.get('stock', 0) for p in PRODUCTS)
-        out_of_stock = len([p for p in PRODUCTS if p.get('stock', 0) == 0])
-        low_stock = len([p for p in PRODUCTS if 0 < p.get('stock', 0) <= 5])
+        st.divider()
+        st.write(f"### Total: ₹{total}")
         
-        col1, col2, col3 = st.columns(3)
+        next_statuses = [] if archived else NEXT_STATUSES.get(status, [])
+        if next_statuses:
+            cols = st.columns(len(next_statuses))
+            for col, next_status in zip(cols, next_statuses):
+                with col:
+                    if st.button(STATUS_ACTIONS[next_status], use_container_width=True, key=f"order_{order_id}_to_{next_status}"):
+                        moved, rejected = apply_order_transition([order_id], next_status)
+                        if moved:
+                            st.success(f"✅ Order #{order_id} is now {next_status}")
+                            st.rerun()
+                        for _, reason in rejected:
+                            st.error(f"❌ Order #{order_id}: {reason}")
+
+def admin_fulfillment_section():
+    """Status queues with bulk transitions"""
+    st.write("### 🚚 Fulfillment")
+    
+    counts = status_counts(get_db_path())
+    cols = st.columns(len(ORDER_STATUSES))
+    for col, status in zip(cols, ORDER_STATUSES):
+        with col:
+            st.metric(status, counts[status])
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        queue_status = st.segmented_control(
+            "Queue", ORDER_STATUSES, default="Confirmed", key="fulfillment_status"
+        ) or "Confirmed"
+    with col2:
+        page_size = st.selectbox("Orders per page", [50, 100, 250, 500], key="fulfillment_page_size")
+    if st.session_state.get('fulfillment_queue_key') != (queue_status, page_size):
+        st.session_state.fulfillment_page_cursors = [None]
+        st.session_state.fulfillment_queue_key = (queue_status, page_size)
+    
+    start = time.perf_counter()
+    rows, next_cursor = fulfillment_queue(get_db_path(), queue_status, cursor=st.session_state.fulfillment_page_cursors[-1], limit=page_size)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    page_number = len(st.session_state.fulfillment_page_cursors)
+    st.caption(f"Page {page_number} · {len(rows)} of {counts[queue_status]} {queue_status} order(s), oldest first · {elapsed_ms:.1f} ms")
+    
+    if st.session_state.get('fulfillment_notice'):
+        moved_count, moved_to, rejected = st.session_state.pop('fulfillment_notice')
+        st.success(f"✅ {moved_count} order(s) moved to {moved_to}")
+        for order_id, reason in rejected:
+            st.warning(f"⚠️ Order #{order_id}: {reason}")
+    
+    if not rows:
+        st.info(f"No {queue_status} orders.")
+        return
+    
+    select_all = st.checkbox("Select all on this page", key=f"fulfillment_select_all_{queue_status}_{page_number}")
+    queue_df = pd.DataFrame(rows, columns=QUEUE_COLUMNS)
+    queue_df.insert(0, "select", select_all)
+    edited_queue = st.data_editor(
+        queue_df,
+        key=f"fulfillment_grid_{queue_status}_{page_number}_{select_all}_{st.session_state.get('fulfillment_grid_version', 0)}",
+        hide_index=True,
+        use_container_width=True,
+        num_rows="fixed",
+        disabled=QUEUE_COLUMNS,
+        column_config={
+            "select": st.column_config.CheckboxColumn("✔", width="small"),
+            "order_id": "Order",
+            "date": "Date",
+            "customer_name": "Customer",
+            "total": st.column_config.NumberColumn("Total", format="₹%d"),
+            "payment_method": "Payment",
+            "status": "Status",
+        }
+    )
+    selected_ids = edited_queue.loc[edited_queue["select"], "order_id"].tolist()
+    
+    next_statuses = NEXT_STATUSES[queue_status]
+    cols = st.columns(2 + len(next_statuses))
+    with cols[0]:
+        if st.button("← Previous", use_container_width=True, disabled=page_number == 1, key="fulfillment_prev"):
+            st.session_state.fulfillment_page_cursors.pop()
+            st.rerun()
+    with cols[1]:
+        if st.button("Next →", use_container_width=True, disabled=next_cursor is None, key="fulfillment_next"):
+            st.session_state.fulfillment_page_cursors.append(next_cursor)
+            st.rerun()
+    for col, next_status in zip(cols[2:], next_statuses):
+        with col:
+            if st.button(f"{STATUS_ACTIONS[next_status]} ({len(selected_ids)})", use_container_width=True, disabled=not selected_ids, key=f"fulfillment_to_{next_status}"):
+                moved, rejected = apply_order_transition(selected_ids, next_status)
+                st.session_state.fulfillment_grid_version = st.session_state.get('fulfillment_grid_version', 0) + 1
+                st.session_state.fulfillment_page_cursors = [None]
+                st.session_state.fulfillment_notice = (len(moved), next_status, rejected)
+                st.rerun()
+    
+    if selected_ids:
+        with st.expander(f"📜 Status history of {len(selected_ids)} selected order(s)"):
+            history = order_status_history(get_db_path(), selected_ids)
+            changes = [
+                (order_id, from_status, to_status, changed_at, changed_by)
+                for order_id in selected_ids
+                for from_status, to_status, changed_at, changed_by, _ in history.get(order_id, [])
+            ]
+            if changes:
+                st.dataframe(
+                    pd.DataFrame(changes, columns=["Order", "From", "To", "Changed At", "By"]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+            else:
+                st.caption("No status changes yet.")
+
+def admin_funnel_section():
+    """Conversion funnel, checkout abandonment and product engagement from shopper events"""
+    st.write("### 🧭 Shopper Funnel")
+    
+    period_days = st.selectbox("Period", [1, 7, 30, 90], index=1, format_func=lambda d: f"Last {d} day{'s' if d > 1 else ''}", key="funnel_period")
+    since = (datetime.now() - timedelta(days=period_days)).strftime("%Y-%m-%d %H:%M:%S")
+    report = funnel_report(load_events(get_db_path(), since))
+    collector = EVENTS.metrics()
+    st.caption(f"{report['events']} events · {collector['pending']} waiting to be written · {collector['dropped']} dropped")
+    
+    purchases = report['funnel']['sessions'].iloc[-1]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Sessions", report['sessions'])
+    with col2:
+        st.metric("Conversion Rate", f"{purchases / report['sessions']:.1%}" if report['sessions'] else "—")
+    with col3:
+        st.metric("Abandoned Checkouts", report['checkouts_abandoned'], help=f"Started checking out, bought nothing and idle for {ABANDON_AFTER_MINUTES} minutes")
+    with col4:
+        started = report['checkouts_started']
+        st.metric("Abandonment Rate", f"{report['checkouts_abandoned'] / started:.1%}" if started else "—")
+    
+    if not report['events']:
+        st.info("No shopper events recorded in this period yet.")
+        return
+    
+    st.write("#### 🔻 Funnel")
+    funnel = report['funnel'].set_index('stage')
+    st.bar_chart(funnel['sessions'])
+    st.dataframe(
+        report['funnel'],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "stage": "Stage",
+            "sessions": "Sessions",
+            "of_first_stage": st.column_config.NumberColumn("% of Viewers", format="percent"),
+            "of_previous_stage": st.column_config.NumberColumn("% of Previous Stage", format="percent"),
+        }
+    )
+    
+    st.write("#### 💄 Product Engagement")
+    products = report['products']
+    products.insert(1, "name", products['id'].map(lambda pid: PRODUCTS_BY_ID[pid]['name'] if pid in PRODUCTS_BY_ID else f"#{pid}"))
+    st.dataframe(
+        products,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "id": st.column_config.NumberColumn("ID", width="small"),
+            "name": "Product",
+            "views": "Views",
+            "adds": "Added to Cart",
+            "removals": "Removed",
+            "add_rate": st.column_config.NumberColumn("Add Rate", format="percent"),
+            "removal_rate": st.column_config.NumberColumn("Removal Rate", format="percent"),
+        }
+    )
+
+def admin_users_section():
+    """User search and role management"""
+    st.write("### 👥 User Management")
+    
+    total_users, total_admins = count_users(get_db_path())
+    st.write(f"**Total Users:** {total_users} ({total_admins} admins)")
+    
+    user_query = st.text_input("🔍 Search users", placeholder="Username, email or name prefix", key="user_search_query")
+    if st.session_state.get('last_user_search_query') != user_query:
+        st.session_state.user_page_cursors = [None]
+        st.session_state.last_user_search_query = user_query
+    if 'user_page_cursors' not in st.session_state:
+        st.session_state.user_page_cursors = [None]
+    
+    users, next_cursor = search_users(get_db_path(), user_query, cursor=st.session_state.user_page_cursors[-1], limit=25)
+    
+    if not users:
+        st.info("No users registered yet!" if not user_query.strip() else "No users match your search.")
+    else:
+        users_df = pd.DataFrame(users, columns=USER_COLUMNS)
+        users_df["role"] = users_df["is_admin"].map(lambda is_admin: "🧑‍💼 Admin" if is_admin else "👤 Customer")
+        users_df.insert(0, "select", False)
+        edited_users = st.data_editor(
+            users_df.drop(columns=["is_admin"]),
+            key=f"user_grid_{len(st.session_state.user_page_cursors)}_{st.session_state.get('user_grid_version', 0)}",
+            hide_index=True,
+            use_container_width=True,
+            num_rows="fixed",
+            disabled=[col for col in users_df.columns if col != "select"],
+            column_config={"select": st.column_config.CheckboxColumn("✔", width="small")}
+        )
+        selected_user_ids = edited_users.loc[edited_users["select"], "user_id"].astype(int).tolist()
+        
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Items in Stock", total_stock)
+            if st.button("← Previous", use_container_width=True, disabled=len(st.session_state.user_page_cursors) == 1, key="users_prev"):
+                st.session_state.user_page_cursors.pop()
+                st.rerun()
         with col2:
-            st.metric("Out of Stock Products", out_of_stock, delta="-" if out_of_stock > 0 else None)
+            if st.button("Next →", use_container_width=True, disabled=next_cursor is None, key="users_next"):
+                st.session_state.user_page_cursors.append(next_cursor)
+                st.rerun()
         with col3:
-            st.metric("Low Stock Items (≤5)", low_stock, delta="-" if low_stock > 0 else None)
+            if st.button(f"🧑‍💼 Make Admin ({len(selected_user_ids)})", use_container_width=True, disabled=not selected_user_ids, key="users_make_admin"):
+                changed = set_users_admin(get_db_path(), selected_user_ids, True)
+                st.session_state.user_grid_version = st.session_state.get('user_grid_version', 0) + 1
+                st.success(f"✅ {changed} user(s) promoted to admin!")
+                st.rerun()
+        with col4:
+            # Never let an admin demote themselves and lock themselves out
+            demote_ids = [uid for uid in selected_user_ids if uid != st.session_state.user['user_id']]
+            if st.button(f"👤 Make Customer ({len(demote_ids)})", use_container_width=True, disabled=not demote_ids, key="users_make_customer"):
+                changed = set_users_admin(get_db_path(), demote_ids, False)
+                st.session_state.user_grid_version = st.session_state.get('user_grid_version', 0) + 1
+                st.success(f"✅ {changed} user(s) changed to customer!")
+                st.rerun()
+
+def admin_settings_section():
+    """App URL configuration and stock summary"""
+    st.write("### ⚙️ App Configuration")
+    
+    st.write("#### 🔗 QR Code URL Configuration")
+    st.info("Configure the base URL for QR codes. This should be your Streamlit app's public URL.")
+    
+    current_url = get_app_url()
+    st.write(f"**Current URL:** `{current_url}`")
+    
+    with st.form("url_config_form"):
+        st.write("**Update App URL:**")
+        new_url = st.text_input(
+            "Streamlit App URL *",
+            value=current_url,
+            placeholder="https://your-app-name.streamlit.app",
+            help="Enter your app's public URL from Streamlit Cloud"
+        )
+        
+        st.caption("📝 **How to find your app URL:**")
+        st.caption("1. Go to your Streamlit Cloud dashboard")
+        st.caption("2. Find your deployed app")
+        st.caption("3. Copy the URL (e.g., https://your-app-name.streamlit.app)")
         
-        if out_of_stock > 0 or low_stock > 0:
-            st.warning("⚠️ Some products need restocking! Check the 'Manage Products' tab.")
+        if st.form_submit_button("💾 Save URL", use_container_width=True, type="primary"):
+            if new_url and new_url.startswith(('http://', 'https://')):
+                st.session_state.app_url = new_url
+                st.success(f"✅ App URL updated to: {new_url}")
+                st.info("🔄 QR codes will now use this URL")
+            else:
+                st.error("⚠️ Please enter a valid URL starting with http:// or https://")
+    
+    st.divider()
+    
+    st.write("#### 📄 Static Product Pages")
+    page_count, pages_store_url = landing_pages_status()
+    st.caption(f"{page_count} pages in `{landing_pages_dir()}/`, linking to {pages_store_url or '-'}. Serve that folder from any static host and QR scans open instantly.")
+    with st.form("landing_pages_form"):
+        landing_url = st.text_input(
+            "Static pages URL",
+            value=get_landing_pages_url() or "",
+            placeholder="https://cdn.example.com/product_pages",
+            help="Where the pages folder is served. Leave empty to keep QR codes pointing at the app."
+        )
+        if st.form_submit_button("🔄 Rebuild Pages", use_container_width=True):
+            if landing_url and not landing_url.startswith(('http://', 'https://')):
+                st.error("⚠️ Please enter a valid URL starting with http:// or https://")
+            else:
+                st.session_state.landing_pages_url = landing_url or None
+                result = publish_landing_pages(PRODUCTS, store_url=get_app_url(), prune=True)
+                st.success(f"✅ {result['written']} pages written, {result['unchanged']} unchanged, {result['removed']} removed")
+                st.info("🔄 QR codes now point at the static pages" if landing_url else "🔄 QR codes point at the app")
+    
+    st.divider()
+    
+    st.write("#### 📧 Confirmation Emails")
+    email_stats = outbox_stats(get_db_path())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Queued", email_stats.get('pending', 0))
+    with col2:
+        st.metric("Sent", email_stats.get('sent', 0))
+    with col3:
+        st.metric("Failed", email_stats.get('failed', 0))
+    if not OUTBOX_WORKER:
+        st.caption("SMTP is not configured (set SMTP_HOST), so confirmation emails stay queued.")
+    
+    st.divider()
+    
+    st.write("#### 🗄️ Order Archive")
+    hot_orders, archived_orders, oldest_hot = archive_stats(get_db_path())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Orders in Main Database", hot_orders)
+    with col2:
+        st.metric("Archived Orders", archived_orders)
+    with col3:
+        st.metric("Oldest Active Order", oldest_hot[:10] if oldest_hot else "-")
+    with st.form("archive_form"):
+        st.caption("Only delivered and cancelled orders are archived; orders still being fulfilled stay in their queues.")
+        archive_days = st.number_input("Archive orders older than (days)", min_value=1, value=int(os.getenv("ORDER_ARCHIVE_DAYS", "365")))
+        if st.form_submit_button("🗄️ Archive Old Orders", use_container_width=True):
+            progress_text = st.empty()
+            moved = archive_old_orders(get_db_path(), archive_days, progress=lambda n: progress_text.write(f"Moved {n} orders..."))
+            get_admin_stats.clear()
+            REPLICA.request_refresh()
+            st.success(f"✅ Archived {moved} delivered or cancelled orders older than {archive_days} days")
+    
+    st.divider()
+    
+    st.write("#### 🧰 Database Maintenance")
+    conn = sqlite3.connect(get_db_path())
+    page_size, page_count, free_pages, _ = database_pages(conn)
+    conn.close()
+    backups = list_backups(MAINTENANCE.backup_dir, get_db_path())
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Database Size", f"{page_size * page_count / 1_048_576:.1f} MB")
+    with col2:
+        st.metric("Free Pages", free_pages, help=f"{free_pages / page_count:.1%} of the file; vacuumed above {MAINTENANCE.free_page_ratio:.0%}" if page_count else None)
+    with col3:
+        st.metric("Backups Kept", len(backups), help=f"In {MAINTENANCE.backup_dir}/, newest {MAINTENANCE.keep_backups} kept")
+    with col4:
+        st.metric("Latest Backup", datetime.fromtimestamp(os.path.getmtime(backups[0])).strftime("%d %b %H:%M") if backups else "-")
+    
+    col1, col2, col3 = st.columns(3)
+    for column, job, label in ((col1, 'backup', "💾 Back Up Now"), (col2, 'optimize', "📈 Update Statistics"), (col3, 'vacuum', "🧹 Vacuum Now")):
+        with column:
+            if st.button(label, use_container_width=True, key=f"maintenance_{job}"):
+                report = MAINTENANCE.run_job(job, force=True)
+                if report['status'] == 'failed':
+                    st.error(f"❌ {job} failed: {report['error']}")
+                else:
+                    st.success(f"✅ {job} finished in {report['duration_ms']:.0f} ms")
+    
+    history = maintenance_history(get_db_path())
+    if history:
+        st.dataframe(
+            pd.DataFrame(
+                [(job, started_at, round(duration_ms or 0), status, ", ".join(f"{k}: {v}" for k, v in details.items()))
+                 for job, started_at, duration_ms, status, details in history],
+                columns=["Job", "Started", "Duration (ms)", "Status", "Report"]
+            ),
+            hide_index=True, use_container_width=True
+        )
+    
+    st.divider()
+    
+    st.write("#### 🚦 Traffic & Admission")
+    admission = ADMISSION.metrics()
+    checkout_metrics = CHECKOUT_PIPELINE.metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Active Sessions", f"{admission['active']} / {admission['max_active']}")
+    with col2:
+        st.metric("Waiting Room", admission['waiting'], help=f"{admission['queued_total']} queued so far, {admission['abandoned_total']} left the queue")
+    with col3:
+        st.metric("Avg Wait", f"{admission['avg_wait_seconds']:.0f} s")
+    with col4:
+        st.metric("Admissions / min", f"{admission['admissions_per_minute']:.1f}")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Checkouts in Flight", f"{admission['checkouts_in_flight']} / {admission['max_checkouts']}")
+    with col2:
+        st.metric("Checkouts / min", f"{admission['checkouts_per_minute']:.1f}")
+    with col3:
+        st.metric("Checkouts Turned Away", admission['checkouts_rejected'])
+    with col4:
+        st.metric("Avg Checkout Batch", f"{checkout_metrics['avg_batch']:.1f}", help=f"{checkout_metrics['batches']} batches, largest {checkout_metrics['largest_batch']}, last took {checkout_metrics['last_batch_ms']:.1f} ms")
+    
+    st.divider()
+    
+    st.write("#### 🔐 Login Write Buffer")
+    login_metrics = LOGIN_BUFFER.metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Pending last_login Updates", login_metrics['pending'])
+    with col2:
+        st.metric("Current Flush Lag", f"{login_metrics['current_lag_seconds']:.1f} s")
+    with col3:
+        st.metric("Max Flush Lag", f"{login_metrics['max_lag_seconds']:.1f} s")
+    with col4:
+        st.metric("Rows Flushed", login_metrics['rows_flushed'], help=f"{login_metrics['flushes']} flushes, last took {login_metrics['last_flush_ms']:.1f} ms")
+    
+    st.divider()
+    
+    st.write("#### 🍪 Sessions & Carts")
+    session_metrics = SESSIONS.metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Stored Sessions", session_metrics['stored'])
+    with col2:
+        st.metric("Pending Session Writes", session_metrics['pending'])
+    with col3:
+        st.metric("Session Rows Flushed", session_metrics['rows_flushed'], help=f"{session_metrics['saves']} saves coalesced into {session_metrics['flushes']} flushes")
+    with col4:
+        st.metric("Expired Sessions Purged", session_metrics['purged'])
+    
+    st.divider()
+    
+    st.write("#### 📊 Stock Management Summary")
+    
+    # Calculate stock statistics
+    total_stock = sum(p.get('stock', 0) for p in PRODUCTS)
+    out_of_stock = len([p for p in PRODUCTS if p.get('stock', 0) == 0])
+    low_stock = len([p for p in PRODUCTS if 0 < p.get('stock', 0) <= 5])
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Items in Stock", total_stock)
+    with col2:
+        st.metric("Out of Stock Products", out_of_stock, delta="-" if out_of_stock > 0 else None)
+    with col3:
+        st.metric("Low Stock Items (≤5)", low_stock, delta="-" if low_stock > 0 else None)
+    
+    st.write("#### 📈 Restock Forecast")
+    col1, col2 = st.columns(2)
+    with col1:
+        lead_time = st.number_input("Restock lead time (days)", min_value=1, max_value=60, value=7, key="forecast_lead_time")
+    with col2:
+        target_cover = st.number_input("Restock to cover (days)", min_value=1, max_value=180, value=30, key="forecast_target_cover")
+    history = get_sales_history()
+    history.catch_up()
+    forecast = restock_forecast(PRODUCTS, history, lead_time_days=lead_time, target_cover_days=target_cover)
+    due = forecast[forecast["needs_restock"]]
+    
+    if due.empty:
+        st.success(f"✅ Nothing is expected to run out in the next {lead_time} days!")
+    else:
+        st.warning(f"⚠️ {len(due)} product(s) will run out within {lead_time} days at the current sales rate")
+        restock_df = due.drop(columns=["needs_restock"]).copy()
+        restock_df.insert(0, "select", True)
+        edited = st.data_editor(
+            restock_df,
+            key=f"restock_grid_{st.session_state.get('restock_grid_version', 0)}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["id", "name", "stock", "sold_7d", "sold_window", "velocity", "days_of_cover"],
+            column_config={
+                "select": st.column_config.CheckboxColumn("✔", width="small"),
+                "id": st.column_config.NumberColumn("ID", width="small"),
+                "name": "Product",
+                "stock": "Stock",
+                "sold_7d": "Sold (7 days)",
+                "sold_window": f"Sold ({history.window_days} days)",
+                "velocity": st.column_config.NumberColumn("Units / day", format="%.2f"),
+                "days_of_cover": st.column_config.NumberColumn("Days of cover", format="%.1f"),
+                "suggested_qty": st.column_config.NumberColumn("Restock qty", min_value=0, step=1),
+            }
+        )
+        # A cleared quantity cell comes back empty; those rows are skipped
+        quantities = {
+            int(row.id): int(row.suggested_qty)
+            for row in edited[edited["select"]].itertuples()
+            if pd.notna(row.suggested_qty)
+        }
+        total_units = sum(quantities.values())
+        if st.button(f"📦 Restock Selected (+{total_units} units)", use_container_width=True, disabled=not total_units, key="forecast_restock_btn"):
+            diff = restock_quantities_diff(PRODUCTS, quantities)
+            commit_catalog_changes(apply_product_diff(PRODUCTS, diff), [new for _, new in diff['updates']], [], stock_kind='restock')
+            st.session_state.restock_grid_version = st.session_state.get('restock_grid_version', 0) + 1
+            st.success(f"✅ Restocked {len(diff['updates'])} product(s) with {total_units} units!")
+            st.rerun()
+    
+    st.divider()
+    
+    st.write("#### 📒 Inventory Ledger")
+    conn = sqlite3.connect(get_db_path(), timeout=30)
+    ledger = inventory_stats(conn)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Stock Movements", ledger['entries'])
+    with col2:
+        st.metric("Stock Snapshots", ledger['snapshots'])
+    with col3:
+        st.metric("Longest Ledger Tail", ledger['longest_tail'], help="Entries summed on top of the latest snapshot for the busiest product")
+    
+    if PRODUCTS:
+        col1, col2 = st.columns(2)
+        with col1:
+            ledger_product = st.selectbox("Product", PRODUCTS, format_func=lambda p: f"#{p['id']} {p['name']}", key="ledger_product")
+        with col2:
+            ledger_date = st.date_input("Stock at end of", value=datetime.now().date(), key="ledger_date")
+        as_of = f"{ledger_date:%Y-%m-%d} 23:59:59"
+        stock_then = stock_levels(conn, [ledger_product['id']], as_of=as_of).get(ledger_product['id'])
+        st.write(f"**Stock on {ledger_date:%d %b %Y}:** {stock_then if stock_then is not None else 'not yet in the catalog'}")
+        movements = product_movements(conn, ledger_product['id'])
+        if movements:
+            st.dataframe(
+                pd.DataFrame(movements, columns=["Entry", "Time", "Movement", "Change", "Reference"]),
+                hide_index=True, use_container_width=True
+            )
         else:
-            st.success("✅ All products are well stocked!")
+            st.caption("No stock movements recorded for this product yet.")
+    conn.close()
+
+def snapshot_notice():
+    """Show how old the reporting snapshot is"""
+    staleness = REPLICA.staleness()
+    if staleness is None:
+        st.caption("📸 Reports read the live database (no snapshot yet)")
+    else:
+        minutes, seconds = divmod(int(staleness), 60)
+        age = f"{minutes} min {seconds} s" if minutes else f"{seconds} s"
+        st.caption(f"📸 Reports are read from a snapshot taken {age} ago (refreshed every {REPLICA.refresh_interval} s)")
+    if REPLICA.last_error:
+        st.caption(f"⚠️ Last snapshot refresh failed: {REPLICA.last_error}")
+
+@st.cache_data(ttl=60)
+def get_admin_stats():
+    """Order count, revenue and customer count for the dashboard header, refreshed at most once a minute"""
+    conn = REPLICA.connect()
+    try:
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*), SUM(CASE WHEN status != 'Cancelled' THEN total END) FROM orders")
+        total_orders, total_revenue = c.fetchone()
+        c.execute("SELECT COUNT(*) FROM users WHERE is_admin = 0")
+        total_customers = c.fetchone()[0]
+    finally:
+        conn.close()
+    return total_orders, total_revenue or 0, total_customers
+
+def admin_dashboard():
+    """Display admin dashboard with product management"""
+    if not st.session_state.get('logged_in') or not st.session_state.user.get('is_admin'):
+        st.error("🚫 Access Denied - Admin privileges required")
+        if st.button("← Back"):
+            st.session_state.page = 'home'
+            st.rerun()
+        return
+    
+    st.markdown("<h1 class='gb-title'>🧑‍💼 Admin Dashboard</h1>", unsafe_allow_html=True)
+    st.success(f"Welcome, Admin {st.session_state.user['full_name']}!")
+    
+    # Statistics
+    total_orders, total_revenue, total_customers = get_admin_stats()
+    snapshot_notice()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.markdown(f"<div class='gb-stat'><h4>Total Products</h4><h2>{len(PRODUCTS)}</h2></div>", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"<div class='gb-stat gb-stat-success'><h4>Total Revenue</h4><h2>₹{total_revenue}</h2></div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"<div class='gb-stat gb-stat-info'><h4>Total Orders</h4><h2>{total_orders}</h2></div>", unsafe_allow_html=True)
+    with col4:
+        st.markdown(f"<div class='gb-stat gb-stat-danger'><h4>Customers</h4><h2>{total_customers}</h2></div>", unsafe_allow_html=True)
+    
+    st.divider()
+    
+    # Only the selected section is built on each rerun
+    sections = {
+        "📦 Manage Products": admin_products_section,
+        "➕ Add Product": admin_add_product_section,
+        "📊 View Orders": admin_orders_section,
+        "🚚 Fulfillment": admin_fulfillment_section,
+        "👥 Manage Users": admin_users_section,
+        "🧭 Shopper Funnel": admin_funnel_section,
+        "⚙️ Settings": admin_settings_section,
+    }
+    if st.session_state.get('admin_section') not in sections:
+        st.session_state.admin_section = "📦 Manage Products"
+    selected_section = st.segmented_control("Admin section", list(sections), key="admin_section", label_visibility="collapsed")
+    if selected_section is None:
+        selected_section = "📦 Manage Products"
+    
+    start = time.perf_counter()
+    sections[selected_section]()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    timings = st.session_state.setdefault('admin_section_timings', {})
+    timings[selected_section] = elapsed_ms
+    st.divider()
+    st.caption("⏱️ Section load times (last visit): " + " · ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items()))
 
 def profile_page():
     """Display user profile"""
@@ -1546,7 +2143,7 @@ def profile_page():
         return
     
     user = st.session_state.user
-    st.markdown("<h1 style='color: #8b4789;'>👤 My Profile</h1>", unsafe_allow_html=True)
+    st.markdown("<h1 class='gb-title'>👤 My Profile</h1>", unsafe_allow_html=True)
     
     tab1, tab2, tab3 = st.tabs(["📝 Profile", "🔐 Password", "📦 Orders"])
     
@@ -1584,9 +2181,17 @@ def profile_page():
     with tab3:
         display_user_orders(user['user_id'])
 
+# --- ADMISSION CONTROL ---
+# Admins always get in; everyone else may have to wait for a free slot
+if not (st.session_state.get('logged_in') and st.session_state.user and st.session_state.user.get('is_admin')):
+    admitted, queue_position, estimated_wait = ADMISSION.enter(st.session_state.admission_token)
+    if not admitted:
+        waiting_room_page(queue_position, estimated_wait)
+        st.stop()
+
 # --- NAVIGATION ---
 with st.sidebar:
-    st.markdown("<h2 style='color: #8b4789;'>💄 GlamBeauty</h2>", unsafe_allow_html=True)
+    st.markdown("<h2 class='gb-title'>💄 GlamBeauty</h2>", unsafe_allow_html=True)
     
     cart_count = len(st.session_state.cart)
     
@@ -1606,6 +2211,11 @@ with st.sidebar:
         if st.button("🚪 Logout", use_container_width=True):
             st.session_state.logged_in = False
             st.session_state.user = None
+            clear_order_history_state()
+            rotate_session()
+            # Hand the slot to whoever is waiting; this browser is admitted again as a new visitor
+            ADMISSION.leave(st.session_state.admission_token)
+            st.session_state.admission_token = uuid.uuid4().hex
             st.session_state.page = 'login'
             st.rerun()
     else:
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+# --- COLD ORDER ARCHIVE ---
+ORDER_COLUMNS = [
+    "order_id", "date", "customer_name", "email", "phone", "address", "items_json",
+    "total", "payment_method", "payment_details_json", "status", "user_id",
+]
+# Only finished orders are archived; anything still being fulfilled stays in its queue
+ARCHIVABLE_STATUSES = ('Delivered', 'Cancelled')
+
+
+def archive_path_for(db_path):
+    """Default archive file next to the main database, e.g. glambeauty-archive.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}-archive{ext or '.db'}"
+
+
+def attach_archive(conn, archive_path):
+    """Attach the archive database as `archive`, creating its tables on first use"""
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive.orders (
+            order_id TEXT PRIMARY KEY,
+            date TEXT,
+            customer_name TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            items_json TEXT,
+            total INTEGER,
+            payment_method TEXT,
+            payment_details_json TEXT,
+            status TEXT,
+            user_id INTEGER,
+            archived_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_orders_user_date ON orders(user_id, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_orders_date ON orders(date)")
+
+
+def init_archive(db_path, archive_path=None):
+    """Create the archive database file and tables"""
+    conn = sqlite3.connect(db_path)
+    attach_archive(conn, archive_path or archive_path_for(db_path))
+    conn.commit()
+    conn.close()
+
+
+def archive_old_orders(db_path, older_than_days, archive_path=None, batch_size=500, progress=None):
+    """Move finished (delivered or cancelled) orders older than `older_than_days` into the archive, one batch per transaction.
+
+    Each batch copies the full order rows (items included) and deletes them from
+    the hot table atomically. `progress(moved_so_far)` is called after every batch.
+    Returns the number of orders moved.
+    """
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+    archived_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    columns = ", ".join(ORDER_COLUMNS)
+    conn = sqlite3.connect(db_path, timeout=30)
+    attach_archive(conn, archive_path or archive_path_for(db_path))
+    conn.commit()
+    c = conn.cursor()
+    moved = 0
+    while True:
+        c.execute("BEGIN IMMEDIATE")
+        c.execute(f"""
+            SELECT order_id FROM main.orders
+            WHERE date < ? AND status IN ({', '.join('?' * len(ARCHIVABLE_STATUSES))})
+            ORDER BY date LIMIT ?
+        """, (cutoff, *ARCHIVABLE_STATUSES, batch_size))
+        order_ids = [row[0] for row in c.fetchall()]
+        if not order_ids:
+            conn.commit()
+            break
+        placeholders = ", ".join("?" * len(order_ids))
+        c.execute(f"""
+            INSERT OR REPLACE INTO archive.orders ({columns}, archived_at)
+            SELECT {columns}, ? FROM main.orders WHERE order_id IN ({placeholders})
+        """, [archived_at] + order_ids)
+        c.execute(f"DELETE FROM main.orders WHERE order_id IN ({placeholders})", order_ids)
+        conn.commit()
+        moved += len(order_ids)
+        if progress:
+            progress(moved)
+    conn.close()
+    return moved
+
+
+def fetch_archived_orders(db_path, archive_path=None):
+    """All archived orders, newest first"""
+    archive_path = archive_path or archive_path_for(db_path)
+    if not os.path.exists(archive_path):
+        return []
+    conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders ORDER BY date DESC")
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+
+def archived_user_stats(db_path, user_id, archive_path=None):
+    """(order_count, total_spent) of a user's archived orders"""
+    archive_path = archive_path or archive_path_for(db_path)
+    if not os.path.exists(archive_path):
+        return 0, 0
+    conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), COALESCE(SUM(total), 0) FROM orders WHERE user_id = ?", (user_id,))
+    stats = c.fetchone()
+    conn.close()
+    return stats
+
+
+def archive_stats(db_path, archive_path=None):
+    """(hot_orders, archived_orders, oldest_hot_date)"""
+    archive_path = archive_path or archive_path_for(db_path)
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), MIN(date) FROM orders")
+    hot, oldest = c.fetchone()
+    archived = 0
+    if os.path.exists(archive_path):
+        attach_archive(conn, archive_path)
+        c.execute("SELECT COUNT(*) FROM archive.orders")
+        archived = c.fetchone()[0]
+    conn.close()
+    return hot, archived, oldest
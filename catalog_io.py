@@ -0,0 +1,271 @@
+import csv
+import io
+import json
+import tempfile
+
+import pandas as pd
+
+# --- BULK CATALOG IMPORT / EXPORT ---
+PRODUCT_CATEGORIES = ["Lips", "Face", "Eyes", "Skincare", "Nails", "Fragrance", "Tools"]
+PRODUCT_FIELDS = ["id", "name", "price", "stock", "category", "description", "image"]
+REQUIRED_FIELDS = ["name", "price", "category", "description", "image"]
+DEFAULT_STOCK = 15
+BLANK_CELLS = ["", "nan", "None"]
+
+
+def read_product_upload(uploaded_file, filename):
+    """Read an uploaded CSV or JSON product file into a DataFrame"""
+    if filename.lower().endswith(".json"):
+        data = json.load(uploaded_file)
+        if isinstance(data, dict):
+            data = data.get("products", [])
+        df = pd.DataFrame(data)
+    else:
+        df = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    return df
+
+
+def _cell_text(value):
+    """Cell as stripped text; missing cells (None/NaN from JSON, pd.NA) become """""
+    return "" if pd.api.types.is_scalar(value) and pd.isna(value) else str(value).strip()
+
+
+def validate_product_frame(df):
+    """Validate an import frame column-wise.
+
+    Returns (clean_df, errors) where errors is a list of (row_number, message)
+    and clean_df holds only the rows that passed every check, with typed columns.
+    Cells are read through _cell_text first, so a JSON null or a key left out
+    of some rows counts as empty, the same as an empty CSV cell.
+    """
+    errors = []
+    missing_columns = [col for col in REQUIRED_FIELDS if col not in df.columns]
+    if missing_columns:
+        return df.iloc[0:0], [(0, f"Missing required column(s): {', '.join(missing_columns)}")]
+
+    df = df.copy()
+    # Row numbers as the user sees them in a spreadsheet (header is row 1)
+    df["_row"] = range(2, len(df) + 2)
+    if "action" not in df.columns:
+        df["action"] = "upsert"
+    df["action"] = df["action"].map(_cell_text).str.lower().replace({blank: "upsert" for blank in BLANK_CELLS})
+    is_delete = df["action"].eq("delete")
+
+    bad = pd.Series(False, index=df.index)
+
+    def flag(mask, message):
+        nonlocal bad
+        mask = mask.fillna(False)
+        for row in df.loc[mask, "_row"]:
+            errors.append((int(row), message))
+        bad = bad | mask
+
+    flag(~df["action"].isin(["upsert", "delete"]), "Action must be 'upsert' or 'delete'")
+
+    for col in ["name", "category", "description", "image"]:
+        df[col] = df[col].map(_cell_text)
+        flag(~is_delete & df[col].isin(BLANK_CELLS), f"'{col}' is required")
+
+    if "id" not in df.columns:
+        df["id"] = ""
+    raw_id = df["id"].map(_cell_text)
+    has_id = ~raw_id.isin(BLANK_CELLS)
+    ids = pd.to_numeric(raw_id.where(has_id), errors="coerce")
+    flag(has_id & (ids.isna() | (ids % 1 != 0) | (ids < 1)), "'id' must be a positive whole number")
+    flag(is_delete & ~has_id, "Delete rows need an 'id'")
+    flag(ids.notna() & ids.duplicated(keep=False), "Duplicate 'id' in file")
+    df["id"] = ids
+
+    price = pd.to_numeric(df["price"].map(_cell_text), errors="coerce")
+    flag(~is_delete & (price.isna() | (price < 1) | (price % 1 != 0)), "'price' must be a whole number of at least 1")
+    df["price"] = price
+
+    if "stock" not in df.columns:
+        df["stock"] = ""
+    raw_stock = df["stock"].map(_cell_text)
+    stock = pd.to_numeric(raw_stock.where(~raw_stock.isin(BLANK_CELLS), str(DEFAULT_STOCK)), errors="coerce")
+    flag(~is_delete & (stock.isna() | (stock < 0) | (stock % 1 != 0)), "'stock' must be a whole number of at least 0")
+    df["stock"] = stock
+
+    flag(~is_delete & ~df["category"].isin(PRODUCT_CATEGORIES), f"'category' must be one of: {', '.join(PRODUCT_CATEGORIES)}")
+
+    errors.sort()
+    return df[~bad], errors
+
+
+def diff_products(products, clean_df, delete_missing=False):
+    """Compare a validated import frame with the catalog.
+
+    Returns {'inserts': [product], 'updates': [(old, new)], 'deletes': [product]}.
+    Rows without an id (or with an id not in the catalog) become inserts.
+    Rows without an id are numbered after every id already taken, by the
+    catalog or by another row of the import.
+    """
+    by_id = {p['id']: p for p in products}
+    explicit_ids = {int(row_id) for row_id in clean_df["id"].dropna()}
+    next_id = max(set(by_id) | explicit_ids, default=0) + 1
+    inserts, updates, deletes = [], [], []
+    seen_ids = set()
+
+    for row in clean_df.to_dict("records"):
+        product_id = None if pd.isna(row["id"]) else int(row["id"])
+        if row["action"] == "delete":
+            if product_id in by_id:
+                deletes.append(by_id[product_id])
+                seen_ids.add(product_id)
+            continue
+
+        if product_id is None:
+            product_id = next_id
+            next_id += 1
+        seen_ids.add(product_id)
+
+        new_product = {
+            "id": product_id,
+            "name": row["name"],
+            "price": int(row["price"]),
+            "category": row["category"],
+            "description": row["description"],
+            "image": row["image"],
+            "stock": int(row["stock"]),
+        }
+        old_product = by_id.get(product_id)
+        if old_product is None:
+            inserts.append(new_product)
+        elif any(old_product.get(field) != new_product[field] for field in PRODUCT_FIELDS):
+            updates.append((old_product, new_product))
+
+    if delete_missing:
+        deletes.extend(p for p in products if p['id'] not in seen_ids)
+
+    return {"inserts": inserts, "updates": updates, "deletes": deletes}
+
+
+def diff_summary_frames(diff):
+    """DataFrames for showing a dry-run diff: inserted rows, changed cells, deleted rows"""
+    inserts = pd.DataFrame(diff["inserts"], columns=PRODUCT_FIELDS)
+    changes = [
+        {"id": new["id"], "field": field, "old": old.get(field), "new": new[field]}
+        for old, new in diff["updates"]
+        for field in PRODUCT_FIELDS
+        if old.get(field) != new[field]
+    ]
+    changes = pd.DataFrame(changes, columns=["id", "field", "old", "new"])
+    deletes = pd.DataFrame(diff["deletes"], columns=PRODUCT_FIELDS)
+    return inserts, changes, deletes
+
+
+def apply_product_diff(products, diff):
+    """Return a new catalog list with the diff applied, preserving catalog order"""
+    deleted_ids = {p['id'] for p in diff["deletes"]}
+    updated = {new['id']: new for _, new in diff["updates"]}
+    result = [dict(updated.get(p['id'], p)) for p in products if p['id'] not in deleted_ids]
+    result.extend(diff["inserts"])
+    return result
+
+
+def products_frame(products):
+    """Catalog rows as a DataFrame with the standard product columns"""
+    df = pd.DataFrame(products, columns=PRODUCT_FIELDS)
+    df["stock"] = df["stock"].fillna(DEFAULT_STOCK).astype(int)
+    return df
+
+
+def diff_edited_frame(products, edited_df):
+    """Diff an edited products_frame against the products it was built from.
+
+    Cells are compared column-wise; only rows with at least one changed cell
+    end up in 'updates'. Same shape as diff_products.
+    """
+    original = products_frame(products).set_index("id")
+    edited = edited_df.set_index("id")[original.columns].reindex(original.index)
+    # Empty cells (None or NaN) are "" for text and "unchanged" for numbers, so
+    # they compare equal to an untouched empty cell instead of NaN != NaN
+    for column in ["name", "category", "description", "image"]:
+        original[column] = original[column].map(_cell_text)
+        edited[column] = edited[column].map(_cell_text)
+    for column in ["price", "stock"]:
+        edited[column] = edited[column].fillna(original[column])
+    changed_rows = original.ne(edited).any(axis=1)
+    edited_rows = edited.loc[changed_rows].reset_index().to_dict("records")
+
+    by_id = {p['id']: p for p in products}
+    updates = []
+    for row in edited_rows:
+        old = by_id[row["id"]]
+        new = dict(old)
+        new.update({
+            "name": row["name"] or old["name"],
+            "price": max(1, int(row["price"])),
+            "stock": max(0, int(row["stock"])),
+            "category": row["category"] if row["category"] in PRODUCT_CATEGORIES else old["category"],
+            "description": row["description"],
+            "image": row["image"],
+        })
+        updates.append((old, new))
+    return {"inserts": [], "updates": updates, "deletes": []}
+
+
+def bulk_restock_diff(products, product_ids, amount):
+    """Diff that adds `amount` units to each selected product"""
+    selected = set(product_ids)
+    updates = [(p, dict(p, stock=p.get('stock', 0) + amount)) for p in products if p['id'] in selected]
+    return {"inserts": [], "updates": updates, "deletes": []}
+
+
+def restock_quantities_diff(products, quantities):
+    """Diff that adds a per-product number of units, e.g. from the restock forecast"""
+    updates = [
+        (p, dict(p, stock=p.get('stock', 0) + quantities[p['id']]))
+        for p in products if quantities.get(p['id'], 0) > 0
+    ]
+    return {"inserts": [], "updates": updates, "deletes": []}
+
+
+def bulk_reprice_diff(products, product_ids, percent):
+    """Diff that changes the price of each selected product by `percent` (rounded, at least 1)"""
+    selected = set(product_ids)
+    updates = [
+        (p, dict(p, price=max(1, round(p['price'] * (100 + percent) / 100))))
+        for p in products if p['id'] in selected
+    ]
+    return {"inserts": [], "updates": updates, "deletes": []}
+
+
+def bulk_delete_diff(products, product_ids):
+    """Diff that deletes each selected product"""
+    selected = set(product_ids)
+    return {"inserts": [], "updates": [], "deletes": [p for p in products if p['id'] in selected]}
+
+
+def iter_products_csv(products, chunk_size=500):
+    """Stream the catalog as CSV text, chunk_size rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=PRODUCT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for start in range(0, len(products), chunk_size):
+        writer.writerows(products[start:start + chunk_size])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_products_json(products, chunk_size=500):
+    """Stream the catalog as a JSON array, chunk_size products at a time"""
+    yield "["
+    for start in range(0, len(products), chunk_size):
+        chunk = ",\n".join(json.dumps(p) for p in products[start:start + chunk_size])
+        yield ("\n" if start == 0 else ",\n") + chunk
+    yield "\n]\n"
+
+
+def spool_export(chunks):
+    """Write streamed export chunks to a temporary file and return it rewound, for a file-backed download"""
+    spool = tempfile.TemporaryFile()
+    for chunk in chunks:
+        spool.write(chunk.encode("utf-8"))
+    spool.seek(0)
+    return spool
@@ -0,0 +1,193 @@
+import atexit
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+import pandas as pd
+
+# --- SHOPPER EVENT TRACKING ---
+EVENT_TYPES = ('product_view', 'add_to_cart', 'remove_from_cart', 'checkout_start', 'purchase')
+FUNNEL_STAGES = ['product_view', 'add_to_cart', 'checkout_start', 'purchase']
+ABANDON_AFTER_MINUTES = 30
+
+
+def init_events(db_path):
+    """Create the shopper events table"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS shopper_events (
+            event_id INTEGER PRIMARY KEY,
+            ts TEXT NOT NULL,
+            session_id TEXT,
+            user_id INTEGER,
+            event TEXT NOT NULL,
+            product_id INTEGER,
+            value REAL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shopper_events_ts ON shopper_events(ts)")
+    conn.commit()
+    conn.close()
+
+
+class EventCollector:
+    """Buffers shopper events in memory and appends them to the database in batches.
+
+    track() only appends to a bounded deque, so a click never waits on a write;
+    a background thread flushes every `flush_interval` seconds, or sooner once
+    `max_pending` events are waiting. If the database is unavailable for long
+    enough that `max_buffer` events pile up, the oldest are dropped (and counted).
+    """
+
+    def __init__(self, db_path, flush_interval=2.0, max_pending=1000, max_buffer=100000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-flusher", daemon=True)
+        self.stats = {
+            'tracked': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'rows_flushed': 0,
+            'last_flush_ms': 0.0,
+            'errors': 0,
+        }
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def track(self, event, session_id=None, user_id=None, product_id=None, value=None):
+        """Queue one event; written to the database on the next flush"""
+        if event not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event}")
+        row = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), session_id, user_id, event, product_id, value)
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.stats['dropped'] += 1
+            self._pending.append(row)
+            self.stats['tracked'] += 1
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write all buffered events in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    conn.executemany(
+                        "INSERT INTO shopper_events (ts, session_id, user_id, event, product_id, value) VALUES (?, ?, ?, ?, ?, ?)",
+                        batch
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                # Put the batch back in front of newer events and retry on the next cycle
+                with self._lock:
+                    room = self._pending.maxlen - len(self._pending)
+                    requeue = batch[max(0, len(batch) - room):]
+                    self._pending.extendleft(reversed(requeue))
+                    self.stats['dropped'] += len(batch) - len(requeue)
+                self.stats['errors'] += 1
+                return 0
+
+            self.stats['flushes'] += 1
+            self.stats['rows_flushed'] += len(batch)
+            self.stats['last_flush_ms'] = (time.perf_counter() - start) * 1000
+            return len(batch)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, pending=len(self._pending))
+
+    def close(self):
+        """Stop the background thread and write whatever is still buffered"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def load_events(db_path, since):
+    """Events at or after `since` ("YYYY-MM-DD HH:MM:SS") as a DataFrame"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    events = pd.read_sql_query(
+        "SELECT ts, session_id, user_id, event, product_id, value FROM shopper_events WHERE ts >= ?",
+        conn, params=(since,)
+    )
+    conn.close()
+    events['ts'] = pd.to_datetime(events['ts'])
+    return events
+
+
+def funnel_report(events, now=None, abandon_after_minutes=ABANDON_AFTER_MINUTES):
+    """Funnel, checkout abandonment and per-product engagement from an events frame.
+
+    Each stage counts the sessions that reached it or any later stage (adding
+    to the cart from the home page skips the product page, but that shopper
+    still browsed), so the funnel never widens. A checkout is
+    abandoned when a session started checking out, bought nothing afterwards
+    and has been idle for `abandon_after_minutes`.
+    """
+    now = now or datetime.now()
+    sessions = events.dropna(subset=['session_id'])
+    reached = pd.crosstab(sessions['session_id'], sessions['event']).reindex(columns=FUNNEL_STAGES, fill_value=0) > 0
+    reached = reached.iloc[:, ::-1].cummax(axis=1).iloc[:, ::-1]
+    counts = reached.sum().astype(int)
+    previous = counts.shift(1)
+    funnel = pd.DataFrame({
+        'stage': FUNNEL_STAGES,
+        'sessions': counts.values,
+        'of_first_stage': (counts / max(counts.iloc[0], 1)).round(3).values,
+        'of_previous_stage': (counts / previous.where(previous > 0)).fillna(1.0).round(3).values,
+    })
+
+    last_seen = sessions.groupby('session_id')['ts'].max()
+    last_start = sessions[sessions['event'] == 'checkout_start'].groupby('session_id')['ts'].max()
+    last_purchase = sessions[sessions['event'] == 'purchase'].groupby('session_id')['ts'].max().reindex(last_start.index)
+    idle = last_seen.reindex(last_start.index) < now - timedelta(minutes=abandon_after_minutes)
+    abandoned = (last_purchase.isna() | (last_purchase < last_start)) & idle
+
+    product_events = events.dropna(subset=['product_id'])
+    products = (
+        pd.crosstab(product_events['product_id'].astype(int), product_events['event'])
+        .reindex(columns=['product_view', 'add_to_cart', 'remove_from_cart'], fill_value=0)
+        .rename(columns={'product_view': 'views', 'add_to_cart': 'adds', 'remove_from_cart': 'removals'})
+    )
+    products['add_rate'] = (products['adds'] / products['views'].where(products['views'] > 0)).round(3)
+    products['removal_rate'] = (products['removals'] / products['adds'].where(products['adds'] > 0)).round(3)
+    products = products.sort_values(['adds', 'views'], ascending=False).reset_index().rename(columns={'product_id': 'id'})
+
+    return {
+        'events': len(events),
+        'sessions': int(sessions['session_id'].nunique()),
+        'funnel': funnel,
+        'checkouts_started': int(len(last_start)),
+        'checkouts_abandoned': int(abandoned.sum()),
+        'products': products,
+    }
@@ -0,0 +1,158 @@
+import threading
+
+# --- CATALOG FACETS ---
+# (label, min price inclusive, max price exclusive)
+PRICE_BANDS = [
+    ("Under ₹500", 0, 500),
+    ("₹500 - ₹999", 500, 1000),
+    ("₹1000 - ₹1999", 1000, 2000),
+    ("₹2000 & above", 2000, None),
+]
+
+LOW_STOCK_THRESHOLD = 5
+
+
+def price_band(price):
+    """Return the price band label for a price"""
+    for label, low, high in PRICE_BANDS:
+        if price >= low and (high is None or price < high):
+            return label
+    return PRICE_BANDS[0][0]
+
+
+def _bit_ids(mask):
+    """Yield the product ids set in a bitset, lowest first"""
+    if not mask:
+        return
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index * 8
+            for bit in range(8):
+                if byte & (1 << bit):
+                    yield base + bit
+
+
+class FacetIndex:
+    """Per-facet bitsets over product ids, intersected to answer combined filters.
+
+    Bit N of every bitset stands for product id N, so combining filters is an
+    integer AND and a count is a popcount.
+    """
+
+    def __init__(self, products, version=None):
+        self._lock = threading.Lock()
+        self.rebuild(products, version)
+
+    def rebuild(self, products, version=None):
+        """Build every facet from a catalog snapshot (`version` is the catalog version it was read at)"""
+        with self._lock:
+            self.version = version
+            self.all = 0
+            self.category = {}
+            self.price = {label: 0 for label, _, _ in PRICE_BANDS}
+            self.in_stock = 0
+            self.low_stock = 0
+            self._keys = {}
+            for product in products:
+                self._add(product)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _facet_keys(self, product):
+        stock = product.get('stock', 0)
+        return (
+            product.get('category', ''),
+            price_band(product.get('price', 0)),
+            stock > 0,
+            0 < stock <= LOW_STOCK_THRESHOLD,
+        )
+
+    def _add(self, product):
+        bit = 1 << product['id']
+        category, band, in_stock, low_stock = self._facet_keys(product)
+        self.all |= bit
+        self.category[category] = self.category.get(category, 0) | bit
+        self.price[band] |= bit
+        if in_stock:
+            self.in_stock |= bit
+        if low_stock:
+            self.low_stock |= bit
+        self._keys[product['id']] = (category, band, in_stock, low_stock)
+
+    def _remove(self, product_id):
+        keys = self._keys.pop(product_id, None)
+        if keys is None:
+            return
+        clear = ~(1 << product_id)
+        category, band, _, _ = keys
+        self.all &= clear
+        self.category[category] &= clear
+        if not self.category[category]:
+            del self.category[category]
+        self.price[band] &= clear
+        self.in_stock &= clear
+        self.low_stock &= clear
+
+    def update_products(self, products):
+        """Re-file changed products (admin edits, restocks, checkout decrements)"""
+        with self._lock:
+            for product in products:
+                if self._keys.get(product['id']) == self._facet_keys(product):
+                    continue
+                self._remove(product['id'])
+                self._add(product)
+
+    def remove_products(self, product_ids):
+        """Drop deleted products from every facet"""
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+
+    def _mask(self, category, band, in_stock_only, low_stock_only, skip=None):
+        mask = self.all
+        if category and skip != 'category':
+            mask &= self.category.get(category, 0)
+        if band and skip != 'price':
+            mask &= self.price.get(band, 0)
+        if in_stock_only and skip != 'in_stock':
+            mask &= self.in_stock
+        if low_stock_only and skip != 'low_stock':
+            mask &= self.low_stock
+        return mask
+
+    def search(self, category=None, band=None, in_stock_only=False, low_stock_only=False, offset=0, limit=None):
+        """Return (product_ids, total) for the combined filter, in id order"""
+        with self._lock:
+            mask = self._mask(category, band, in_stock_only, low_stock_only)
+        total = mask.bit_count()
+        product_ids = []
+        for index, product_id in enumerate(_bit_ids(mask)):
+            if index < offset:
+                continue
+            if limit is not None and len(product_ids) >= limit:
+                break
+            product_ids.append(product_id)
+        return product_ids, total
+
+    def counts(self, category=None, band=None, in_stock_only=False, low_stock_only=False):
+        """Live counts per facet value, each computed with the other active filters applied"""
+        with self._lock:
+            base = self._mask(category, band, in_stock_only, low_stock_only, skip='category')
+            categories = {name: (bits & base).bit_count() for name, bits in sorted(self.category.items())}
+            categories["All"] = base.bit_count()
+
+            base = self._mask(category, band, in_stock_only, low_stock_only, skip='price')
+            prices = {label: (self.price[label] & base).bit_count() for label, _, _ in PRICE_BANDS}
+            prices["All"] = base.bit_count()
+
+            in_stock = (self._mask(category, band, in_stock_only, low_stock_only, skip='in_stock') & self.in_stock).bit_count()
+            low_stock = (self._mask(category, band, in_stock_only, low_stock_only, skip='low_stock') & self.low_stock).bit_count()
+
+        return {
+            'category': categories,
+            'price': prices,
+            'in_stock': in_stock,
+            'low_stock': low_stock,
+        }
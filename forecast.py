@@ -0,0 +1,128 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from store import order_units
+
+# --- SALES VELOCITY & RESTOCK FORECAST ---
+HALF_LIFE_DAYS = 7
+
+
+class SalesHistory:
+    """Units sold per product per day over the last `window_days`, kept incrementally.
+
+    The first pass reads the orders in the window; later passes only read rows
+    added since (by rowid), so refreshing before each forecast is cheap.
+    Orders cancelled after they were counted are taken back out through their
+    order_status_history rows (by history_id).
+    """
+
+    def __init__(self, db_path, window_days=28):
+        self.db_path = db_path
+        self.window_days = window_days
+        self._daily = {}
+        self._last_rowid = 0
+        self._last_history_id = 0
+        self._lock = threading.Lock()
+
+    def _add(self, day, items_json, sign):
+        try:
+            items = json.loads(items_json or "[]")
+        except ValueError:
+            return
+        for pid, units in order_units(items).items():
+            key = (day, pid)
+            self._daily[key] = max(0, self._daily.get(key, 0) + sign * units)
+
+    def catch_up(self):
+        """Fold in new orders and later cancellations, drop days that left the window; returns orders read"""
+        window_start = (datetime.now() - timedelta(days=self.window_days)).strftime("%Y-%m-%d")
+        with self._lock:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                # One read transaction, so both passes see the same state of the database
+                conn.execute("BEGIN")
+                # A cancellation newer than the last pass hit an order that was counted
+                # then, if the order was read then (rowid up to _last_rowid)
+                for history_id, order_rowid, date, items_json in conn.execute("""
+                    SELECT h.history_id, o.rowid, o.date, o.items_json
+                    FROM order_status_history h JOIN orders o ON o.order_id = h.order_id
+                    WHERE h.history_id > ? AND h.to_status = 'Cancelled'
+                    ORDER BY h.history_id
+                """, (self._last_history_id,)).fetchall():
+                    self._last_history_id = history_id
+                    if order_rowid <= self._last_rowid and date >= window_start:
+                        self._add(date[:10], items_json, -1)
+                self._last_history_id = max(
+                    self._last_history_id,
+                    conn.execute("SELECT COALESCE(MAX(history_id), 0) FROM order_status_history").fetchone()[0]
+                )
+
+                added = 0
+                for rowid, date, items_json, status in conn.execute(
+                    "SELECT rowid, date, items_json, status FROM orders WHERE rowid > ? AND date >= ? ORDER BY rowid",
+                    (self._last_rowid, window_start)
+                ).fetchall():
+                    self._last_rowid = rowid
+                    if status != 'Cancelled':
+                        self._add(date[:10], items_json, 1)
+                        added += 1
+            finally:
+                conn.close()
+            for key in [k for k in self._daily if k[0] < window_start]:
+                del self._daily[key]
+            return added
+
+    def units_matrix(self, product_ids, today=None):
+        """(units[product, day] array, day labels) for the window, oldest day first"""
+        today = today or datetime.now().date()
+        days = [(today - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(self.window_days - 1, -1, -1)]
+        with self._lock:
+            records = [(day, pid, units) for (day, pid), units in self._daily.items()]
+        if not records:
+            return np.zeros((len(product_ids), len(days))), days
+        frame = pd.DataFrame(records, columns=["day", "id", "units"])
+        matrix = frame.pivot_table(index="id", columns="day", values="units", aggfunc="sum", fill_value=0)
+        matrix = matrix.reindex(index=product_ids, columns=days, fill_value=0)
+        return matrix.to_numpy(dtype=float), days
+
+
+def restock_forecast(products, history, lead_time_days=7, target_cover_days=30, today=None):
+    """Per-product velocity, days of cover and suggested restock quantity, most urgent first.
+
+    Velocity is an exponentially weighted daily rate (half-life 7 days), so a
+    recent spike counts more than a quiet month. Products that would run out
+    within `lead_time_days` get a quantity that brings them to
+    `target_cover_days` of stock.
+    """
+    columns = ["id", "name", "stock", "sold_7d", "sold_window", "velocity", "days_of_cover", "suggested_qty", "needs_restock"]
+    if not products:
+        return pd.DataFrame(columns=columns)
+    ids = [p['id'] for p in products]
+    stock = np.array([p.get('stock', 0) for p in products], dtype=float)
+    units, days = history.units_matrix(ids, today)
+
+    ages = np.arange(len(days) - 1, -1, -1, dtype=float)
+    weights = 0.5 ** (ages / HALF_LIFE_DAYS)
+    velocity = units @ weights / weights.sum()
+    with np.errstate(divide="ignore"):
+        days_of_cover = np.where(velocity > 0, stock / velocity, np.inf)
+    suggested = np.maximum(0, np.ceil(velocity * target_cover_days - stock)).astype(int)
+    needs_restock = (stock <= 0) | (days_of_cover <= lead_time_days)
+    # Out of stock with no recent sales still needs something on the shelf
+    suggested = np.where((stock <= 0) & (suggested == 0), 1, suggested)
+
+    forecast = pd.DataFrame({
+        "id": ids,
+        "name": [p['name'] for p in products],
+        "stock": stock.astype(int),
+        "sold_7d": units[:, -7:].sum(axis=1).astype(int),
+        "sold_window": units.sum(axis=1).astype(int),
+        "velocity": velocity.round(2),
+        "days_of_cover": np.round(days_of_cover, 1),
+        "suggested_qty": np.where(needs_restock, suggested, 0),
+        "needs_restock": needs_restock,
+    }, columns=columns)
+    return forecast.sort_values(["needs_restock", "days_of_cover", "velocity"], ascending=[False, True, False]).reset_index(drop=True)
@@ -0,0 +1,177 @@
+import sqlite3
+from datetime import datetime
+from inventory import record_movements, stock_levels, take_snapshots
+from store import read_products, write_products, safe_json_loads, order_units
+
+# --- ORDER FULFILLMENT WORKFLOW ---
+# Orders move Confirmed -> Packed -> Shipped -> Delivered, and can be cancelled
+# until they are delivered. Queues are read oldest first through the
+# (status, date, order_id) index; every change is kept in order_status_history.
+ORDER_STATUSES = ['Confirmed', 'Packed', 'Shipped', 'Delivered', 'Cancelled']
+NEXT_STATUSES = {
+    'Confirmed': ['Packed', 'Cancelled'],
+    'Packed': ['Shipped', 'Cancelled'],
+    'Shipped': ['Delivered', 'Cancelled'],
+    'Delivered': [],
+    'Cancelled': [],
+}
+QUEUE_COLUMNS = ["order_id", "date", "customer_name", "total", "payment_method", "status"]
+
+
+def init_fulfillment(db_path):
+    """Create the status history table and the queue index"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS order_status_history (
+            history_id INTEGER PRIMARY KEY,
+            order_id TEXT NOT NULL,
+            from_status TEXT,
+            to_status TEXT NOT NULL,
+            changed_at TEXT NOT NULL,
+            changed_by TEXT,
+            note TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_order_status_history_order ON order_status_history(order_id, history_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_date ON orders(status, date, order_id)")
+    conn.commit()
+    conn.close()
+
+
+def status_counts(db_path):
+    """{status: order count} for every status (counted from the queue index)"""
+    conn = sqlite3.connect(db_path)
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM orders GROUP BY status").fetchall())
+    conn.close()
+    return {status: counts.get(status, 0) for status in ORDER_STATUSES}
+
+
+def fulfillment_queue(db_path, status, cursor=None, limit=50):
+    """One page of orders in `status`, oldest first; returns (rows, next_cursor).
+
+    `cursor` is the (date, order_id) of the last row of the previous page;
+    next_cursor is None on the last page.
+    """
+    params = [status]
+    keyset = ""
+    if cursor:
+        keyset = "AND (date > ? OR (date = ? AND order_id > ?))"
+        params += [cursor[0], cursor[0], cursor[1]]
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(f"""
+        SELECT {', '.join(QUEUE_COLUMNS)} FROM orders
+        WHERE status = ? {keyset}
+        ORDER BY date, order_id
+        LIMIT ?
+    """, params + [limit + 1]).fetchall()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][1], rows[-1][0])
+    return rows, next_cursor
+
+
+def _in_chunks(c, query, values, size=500):
+    """Run `query` (with an {ids} placeholder list) over values in chunks below SQLite's variable limit"""
+    rows = []
+    for start in range(0, len(values), size):
+        chunk = values[start:start + size]
+        rows += c.execute(query.format(ids=",".join("?" * len(chunk))), chunk).fetchall()
+    return rows
+
+
+def current_statuses(db_path, order_ids):
+    """{order_id: status} from the live database, for orders listed from an older snapshot.
+
+    Orders missing from the result are no longer in the orders table (archived).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(_in_chunks(conn, "SELECT order_id, status FROM orders WHERE order_id IN ({ids})", list(order_ids)))
+    finally:
+        conn.close()
+
+
+def transition_orders(conn, order_ids, to_status, changed_by=None, note=None):
+    """Move many orders to `to_status` in one transaction.
+
+    Orders for which the move is not allowed are left as they are and
+    reported. Cancelled orders give their items back to stock as
+    reservation_release movements, and the catalog file is rewritten with the
+    new levels before the commit, as in place_orders. Returns (moved order ids,
+    [(order_id, reason)], changed_products).
+    """
+    if to_status not in ORDER_STATUSES:
+        raise ValueError(f"Unknown order status: {to_status}")
+    order_ids = list(dict.fromkeys(order_ids))
+    moved, rejected, changed = [], [], []
+    written = False
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        current = {
+            order_id: (status, items_json)
+            for order_id, status, items_json in _in_chunks(
+                c, "SELECT order_id, status, items_json FROM orders WHERE order_id IN ({ids})", order_ids
+            )
+        }
+        changed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        history = []
+        movements = []
+        for order_id in order_ids:
+            if order_id not in current:
+                rejected.append((order_id, "not found"))
+                continue
+            status, items_json = current[order_id]
+            if to_status not in NEXT_STATUSES.get(status, []):
+                rejected.append((order_id, f"cannot go from {status} to {to_status}"))
+                continue
+            moved.append(order_id)
+            history.append((order_id, status, to_status, changed_at, changed_by, note))
+            if to_status == 'Cancelled':
+                items = safe_json_loads(items_json) or []
+                movements += [(pid, qty, 'reservation_release', order_id) for pid, qty in order_units(items).items()]
+
+        c.executemany("UPDATE orders SET status = ? WHERE order_id = ?", [(to_status, order_id) for order_id in moved])
+        c.executemany("""
+            INSERT INTO order_status_history (order_id, from_status, to_status, changed_at, changed_by, note)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, history)
+        if movements:
+            record_movements(c, movements)
+            product_ids = {pid for pid, _, _, _ in movements}
+            take_snapshots(c, product_ids)
+            levels = stock_levels(c, product_ids)
+            products = read_products()
+            original = [dict(p) for p in products]
+            for p in products:
+                if p['id'] in levels:
+                    p['stock'] = levels[p['id']]
+                    changed.append(p)
+            write_products(products)
+            written = True
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if written:
+            write_products(original)
+        raise
+    return moved, rejected, changed
+
+
+def order_status_history(db_path, order_ids):
+    """{order_id: [(from_status, to_status, changed_at, changed_by, note)]}, oldest change first"""
+    order_ids = list(order_ids)
+    conn = sqlite3.connect(db_path)
+    rows = _in_chunks(conn, """
+        SELECT order_id, from_status, to_status, changed_at, changed_by, note FROM order_status_history
+        WHERE order_id IN ({ids}) ORDER BY order_id, history_id
+    """, order_ids)
+    conn.close()
+    history = {}
+    for order_id, *change in rows:
+        history.setdefault(order_id, []).append(tuple(change))
+    return history
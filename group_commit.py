@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# --- GROUP COMMIT ---
+
+
+class GroupCommitQueue:
+    """Single-writer queue that commits concurrent requests together.
+
+    Callers block in submit(); one writer thread gathers whatever arrives within
+    `max_wait_ms` of the first request (up to `max_batch_size`) and hands the
+    batch to `commit_batch(items)`. That function must return one result per
+    item, in order; an Exception instance as a result fails only that caller.
+    """
+
+    def __init__(self, commit_batch, max_batch_size=100, max_wait_ms=5.0, name="group-commit-writer"):
+        self.commit_batch = commit_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._lock = threading.Lock()
+        self.stats = {'batches': 0, 'items': 0, 'largest_batch': 0, 'last_batch_ms': 0.0, 'withdrawn': 0}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, item, timeout=30):
+        """Queue an item and wait for its own result (raises if it failed).
+
+        An item the writer has not picked up within `timeout` seconds is
+        withdrawn and TimeoutError is raised. Once the writer has picked it up,
+        the caller waits for the real outcome, so a timeout never reports
+        failure for an item that was committed.
+        """
+        future = Future()
+        self._queue.put((item, future))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                return future.result()
+            with self._lock:
+                self.stats['withdrawn'] += 1
+            raise TimeoutError("Timed out waiting for the writer; nothing was committed")
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['queued'] = self._queue.qsize()
+        stats['avg_batch'] = stats['items'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Claim the futures; items withdrawn by a timed-out caller are skipped
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = self.commit_batch(items)
+            except Exception as e:
+                results = [e] * len(batch)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+            with self._lock:
+                self.stats['batches'] += 1
+                self.stats['items'] += len(batch)
+                self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+                self.stats['last_batch_ms'] = elapsed_ms
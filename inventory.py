@@ -0,0 +1,159 @@
+import sqlite3
+from datetime import datetime
+
+# --- INVENTORY LEDGER ---
+# Every stock change is an append-only ledger row. Each product also has
+# snapshot rows (stock as of a ledger entry), so a stock level is the latest
+# snapshot plus the few entries after it, never a replay of the whole ledger.
+MOVEMENT_KINDS = ('sale', 'restock', 'adjustment', 'reservation_release')
+SNAPSHOT_EVERY = 50
+
+
+def init_inventory(db_path):
+    """Create the ledger and snapshot tables"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_ledger (
+            entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            delta INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            ref TEXT,
+            created_at TEXT NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ledger_product ON inventory_ledger(product_id, entry_id)")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_snapshots (
+            product_id INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            stock INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (product_id, entry_id)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+    conn.close()
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record_movements(c, movements):
+    """Append [(product_id, delta, kind, ref)] to the ledger in the caller's transaction"""
+    rows = []
+    created_at = _now()
+    for product_id, delta, kind, ref in movements:
+        if kind not in MOVEMENT_KINDS:
+            raise ValueError(f"Unknown stock movement: {kind}")
+        if delta:
+            rows.append((product_id, int(delta), kind, ref, created_at))
+    c.executemany(
+        "INSERT INTO inventory_ledger (product_id, delta, kind, ref, created_at) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    return len(rows)
+
+
+def open_stock(c, products):
+    """Start (or restart, for a reused id) products at their own stock as of the current ledger head"""
+    head = c.execute("SELECT COALESCE(MAX(entry_id), 0) FROM inventory_ledger").fetchone()[0]
+    created_at = _now()
+    c.executemany(
+        "INSERT OR REPLACE INTO inventory_snapshots (product_id, entry_id, stock, created_at) VALUES (?, ?, ?, ?)",
+        [(p['id'], head, p.get('stock', 0), created_at) for p in products]
+    )
+
+
+def stock_levels(c, product_ids=None, as_of=None):
+    """{product_id: stock} from each product's latest snapshot plus its ledger tail.
+
+    With `as_of` ("YYYY-MM-DD HH:MM:SS"), the stock at that moment: the latest
+    snapshot taken by then plus the entries after it up to then.
+    """
+    params = []
+    snapshot_filter = ""
+    tail_filter = ""
+    if as_of:
+        snapshot_filter = "AND created_at <= ?"
+        tail_filter = "AND l.created_at <= ?"
+        params = [as_of]
+    query = f"""
+        SELECT s.product_id, s.stock + COALESCE(SUM(l.delta), 0)
+        FROM inventory_snapshots s
+        LEFT JOIN inventory_ledger l ON l.product_id = s.product_id AND l.entry_id > s.entry_id {tail_filter}
+        WHERE s.entry_id = (
+            SELECT MAX(entry_id) FROM inventory_snapshots
+            WHERE product_id = s.product_id {snapshot_filter}
+        )
+    """
+    params = params * 2
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        query += f" AND s.product_id IN ({','.join('?' * len(product_ids))})"
+        params += product_ids
+    query += " GROUP BY s.product_id"
+    return dict(c.execute(query, params).fetchall())
+
+
+def take_snapshots(c, product_ids=None, every=SNAPSHOT_EVERY):
+    """Snapshot products (all, or just `product_ids`) whose ledger tail reached `every` entries; returns how many"""
+    params = [_now()]
+    product_filter = ""
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return 0
+        product_filter = f"AND s.product_id IN ({','.join('?' * len(product_ids))})"
+        params += product_ids
+    return c.execute(f"""
+        INSERT INTO inventory_snapshots (product_id, entry_id, stock, created_at)
+        SELECT s.product_id, MAX(l.entry_id), s.stock + SUM(l.delta), ?
+        FROM inventory_snapshots s
+        JOIN inventory_ledger l ON l.product_id = s.product_id AND l.entry_id > s.entry_id
+        WHERE s.entry_id = (SELECT MAX(entry_id) FROM inventory_snapshots WHERE product_id = s.product_id)
+        {product_filter}
+        GROUP BY s.product_id
+        HAVING COUNT(*) >= ?
+    """, params + [every]).rowcount
+
+
+def stock_movements(old_products, new_products, kind, ref=None):
+    """Ledger movements for the stock differences between two versions of the catalog.
+
+    Only products present in both are compared; new products are opened with
+    their stock instead (see open_stock).
+    """
+    old_stock = {p['id']: p.get('stock', 0) for p in old_products}
+    return [
+        (p['id'], p.get('stock', 0) - old_stock[p['id']], kind, ref)
+        for p in new_products
+        if p['id'] in old_stock and p.get('stock', 0) != old_stock[p['id']]
+    ]
+
+
+def product_movements(conn, product_id, limit=20):
+    """Most recent ledger entries of a product, newest first"""
+    return conn.execute("""
+        SELECT entry_id, created_at, kind, delta, ref FROM inventory_ledger
+        WHERE product_id = ? ORDER BY entry_id DESC LIMIT ?
+    """, (product_id, limit)).fetchall()
+
+
+def inventory_stats(conn):
+    """Ledger size, snapshot count and the longest tail a stock read has to sum"""
+    entries = conn.execute("SELECT COUNT(*) FROM inventory_ledger").fetchone()[0]
+    snapshots = conn.execute("SELECT COUNT(*) FROM inventory_snapshots").fetchone()[0]
+    longest_tail = conn.execute("""
+        SELECT COALESCE(MAX(tail), 0) FROM (
+            SELECT COUNT(l.entry_id) AS tail
+            FROM inventory_snapshots s
+            LEFT JOIN inventory_ledger l ON l.product_id = s.product_id AND l.entry_id > s.entry_id
+            WHERE s.entry_id = (SELECT MAX(entry_id) FROM inventory_snapshots WHERE product_id = s.product_id)
+            GROUP BY s.product_id
+        )
+    """).fetchone()[0]
+    return {'entries': entries, 'snapshots': snapshots, 'longest_tail': longest_tail}
@@ -0,0 +1,154 @@
+import hashlib
+import html
+import json
+import os
+import threading
+from facets import LOW_STOCK_THRESHOLD
+
+# --- STATIC PRODUCT LANDING PAGES ---
+# Plain HTML pages for QR scans: they load instantly from any static host and
+# link into the store. Pages are only rewritten when their rendered HTML changes.
+MANIFEST_NAME = "manifest.json"
+_manifest_lock = threading.Lock()
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{name} - GlamBeauty</title>
+<meta property="og:title" content="{name}">
+<meta property="og:image" content="{image}">
+<style>
+body {{ margin: 0; font-family: -apple-system, "Segoe UI", Roboto, sans-serif; background: #fef5f9; color: #333; }}
+main {{ max-width: 480px; margin: 0 auto; padding: 16px; }}
+img {{ width: 100%; border-radius: 16px; border: 2px solid #d4a8c8; background: #fff; }}
+h1 {{ color: #8b4789; font-size: 24px; margin: 16px 0 4px; }}
+.category {{ display: inline-block; background: #e8d5f2; color: #8b4789; padding: 4px 12px; border-radius: 12px; font-size: 12px; font-weight: 600; }}
+.price {{ font-size: 28px; font-weight: 700; color: #8b4789; margin: 12px 0; }}
+.badge {{ display: inline-block; padding: 6px 14px; border-radius: 12px; font-weight: 600; font-size: 14px; }}
+.in-stock {{ background: #d8f3dc; color: #1b4332; }}
+.low-stock {{ background: #fff3cd; color: #856404; }}
+.out-of-stock {{ background: #f8d7da; color: #842029; }}
+.cta {{ display: block; margin: 20px 0; padding: 14px; text-align: center; border-radius: 12px; background: linear-gradient(135deg, #8b4789 0%, #9b5d9d 100%); color: #fff; font-weight: 700; text-decoration: none; }}
+</style>
+</head>
+<body>
+<main>
+<img src="{image}" alt="{name}" loading="eager">
+<h1>{name}</h1>
+<span class="category">{category}</span>
+<div class="price">&#8377;{price}</div>
+<span class="badge {badge_class}">{badge}</span>
+<p>{description}</p>
+<a class="cta" href="{store_link}">Open in store</a>
+</main>
+</body>
+</html>
+"""
+
+
+def landing_pages_dir():
+    """Output directory for the pages (LANDING_PAGES_DIR, default product_pages/)"""
+    return os.getenv("LANDING_PAGES_DIR", "product_pages")
+
+
+def stock_badge(stock):
+    """(label, css class) for a stock level.
+
+    Only the band is shown, not the exact count, so ordinary sales do not
+    rewrite the page.
+    """
+    if stock <= 0:
+        return "Out of stock", "out-of-stock"
+    if stock <= LOW_STOCK_THRESHOLD:
+        return "Only a few left", "low-stock"
+    return "In stock", "in-stock"
+
+
+def render_product_page(product, store_url):
+    """HTML for one product's landing page"""
+    badge, badge_class = stock_badge(product.get('stock', 0))
+    return PAGE_TEMPLATE.format(
+        name=html.escape(product['name']),
+        image=html.escape(product.get('image', ''), quote=True),
+        category=html.escape(product.get('category', '')),
+        price=product['price'],
+        badge=badge,
+        badge_class=badge_class,
+        description=html.escape(product.get('description', '')),
+        store_link=html.escape(f"{store_url.rstrip('/')}/?product_id={product['id']}", quote=True),
+    )
+
+
+def page_filename(product_id):
+    return f"{product_id}.html"
+
+
+def _load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {'store_url': None, 'pages': {}}
+
+
+def _write_file(path, text):
+    # Temp file + rename, so a static server never serves a half-written page
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def publish_landing_pages(products, deleted_ids=(), out_dir=None, store_url=None, prune=False):
+    """Render pages for `products` and write only those whose HTML changed.
+
+    `store_url` defaults to the one the pages were last built with. With
+    prune=True, pages of products not in `products` are removed too (use it
+    for full rebuilds). Returns {'written', 'unchanged', 'removed'}.
+    """
+    out_dir = out_dir or landing_pages_dir()
+    with _manifest_lock:
+        os.makedirs(out_dir, exist_ok=True)
+        manifest = _load_manifest(out_dir)
+        store_url = store_url or manifest.get('store_url') or os.getenv("STREAMLIT_APP_URL", "http://localhost:8501")
+        pages = manifest['pages']
+        stats = {'written': 0, 'unchanged': 0, 'removed': 0}
+
+        for product in products:
+            page = render_product_page(product, store_url)
+            digest = hashlib.sha1(page.encode("utf-8")).hexdigest()
+            key = str(product['id'])
+            if pages.get(key) == digest and os.path.exists(os.path.join(out_dir, page_filename(key))):
+                stats['unchanged'] += 1
+                continue
+            _write_file(os.path.join(out_dir, page_filename(key)), page)
+            pages[key] = digest
+            stats['written'] += 1
+
+        removed_ids = {str(pid) for pid in deleted_ids}
+        if prune:
+            removed_ids |= set(pages) - {str(p['id']) for p in products}
+        for key in removed_ids:
+            pages.pop(key, None)
+            path = os.path.join(out_dir, page_filename(key))
+            if os.path.exists(path):
+                os.remove(path)
+                stats['removed'] += 1
+
+        if stats['written'] or stats['removed'] or manifest.get('store_url') != store_url:
+            manifest['store_url'] = store_url
+            _write_file(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2))
+        return stats
+
+
+def landing_page_url(base_url, product_id):
+    """Public URL of a product's page under `base_url` (where the output directory is served)"""
+    return f"{base_url.rstrip('/')}/{page_filename(product_id)}"
+
+
+def landing_pages_status(out_dir=None):
+    """(page_count, store_url) from the manifest"""
+    manifest = _load_manifest(out_dir or landing_pages_dir())
+    return len(manifest['pages']), manifest.get('store_url')
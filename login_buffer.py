@@ -0,0 +1,113 @@
+import atexit
+import sqlite3
+import threading
+import time
+
+# --- WRITE-BEHIND last_login UPDATES ---
+
+
+class LastLoginBuffer:
+    """Buffers last_login timestamps in memory and writes them in batches.
+
+    Logins only touch a dict; a background thread flushes every `flush_interval`
+    seconds, or sooner once `max_pending` users are waiting, with one executemany
+    transaction. Repeat logins by the same user before a flush collapse into one row.
+    """
+
+    def __init__(self, db_path, flush_interval=5.0, max_pending=500):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="last-login-flusher", daemon=True)
+        self.stats = {
+            'flushes': 0,
+            'rows_flushed': 0,
+            'last_flush_at': None,
+            'last_flush_rows': 0,
+            'last_flush_ms': 0.0,
+            'max_lag_seconds': 0.0,
+            'errors': 0,
+        }
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def record(self, user_id, timestamp):
+        """Remember a login; written to the database on the next flush"""
+        with self._lock:
+            self._pending[user_id] = timestamp
+            if self._oldest_pending is None:
+                self._oldest_pending = time.time()
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write all buffered timestamps in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                oldest = self._oldest_pending
+                self._pending = {}
+                self._oldest_pending = None
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    conn.executemany(
+                        "UPDATE users SET last_login = ? WHERE user_id = ?",
+                        [(timestamp, user_id) for user_id, timestamp in batch.items()]
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                # Put the batch back (newer logins win) and retry on the next cycle
+                with self._lock:
+                    for user_id, timestamp in batch.items():
+                        self._pending.setdefault(user_id, timestamp)
+                    if self._oldest_pending is None or oldest < self._oldest_pending:
+                        self._oldest_pending = oldest
+                self.stats['errors'] += 1
+                return 0
+
+            now = time.time()
+            self.stats['flushes'] += 1
+            self.stats['rows_flushed'] += len(batch)
+            self.stats['last_flush_at'] = now
+            self.stats['last_flush_rows'] = len(batch)
+            self.stats['last_flush_ms'] = (time.perf_counter() - start) * 1000
+            self.stats['max_lag_seconds'] = max(self.stats['max_lag_seconds'], now - oldest)
+            return len(batch)
+
+    def metrics(self):
+        """Current buffer size and flush lag alongside the cumulative flush stats"""
+        with self._lock:
+            pending = len(self._pending)
+            lag = time.time() - self._oldest_pending if self._oldest_pending else 0.0
+        return dict(self.stats, pending=pending, current_lag_seconds=lag)
+
+    def close(self):
+        """Stop the background thread and write whatever is still buffered"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
@@ -0,0 +1,233 @@
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from email.message import EmailMessage
+
+# --- ORDER EMAIL OUTBOX ---
+# Emails are written to the outbox in the same transaction as the order and sent
+# later by OutboxWorker, so checkout never waits on the mail server.
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+LEASE_SECONDS = 120
+
+
+def get_smtp_config():
+    """SMTP settings from the environment; None when mail is not configured"""
+    host = os.getenv("SMTP_HOST")
+    if not host:
+        return None
+    return {
+        "host": host,
+        "port": int(os.getenv("SMTP_PORT", "25")),
+        "username": os.getenv("SMTP_USERNAME"),
+        "password": os.getenv("SMTP_PASSWORD"),
+        "sender": os.getenv("SMTP_FROM", "GlamBeauty <orders@glambeauty.com>"),
+        "starttls": os.getenv("SMTP_STARTTLS", "0") == "1",
+    }
+
+
+def init_outbox(db_path):
+    """Create the email outbox table"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id TEXT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            claim_token TEXT,
+            last_error TEXT,
+            created_at TEXT,
+            sent_at TEXT
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON email_outbox(status, next_attempt_at)")
+    conn.commit()
+    conn.close()
+
+
+def order_confirmation_email(order):
+    """Subject and plain-text body of an order confirmation"""
+    lines = [
+        f"Hi {order['customer_name']},",
+        "",
+        f"Thank you for shopping with GlamBeauty! Your order #{order['order_id']} is confirmed.",
+        "",
+        "Items:",
+    ]
+    for item in order['items']:
+        lines.append(f"  - {item['name']} (₹{item['price']})")
+    lines += [
+        "",
+        f"Total: ₹{order['total_amount']}",
+        f"Payment: {order['payment_method']}",
+        f"Delivery address: {order['customer_address']}",
+        "",
+        "💄 GlamBeauty",
+    ]
+    return f"Your GlamBeauty order #{order['order_id']} is confirmed", "\n".join(lines)
+
+
+def enqueue_order_confirmation(cursor, order):
+    """Queue the confirmation email using the caller's cursor, inside its transaction"""
+    subject, body = order_confirmation_email(order)
+    cursor.execute("""
+        INSERT INTO email_outbox (order_id, recipient, subject, body, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (order['order_id'], order['customer_email'], subject, body, time.time(),
+          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before retry number `attempts`: exponential with jitter, capped"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_due_emails(db_path, batch_size):
+    """Lease up to batch_size due emails to this worker; returns (claim_token, [(id, recipient, subject, body, attempts)])"""
+    token = uuid.uuid4().hex
+    now = time.time()
+    conn = sqlite3.connect(db_path, timeout=30)
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    c.execute("""
+        UPDATE email_outbox
+        SET claim_token = ?, next_attempt_at = ?
+        WHERE id IN (
+            SELECT id FROM email_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        )
+    """, (token, now + LEASE_SECONDS, now, batch_size))
+    c.execute("SELECT id, recipient, subject, body, attempts FROM email_outbox WHERE claim_token = ?", (token,))
+    rows = c.fetchall()
+    conn.commit()
+    conn.close()
+    return token, rows
+
+
+def record_results(db_path, claim_token, sent_ids, failures):
+    """Mark sent emails and schedule retries for failures ({id: (attempts, error)}) in one transaction.
+
+    Only rows still leased under `claim_token` change: once a lease has run out
+    and another worker claimed the email, this worker's outcome is dropped.
+    """
+    now = time.time()
+    sent_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(db_path, timeout=30)
+    c = conn.cursor()
+    c.executemany(
+        "UPDATE email_outbox SET status = 'sent', sent_at = ?, claim_token = NULL WHERE id = ? AND claim_token = ?",
+        [(sent_at, email_id, claim_token) for email_id in sent_ids]
+    )
+    retries = []
+    for email_id, (attempts, error) in failures.items():
+        attempts += 1
+        status = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+        retries.append((status, attempts, now + backoff_delay(attempts), error[:500], email_id, claim_token))
+    c.executemany("""
+        UPDATE email_outbox
+        SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, claim_token = NULL
+        WHERE id = ? AND claim_token = ?
+    """, retries)
+    conn.commit()
+    conn.close()
+
+
+def smtp_sender(config):
+    """Return a send_batch(messages) function that delivers a batch over one SMTP connection"""
+    def send_batch(messages):
+        results = {}
+        with smtplib.SMTP(config["host"], config["port"], timeout=30) as smtp:
+            if config["starttls"]:
+                smtp.starttls()
+            if config["username"]:
+                smtp.login(config["username"], config["password"])
+            for email_id, recipient, subject, body in messages:
+                msg = EmailMessage()
+                msg["From"] = config["sender"]
+                msg["To"] = recipient
+                msg["Subject"] = subject
+                msg.set_content(body)
+                try:
+                    smtp.send_message(msg)
+                    results[email_id] = None
+                except Exception as e:
+                    # One bad message (refused, or e.g. an address that cannot be encoded) fails alone
+                    results[email_id] = str(e) or e.__class__.__name__
+        return results
+    return send_batch
+
+
+def outbox_stats(db_path):
+    """Count of outbox emails per status"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")
+    stats = dict(c.fetchall())
+    conn.close()
+    return stats
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox in batches with retries and backoff"""
+
+    def __init__(self, db_path, send_batch, batch_size=50, poll_interval=2.0):
+        super().__init__(name="email-outbox-worker", daemon=True)
+        self.db_path = db_path
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        """Start the next drain now instead of at the next poll"""
+        self._wake.set()
+
+    def stop(self):
+        """Stop the worker after its current batch"""
+        self._stopping.set()
+        self._wake.set()
+
+    def drain_once(self):
+        """Send one batch; returns how many emails were claimed"""
+        claim_token, rows = claim_due_emails(self.db_path, self.batch_size)
+        if not rows:
+            return 0
+        attempts = {row[0]: row[4] for row in rows}
+        try:
+            results = self.send_batch([row[:4] for row in rows])
+        except Exception as e:
+            # Connection-level (or any unexpected) failure: the whole batch is retried later
+            results = {email_id: str(e) or e.__class__.__name__ for email_id in attempts}
+        sent_ids = [email_id for email_id, error in results.items() if error is None]
+        failures = {email_id: (attempts[email_id], error) for email_id, error in results.items() if error is not None}
+        record_results(self.db_path, claim_token, sent_ids, failures)
+        return len(rows)
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = self.drain_once()
+            except Exception as e:
+                # Keep the worker alive; leased rows become due again when their lease runs out
+                self.last_error = str(e) or e.__class__.__name__
+                claimed = 0
+            if claimed < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
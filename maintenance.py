@@ -0,0 +1,231 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from archive import archive_path_for
+from replica import online_backup
+
+# --- DATABASE MAINTENANCE ---
+# Backups, statistics and vacuuming run on a schedule in a background thread.
+# Every run is claimed in maintenance_log first, so with several app replicas
+# on one database a job still only runs once per interval, and the same row
+# records how long the job took and what it did.
+JOBS = ('backup', 'optimize', 'vacuum')
+
+
+def init_maintenance(db_path):
+    """Create the maintenance log table"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_log (
+            run_id INTEGER PRIMARY KEY,
+            job TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration_ms REAL,
+            status TEXT NOT NULL,
+            details_json TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_maintenance_log_job ON maintenance_log(job, started_at)")
+    conn.commit()
+    conn.close()
+
+
+def database_pages(conn):
+    """(page_size, page_count, freelist_count, auto_vacuum mode) of a connection's main database"""
+    return tuple(conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_size", "page_count", "freelist_count", "auto_vacuum"))
+
+
+def maintenance_history(db_path, limit=20):
+    """Most recent job runs, newest first: (job, started_at, duration_ms, status, details)"""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT job, started_at, duration_ms, status, details_json FROM maintenance_log ORDER BY run_id DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+    conn.close()
+    return [(job, started_at, duration_ms, status, json.loads(details or "{}")) for job, started_at, duration_ms, status, details in rows]
+
+
+def list_backups(backup_dir, db_path):
+    """Backup files of a database, newest first"""
+    root = os.path.splitext(os.path.basename(db_path))[0]
+    return sorted(glob.glob(os.path.join(backup_dir, f"{root}-backup-*.db")), reverse=True)
+
+
+class MaintenanceScheduler:
+    """Runs backup, optimize and vacuum jobs when they are due.
+
+    - backup: online copy of the database (and the order archive) with the
+      backup API in `pages_per_step` steps; the newest `keep_backups` sets are kept.
+    - optimize: ANALYZE on the first run, PRAGMA optimize afterwards, with
+      analysis_limit so statistics never scan a whole large table under the write lock.
+    - vacuum: once free pages reach `free_page_ratio` of the file, returns them
+      with incremental_vacuum in `vacuum_step_pages` chunks (a database created
+      before incremental auto-vacuum was enabled gets one full VACUUM to switch).
+    """
+
+    def __init__(self, db_path, backup_dir="backups", backup_interval=6 * 3600, keep_backups=7,
+                 optimize_interval=24 * 3600, vacuum_interval=3600, free_page_ratio=0.2, min_free_pages=256,
+                 pages_per_step=256, step_sleep=0.002, vacuum_step_pages=512, check_interval=60):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep_backups = keep_backups
+        self.intervals = {'backup': backup_interval, 'optimize': optimize_interval, 'vacuum': vacuum_interval}
+        self.free_page_ratio = free_page_ratio
+        self.min_free_pages = min_free_pages
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.vacuum_step_pages = vacuum_step_pages
+        self.check_interval = check_interval
+        self.last_error = None
+        self._job_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+
+    def _claim(self, job, force):
+        """Log a 'running' row for `job` if it is due (or forced); returns its run_id or None"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if not force:
+                due_after = (datetime.now() - timedelta(seconds=self.intervals[job])).strftime("%Y-%m-%d %H:%M:%S")
+                recent = conn.execute(
+                    "SELECT 1 FROM maintenance_log WHERE job = ? AND started_at > ? AND status != 'failed' LIMIT 1",
+                    (job, due_after)
+                ).fetchone()
+                if recent:
+                    conn.rollback()
+                    return None
+            cursor = conn.execute(
+                "INSERT INTO maintenance_log (job, started_at, status) VALUES (?, ?, 'running')",
+                (job, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def run_job(self, job, force=False):
+        """Run one job if it is due (always with force=True); returns its report or None if skipped"""
+        with self._job_lock:
+            run_id = self._claim(job, force)
+            if run_id is None:
+                return None
+            jobs = {'backup': self.backup, 'optimize': self.optimize, 'vacuum': lambda: self.vacuum(force)}
+            start = time.perf_counter()
+            try:
+                details = jobs[job]()
+                status = details.pop('status', 'ok')
+            except (sqlite3.Error, OSError) as e:
+                details, status = {'error': str(e)}, 'failed'
+                self.last_error = f"{job}: {e}"
+            duration_ms = (time.perf_counter() - start) * 1000
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute(
+                "UPDATE maintenance_log SET duration_ms = ?, status = ?, details_json = ? WHERE run_id = ?",
+                (duration_ms, status, json.dumps(details), run_id)
+            )
+            conn.commit()
+            conn.close()
+            return dict(details, job=job, status=status, duration_ms=duration_ms)
+
+    def run_due(self):
+        """Run every job that is due; returns the reports of those that ran"""
+        return [report for report in (self.run_job(job) for job in JOBS) if report]
+
+    def backup(self):
+        """Back up the database and the archive into backup_dir, then prune old sets"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        details = {'files': [], 'pages': 0, 'bytes': 0, 'restarts': 0, 'modes': []}
+        sources = [self.db_path]
+        if os.path.exists(archive_path_for(self.db_path)):
+            sources.append(archive_path_for(self.db_path))
+        for source in sources:
+            root = os.path.splitext(os.path.basename(source))[0]
+            dest = os.path.join(self.backup_dir, f"{root}-backup-{stamp}.db")
+            copy = online_backup(source, dest + ".tmp", self.pages_per_step, self.step_sleep)
+            os.replace(dest + ".tmp", dest)
+            details['files'].append(os.path.basename(dest))
+            details['pages'] += copy['pages']
+            details['bytes'] += os.path.getsize(dest)
+            details['restarts'] += copy['restarts']
+            details['modes'].append(copy['mode'])
+
+        pruned = 0
+        for source in sources:
+            for old in list_backups(self.backup_dir, source)[self.keep_backups:]:
+                os.remove(old)
+                pruned += 1
+        details['pruned'] = pruned
+        return details
+
+    def optimize(self):
+        """Refresh query planner statistics"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA analysis_limit=1000")
+            has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+            if has_stats:
+                conn.execute("PRAGMA optimize")
+                statement = "PRAGMA optimize"
+            else:
+                conn.execute("ANALYZE")
+                statement = "ANALYZE"
+            conn.commit()
+            tables = conn.execute("SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1").fetchone()[0]
+        finally:
+            conn.close()
+        return {'statement': statement, 'tables_with_stats': tables}
+
+    def vacuum(self, force=False):
+        """Return free pages to the file system once they pass the threshold"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            page_size, page_count, free_before, auto_vacuum = database_pages(conn)
+            details = {
+                'free_pages_before': free_before,
+                'free_ratio_before': round(free_before / page_count, 3) if page_count else 0.0,
+                'size_before': page_size * page_count,
+            }
+            if not force and (free_before < self.min_free_pages or details['free_ratio_before'] < self.free_page_ratio):
+                return dict(details, status='skipped')
+
+            if auto_vacuum != 2:
+                # auto_vacuum can only be switched by rebuilding the file once
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+                details['mode'] = "full (switched to incremental)"
+            else:
+                # Small chunks, each its own short write transaction
+                while conn.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+                    conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_step_pages})").fetchall()
+                    time.sleep(self.step_sleep)
+                details['mode'] = "incremental"
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            page_size, page_count, free_after, _ = database_pages(conn)
+        finally:
+            conn.close()
+        details['free_pages_after'] = free_after
+        details['size_after'] = page_size * page_count
+        details['bytes_reclaimed'] = details['size_before'] - details['size_after']
+        return details
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.run_due()
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+            self._stopping.wait(self.check_interval)
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+from archive import archive_path_for
+
+# --- CUSTOMER ORDER HISTORY ---
+# Pages are keyset-paginated on (date, order_id) through the (user_id, date)
+# indexes, and only carry what the order list shows. Addresses and items are
+# read one order at a time, when the customer opens it.
+SUMMARY_COLUMNS = ["order_id", "date", "total", "status", "payment_method"]
+
+
+def init_order_history_index(db_path):
+    """Create the index behind per-customer order pages"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_user_date ON orders(user_id, date, order_id)")
+    conn.commit()
+    conn.close()
+
+
+def _summary_page(conn, user_id, cursor, limit):
+    params = [user_id]
+    keyset = ""
+    if cursor:
+        keyset = "AND (date < ? OR (date = ? AND order_id < ?))"
+        params += [cursor[0], cursor[0], cursor[1]]
+    return conn.execute(f"""
+        SELECT {', '.join(SUMMARY_COLUMNS)} FROM orders
+        WHERE user_id = ? {keyset}
+        ORDER BY date DESC, order_id DESC
+        LIMIT ?
+    """, params + [limit]).fetchall()
+
+
+def fetch_order_summaries(db_path, user_id, cursor=None, limit=10, include_archived=False, archive_path=None):
+    """One page of a customer's orders, newest first; returns (rows, next_cursor).
+
+    `cursor` is the (date, order_id) of the last row of the previous page;
+    next_cursor is None on the last page. With `include_archived`, archived
+    orders continue the same sequence after the recent ones.
+    """
+    conn = sqlite3.connect(db_path)
+    rows = _summary_page(conn, user_id, cursor, limit + 1)
+    conn.close()
+
+    archive_path = archive_path or archive_path_for(db_path)
+    if include_archived and os.path.exists(archive_path):
+        conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+        rows += _summary_page(conn, user_id, cursor, limit + 1)
+        conn.close()
+        rows.sort(key=lambda row: (row[1] or "", row[0]), reverse=True)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][1], rows[-1][0])
+    return rows, next_cursor
+
+
+def count_user_orders(db_path, user_id, include_archived=False, archive_path=None):
+    """Number of orders a customer has (an index-only count)"""
+    conn = sqlite3.connect(db_path)
+    total = conn.execute("SELECT COUNT(*) FROM orders WHERE user_id = ?", (user_id,)).fetchone()[0]
+    conn.close()
+    archive_path = archive_path or archive_path_for(db_path)
+    if include_archived and os.path.exists(archive_path):
+        conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+        total += conn.execute("SELECT COUNT(*) FROM orders WHERE user_id = ?", (user_id,)).fetchone()[0]
+        conn.close()
+    return total
+
+
+def fetch_order_details(db_path, order_id, user_id, archive_path=None):
+    """(address, phone, items_json) of one of the customer's orders, from the main database or the archive"""
+    query = "SELECT address, phone, items_json FROM orders WHERE order_id = ? AND user_id = ?"
+    conn = sqlite3.connect(db_path)
+    row = conn.execute(query, (order_id, user_id)).fetchone()
+    conn.close()
+    archive_path = archive_path or archive_path_for(db_path)
+    if row is None and os.path.exists(archive_path):
+        conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+        row = conn.execute(query, (order_id, user_id)).fetchone()
+        conn.close()
+    return row
@@ -0,0 +1,92 @@
+import os
+import re
+import sqlite3
+from archive import ORDER_COLUMNS, archive_path_for, attach_archive
+from store import normalize_phone, format_order_id
+from user_admin import _like_prefix
+
+# --- ADMIN ORDER LOOKUP ---
+# The phone index is on the same expression the lookup query uses, so a number
+# typed with spaces or dashes still resolves through the index.
+PHONE_KEY = "REPLACE(REPLACE(phone, ' ', ''), '-', '')"
+# "ORD42", "ord0042" and a bare "42" all mean ORD0042; bare runs of six or more digits are phone numbers
+ORDER_ID_PATTERN = re.compile(r"ORD(\d+)|(\d{1,5})", re.IGNORECASE)
+PHONE_PATTERN = re.compile(r"\+?\d{6,15}")
+
+
+def _create_indexes(conn, schema, prefix):
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}{prefix}_email_nocase ON orders(email COLLATE NOCASE)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}{prefix}_phone_key ON orders({PHONE_KEY})")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}{prefix}_customer_name_nocase ON orders(customer_name COLLATE NOCASE)")
+
+
+def init_order_indexes(db_path, archive_path=None):
+    """Create the lookup indexes on the orders table and on the archive"""
+    conn = sqlite3.connect(db_path)
+    _create_indexes(conn, "", "idx_orders")
+    attach_archive(conn, archive_path or archive_path_for(db_path))
+    _create_indexes(conn, "archive.", "idx_archive_orders")
+    conn.commit()
+    conn.close()
+
+
+def phone_keys(phone):
+    """Normalized forms of a phone number that refer to the same customer (with and without +91)"""
+    key = normalize_phone(phone)
+    if len(key) == 13 and key.startswith("+91"):
+        return [key, key[3:]]
+    if len(key) == 10:
+        return [key, "+91" + key]
+    return [key]
+
+
+def classify_lookup(text):
+    """(kind, sql condition, params, order by) for a search box entry.
+
+    ORD0042 is an exact order id (also typed as ord42 or 42, padded to the
+    stored width), anything with an @ an exact email, a run of
+    digits (spaces, dashes and a leading + allowed) a phone number, and
+    everything else a customer name prefix. Name matches come back in name
+    order, which the index already has, so a short prefix stops at the limit
+    instead of sorting every match by date.
+    """
+    text = text.strip()
+    order_id = ORDER_ID_PATTERN.fullmatch(text)
+    if order_id:
+        return "order id", "order_id = ?", [format_order_id(int(order_id.group(1) or order_id.group(2)))], "date DESC"
+    if "@" in text:
+        return "email", "email = ? COLLATE NOCASE", [text], "date DESC"
+    if PHONE_PATTERN.fullmatch(normalize_phone(text)):
+        keys = phone_keys(text)
+        return "phone", f"{PHONE_KEY} IN ({','.join('?' * len(keys))})", keys, "date DESC"
+    return "name", "customer_name LIKE ? ESCAPE '\\'", [_like_prefix(text)], "customer_name COLLATE NOCASE"
+
+
+def find_orders(db_path, text, limit=50, include_archived=False, archive_path=None):
+    """Orders matching a search box entry, newest first (by name for names); returns (kind, rows).
+
+    Rows are the ORDER_COLUMNS followed by an archived flag (0 or 1). Every kind of lookup is an index seek (or a prefix range scan for names),
+    on the archive too when `include_archived` is set.
+    """
+    if not text.strip():
+        return None, []
+    kind, condition, params, order_by = classify_lookup(text)
+    columns = ", ".join(ORDER_COLUMNS)
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute(f"SELECT {columns}, 0 FROM orders WHERE {condition} ORDER BY {order_by} LIMIT ?", params + [limit])
+    rows = c.fetchall()
+    conn.close()
+
+    archive_path = archive_path or archive_path_for(db_path)
+    if include_archived and os.path.exists(archive_path):
+        conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+        c = conn.cursor()
+        c.execute(f"SELECT {columns}, 1 FROM orders WHERE {condition} ORDER BY {order_by} LIMIT ?", params + [limit])
+        rows += c.fetchall()
+        if kind == "name":
+            rows = sorted(rows, key=lambda row: (row[2] or "").lower())[:limit]
+        else:
+            rows = sorted(rows, key=lambda row: row[1] or "", reverse=True)[:limit]
+        conn.close()
+    return kind, rows
@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from archive import archive_path_for
+
+# --- FREQUENTLY BOUGHT TOGETHER ---
+
+
+def _order_product_ids(items_json):
+    try:
+        items = json.loads(items_json or "[]")
+    except ValueError:
+        return set()
+    return {item['id'] for item in items if isinstance(item, dict) and 'id' in item}
+
+
+class CoOccurrenceIndex:
+    """Sparse product x product co-occurrence counts (dict-of-dicts, like a DOK matrix).
+
+    Built once by streaming every order (archive included), then kept current
+    with catch_up(), which only reads orders added since the last pass. Each
+    product's top-K list is cached and recomputed only after one of its
+    orders arrives, so lookups are a dict read.
+    """
+
+    def __init__(self, db_path, top_k=8):
+        self.db_path = db_path
+        self.top_k = top_k
+        self._pairs = {}
+        self._top = {}
+        self._last_rowid = 0
+        self._last_catch_up = 0.0
+        self._lock = threading.Lock()
+        self.orders_seen = 0
+
+    def _add(self, product_ids):
+        for a in product_ids:
+            row = self._pairs.setdefault(a, {})
+            for b in product_ids:
+                if a != b:
+                    row[b] = row.get(b, 0) + 1
+            self._top.pop(a, None)
+        self.orders_seen += 1
+
+    def build(self):
+        """Stream all orders (archived ones first) into a fresh index"""
+        with self._lock:
+            self._pairs = {}
+            self._top = {}
+            self._last_rowid = 0
+            self.orders_seen = 0
+            archive_path = archive_path_for(self.db_path)
+            if os.path.exists(archive_path):
+                conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+                for (items_json,) in conn.execute("SELECT items_json FROM orders"):
+                    self._add(_order_product_ids(items_json))
+                conn.close()
+            self._catch_up()
+        return self
+
+    def _catch_up(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        added = 0
+        for rowid, items_json in conn.execute(
+            "SELECT rowid, items_json FROM orders WHERE rowid > ? ORDER BY rowid", (self._last_rowid,)
+        ):
+            self._add(_order_product_ids(items_json))
+            self._last_rowid = rowid
+            added += 1
+        conn.close()
+        self._last_catch_up = time.time()
+        return added
+
+    def catch_up(self, min_interval=0):
+        """Fold in orders placed since the last pass (by any process); returns how many.
+
+        With `min_interval`, does nothing if the last pass was more recent than that.
+        """
+        if min_interval and time.time() - self._last_catch_up < min_interval:
+            return 0
+        with self._lock:
+            return self._catch_up()
+
+    def related(self, product_id, k=None):
+        """[(product_id, times_bought_together)] strongest first"""
+        k = k or self.top_k
+        top = self._top.get(product_id)
+        if top is None:
+            with self._lock:
+                row = self._pairs.get(product_id, {})
+                top = sorted(row.items(), key=lambda pair: (-pair[1], pair[0]))[:self.top_k * 2]
+                self._top[product_id] = top
+        return top[:k]
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'orders': self.orders_seen,
+                'products': len(self._pairs),
+                'pairs': sum(len(row) for row in self._pairs.values()),
+            }
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import threading
+import time
+
+# --- READ-ONLY SNAPSHOT FOR REPORTS ---
+
+
+class _BackupKeepsRestarting(Exception):
+    pass
+
+
+def online_backup(db_path, dest_path, pages_per_step=256, step_sleep=0.002, max_restarts=3):
+    """Copy a live database into `dest_path` with the online backup API, a few pages at a time.
+    
+    The source is only read-locked for one step at a time, so writers keep
+    going. Returns {'mode', 'pages', 'restarts'}.
+    """
+    state = {'remaining': None, 'restarts': 0, 'pages': 0}
+
+    def progress(status, remaining, total):
+        state['pages'] = total
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > max_restarts:
+                raise _BackupKeepsRestarting()
+        state['remaining'] = remaining
+
+    src = sqlite3.connect(db_path, timeout=30)
+    try:
+        dst = sqlite3.connect(dest_path)
+        try:
+            try:
+                src.backup(dst, pages=pages_per_step, sleep=step_sleep, progress=progress)
+                mode = "stepped"
+            except _BackupKeepsRestarting:
+                # Every commit on the live database restarts a stepped backup, so under
+                # constant checkout traffic it may never finish. Copy in one step instead;
+                # in WAL mode that single read transaction does not block writers.
+                src.backup(dst)
+                mode = "single-step"
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    return {'mode': mode, 'pages': state['pages'], 'restarts': state['restarts']}
+
+
+def snapshot_path_for(db_path):
+    """Default snapshot file next to the main database, e.g. glambeauty-snapshot.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}-snapshot{ext or '.db'}"
+
+
+class SnapshotReplica:
+    """Periodically refreshed read-only copy of the database for heavy reads.
+
+    Each refresh copies the live database with SQLite's online backup API,
+    `pages_per_step` pages at a time with a short sleep between steps, so the
+    source is only read-locked briefly and writers keep going. The copy is
+    built in a temp file and swapped in atomically; open readers keep the
+    previous snapshot until they close.
+    """
+
+    def __init__(self, db_path, snapshot_path=None, refresh_interval=60, pages_per_step=256, step_sleep=0.002, max_restarts=3):
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path or snapshot_path_for(db_path)
+        self.refresh_interval = refresh_interval
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.max_restarts = max_restarts
+        self.last_mode = None
+        self.refreshed_at = None
+        self.last_refresh_ms = 0.0
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+
+    def start(self):
+        if os.path.exists(self.snapshot_path):
+            self.refreshed_at = os.path.getmtime(self.snapshot_path)
+        self._thread.start()
+        return self
+
+    def refresh(self):
+        """Copy the live database into a fresh snapshot"""
+        with self._refresh_lock:
+            tmp_path = self.snapshot_path + ".tmp"
+            start = time.perf_counter()
+            started_at = time.time()
+            try:
+                copy = online_backup(self.db_path, tmp_path, self.pages_per_step, self.step_sleep, self.max_restarts)
+                self.last_mode = copy['mode']
+                os.replace(tmp_path, self.snapshot_path)
+            except (sqlite3.Error, OSError) as e:
+                self.last_error = str(e)
+                return False
+            self.refreshed_at = started_at
+            self.last_refresh_ms = (time.perf_counter() - start) * 1000
+            self.last_error = None
+            return True
+
+    def request_refresh(self):
+        """Ask the background thread to refresh now"""
+        self._wake.set()
+
+    def connect(self):
+        """Read-only connection to the snapshot (the live database until a snapshot exists)"""
+        if self.refreshed_at is None or not os.path.exists(self.snapshot_path):
+            return sqlite3.connect(self.db_path)
+        return sqlite3.connect(f"file:{self.snapshot_path}?mode=ro", uri=True)
+
+    def staleness(self):
+        """Seconds since the snapshot was taken, or None without a snapshot"""
+        if self.refreshed_at is None:
+            return None
+        return time.time() - self.refreshed_at
+
+    def _run(self):
+        while True:
+            self.refresh()
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
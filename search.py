@@ -0,0 +1,146 @@
+import re
+import sqlite3
+
+# --- PRODUCT SEARCH (SQLite FTS5) ---
+SEARCH_TABLE = "product_search"
+
+# Column weights for bm25(): name matches rank above category, category above description
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Above this many matches bm25 ranking costs more than it is worth (a one or two
+# letter prefix matches most of the catalog), so results fall back to catalog order
+RANKED_MATCH_LIMIT = 5000
+
+
+def init_search_index(db_path):
+    """Create the FTS5 product search table if it does not exist"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            product_id UNINDEXED,
+            name,
+            category,
+            description,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def _search_row(product):
+    return (product['id'], product.get('name', ''), product.get('category', ''), product.get('description', ''))
+
+
+def rebuild_search_index(db_path, products):
+    """Rebuild the whole search index from the product catalog"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute(f"DELETE FROM {SEARCH_TABLE}")
+    c.executemany(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, product_id, name, category, description) VALUES (?, ?, ?, ?, ?)",
+        [(p['id'],) + _search_row(p) for p in products]
+    )
+    c.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+
+def ensure_search_index(db_path, products):
+    """Rebuild the search index only when it is out of step with the catalog.
+
+    The indexed text is compared with the catalog's, not just the row count, so
+    a rename, or a delete and an add while the app was down, is picked up too.
+    Stock and price are not indexed and do not trigger a rebuild. Returns
+    True when the index was rebuilt.
+    """
+    expected = sorted((p['id'],) + _search_row(p)[1:] for p in products)
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute(f"SELECT rowid, name, category, description FROM {SEARCH_TABLE} ORDER BY rowid")
+    indexed = c.fetchall()
+    conn.close()
+    if indexed != expected:
+        rebuild_search_index(db_path, products)
+        return True
+    return False
+
+
+def apply_search_changes(db_path, upserted, deleted_ids):
+    """Upsert and delete index entries in a single transaction"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    stale_ids = [(p['id'],) for p in upserted] + [(pid,) for pid in deleted_ids]
+    c.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = ?", stale_ids)
+    c.executemany(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, product_id, name, category, description) VALUES (?, ?, ?, ?, ?)",
+        [(p['id'],) + _search_row(p) for p in upserted]
+    )
+    conn.commit()
+    conn.close()
+
+
+def index_products(db_path, products):
+    """Insert or replace the index entries of the given products"""
+    apply_search_changes(db_path, products, [])
+
+
+def index_product(db_path, product):
+    """Insert or replace a single product in the search index"""
+    index_products(db_path, [product])
+
+
+def remove_from_search_index(db_path, product_ids):
+    """Remove products from the search index"""
+    apply_search_changes(db_path, [], product_ids)
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query, e.g. 'red lip' -> '"red" "lip"*'
+
+    Only the last term is prefix-matched, since that is the one still being typed,
+    and only once it has two characters (the shortest prefix the index covers).
+    """
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= 2:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_products(db_path, text, page=1, page_size=12):
+    """Return (product_ids, total_matches) for one page of ranked search results"""
+    match = build_match_query(text)
+    if not match:
+        return [], 0
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    try:
+        c.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?", (match,))
+        total = c.fetchone()[0]
+
+        offset = max(0, page - 1) * page_size
+        if total <= RANKED_MATCH_LIMIT:
+            c.execute(f"""
+                SELECT rowid FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH ?
+                ORDER BY bm25({SEARCH_TABLE}, 0.0, ?, ?, ?)
+                LIMIT ? OFFSET ?
+            """, (match,) + SEARCH_WEIGHTS + (page_size, offset))
+        else:
+            c.execute(f"""
+                SELECT rowid FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH ?
+                ORDER BY rowid
+                LIMIT ? OFFSET ?
+            """, (match, page_size, offset))
+        product_ids = [row[0] for row in c.fetchall()]
+    except sqlite3.OperationalError:
+        product_ids, total = [], 0
+    conn.close()
+    return product_ids, total
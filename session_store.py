@@ -0,0 +1,227 @@
+import atexit
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# --- PERSISTENT SESSIONS & CARTS ---
+
+
+def init_session_store(db_path):
+    """Create the sessions table and the signing secret shared by every replica"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            cart_json TEXT NOT NULL DEFAULT '[]',
+            updated_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+    c.execute("CREATE TABLE IF NOT EXISTS app_secrets (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    c.execute("INSERT OR IGNORE INTO app_secrets (name, value) VALUES ('session_signing_key', ?)", (secrets.token_hex(32),))
+    conn.commit()
+    conn.close()
+
+
+def load_signing_key(db_path):
+    """SESSION_SECRET from the environment, else the key generated in the database"""
+    if os.getenv("SESSION_SECRET"):
+        return os.getenv("SESSION_SECRET").encode()
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT value FROM app_secrets WHERE name = 'session_signing_key'")
+    key = c.fetchone()[0]
+    conn.close()
+    return key.encode()
+
+
+class SessionStore:
+    """Sessions and carts kept in SQLite so any app replica can pick them up.
+
+    Clients hold a signed token "<session_id>.<hmac>"; tokens that fail the
+    signature check are ignored. Saves only touch an in-memory dict and a
+    background thread writes them every `flush_interval` seconds with one
+    executemany upsert, so rapid cart changes collapse into a single row write.
+    The same thread deletes sessions idle for longer than `ttl` seconds.
+    """
+
+    def __init__(self, db_path, signing_key, ttl=7 * 24 * 3600, flush_interval=2.0, purge_interval=600):
+        self.db_path = db_path
+        self.signing_key = signing_key
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self._pending = {}
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._last_purge = 0.0
+        self._thread = threading.Thread(target=self._run, name="session-store-flusher", daemon=True)
+        self.stats = {
+            'loads': 0,
+            'saves': 0,
+            'rows_flushed': 0,
+            'flushes': 0,
+            'purged': 0,
+            'bad_tokens': 0,
+            'errors': 0,
+        }
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def _sign(self, session_id):
+        return hmac.new(self.signing_key, session_id.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def new_token(self):
+        """Fresh signed token for a new session"""
+        session_id = secrets.token_urlsafe(18)
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def session_id_from_token(self, token):
+        """The session id inside a token, or None when the signature does not match"""
+        session_id, _, signature = (token or "").partition(".")
+        if session_id and signature and hmac.compare_digest(signature, self._sign(session_id)):
+            return session_id
+        self.stats['bad_tokens'] += 1
+        return None
+
+    def load(self, token):
+        """(user_id, cart_product_ids) for a token, or None if it is invalid, unknown or expired"""
+        session_id = self.session_id_from_token(token)
+        if not session_id:
+            return None
+        with self._lock:
+            # A batch being written is no longer pending but not yet readable from the table
+            pending = self._pending.get(session_id) or self._flushing.get(session_id)
+        self.stats['loads'] += 1
+        if pending:
+            return pending[0], json.loads(pending[1])
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        c = conn.cursor()
+        c.execute("SELECT user_id, cart_json FROM sessions WHERE session_id = ? AND expires_at > ?", (session_id, time.time()))
+        row = c.fetchone()
+        conn.close()
+        if not row:
+            return None
+        return row[0], json.loads(row[1])
+
+    def save(self, token, user_id, cart_product_ids, flush=False):
+        """Queue the session's state for the next flush (or write it now with flush=True)"""
+        session_id = self.session_id_from_token(token)
+        if not session_id:
+            return
+        with self._lock:
+            self._pending[session_id] = (user_id, json.dumps(cart_product_ids), time.time())
+            self.stats['saves'] += 1
+        if flush:
+            self.flush()
+
+    def delete(self, token):
+        """Forget a session right away"""
+        session_id = self.session_id_from_token(token)
+        if not session_id:
+            return
+        with self._lock:
+            self._pending.pop(session_id, None)
+            self._flushing.pop(session_id, None)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.commit()
+        conn.close()
+
+    def flush(self):
+        """Write all queued sessions in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+                self._flushing = batch
+            if not batch:
+                return 0
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30)
+                try:
+                    conn.executemany("""
+                        INSERT INTO sessions (session_id, user_id, cart_json, updated_at, expires_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(session_id) DO UPDATE SET
+                            user_id = excluded.user_id,
+                            cart_json = excluded.cart_json,
+                            updated_at = excluded.updated_at,
+                            expires_at = excluded.expires_at
+                    """, [
+                        (session_id, user_id, cart_json, updated_at, updated_at + self.ttl)
+                        for session_id, (user_id, cart_json, updated_at) in batch.items()
+                    ])
+                    conn.commit()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                # Keep anything saved since, retry the rest on the next cycle
+                with self._lock:
+                    for session_id, state in batch.items():
+                        self._pending.setdefault(session_id, state)
+                    self._flushing = {}
+                self.stats['errors'] += 1
+                return 0
+            with self._lock:
+                self._flushing = {}
+            self.stats['flushes'] += 1
+            self.stats['rows_flushed'] += len(batch)
+            return len(batch)
+
+    def purge_expired(self):
+        """Delete sessions past their TTL; returns how many were removed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        c = conn.cursor()
+        c.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        purged = c.rowcount
+        conn.commit()
+        conn.close()
+        self._last_purge = time.time()
+        self.stats['purged'] += purged
+        return purged
+
+    def metrics(self):
+        """Pending writes and stored session count alongside the cumulative stats"""
+        with self._lock:
+            pending = len(self._pending)
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),))
+        stored = c.fetchone()[0]
+        conn.close()
+        return dict(self.stats, pending=pending, stored=stored)
+
+    def close(self):
+        """Stop the background thread and write whatever is still queued"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if time.time() - self._last_purge >= self.purge_interval:
+                try:
+                    self.purge_expired()
+                except sqlite3.Error:
+                    self.stats['errors'] += 1
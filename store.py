@@ -0,0 +1,545 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from collections import Counter
+from datetime import datetime
+from mailer import enqueue_order_confirmation
+from inventory import record_movements, open_stock, stock_levels, take_snapshots
+
+# --- SHARED DATA LAYER (used by app.py and api.py, no Streamlit) ---
+def safe_json_loads(s):
+    """Safely parse a JSON string. Returns {} if invalid or empty."""
+    try:
+        if not s or not s.strip():
+            return {}
+        return json.loads(s)
+    except Exception:
+        return {}
+
+# --- DATABASE & FILE PATHS ---
+DB_PATH = "glambeauty.db"
+PRODUCTS_JSON = "products.json"
+THEME_JSON = "theme.json"
+
+# Check if running on Streamlit Cloud
+def is_streamlit_cloud():
+    """Check if app is running on Streamlit Cloud"""
+    return os.getenv("STREAMLIT_SHARING_MODE") is not None or os.getenv("STREAMLIT_RUNTIME_ENV") == "cloud"
+
+# Use secrets for database configuration on cloud
+def get_db_path():
+    """Get database path - use secrets on cloud"""
+    if is_streamlit_cloud():
+        # On Streamlit Cloud, ensure data directory exists
+        data_dir = os.path.join(os.path.expanduser("~"), ".streamlit_data")
+        os.makedirs(data_dir, exist_ok=True)
+        return os.path.join(data_dir, "glambeauty.db")
+    return DB_PATH
+
+def get_products_path():
+    """Get products JSON path"""
+    if is_streamlit_cloud():
+        data_dir = os.path.join(os.path.expanduser("~"), ".streamlit_data")
+        os.makedirs(data_dir, exist_ok=True)
+        return os.path.join(data_dir, "products.json")
+    return PRODUCTS_JSON
+
+# --- DATABASE INITIALIZATION ---
+def init_db(db_path=None):
+    """Initialize SQLite database and create tables"""
+    db_path = db_path or get_db_path()
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    # Only takes effect on a new, empty database, and must come before journal_mode
+    # (switching to WAL writes the header); existing ones are switched by the first vacuum job
+    c.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets report snapshots and other readers run alongside checkout writes
+    c.execute("PRAGMA journal_mode=WAL")
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id TEXT PRIMARY KEY,
+            date TEXT,
+            customer_name TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            items_json TEXT,
+            total INTEGER,
+            payment_method TEXT,
+            payment_details_json TEXT,
+            status TEXT,
+            user_id INTEGER
+        )
+    """)
+    
+    c.execute("PRAGMA table_info(orders)")
+    columns = [column[1] for column in c.fetchall()]
+    
+    if 'payment_method' not in columns:
+        try:
+            c.execute("ALTER TABLE orders ADD COLUMN payment_method TEXT DEFAULT 'Cash on Delivery'")
+            conn.commit()
+        except sqlite3.OperationalError:
+            pass
+    
+    if 'payment_details_json' not in columns:
+        try:
+            c.execute("ALTER TABLE orders ADD COLUMN payment_details_json TEXT DEFAULT '{}'")
+            conn.commit()
+        except sqlite3.OperationalError:
+            pass
+    
+    if 'user_id' not in columns:
+        try:
+            c.execute("ALTER TABLE orders ADD COLUMN user_id INTEGER")
+            conn.commit()
+        except sqlite3.OperationalError:
+            pass
+    
+    c.execute("CREATE INDEX IF NOT EXISTS idx_orders_date ON orders(date)")
+    
+    # Order numbers come from a counter rather than COUNT(*), which drops once old orders are archived
+    c.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    c.execute("INSERT OR IGNORE INTO counters (name, value) SELECT 'order_number', COUNT(*) FROM orders")
+    
+    conn.commit()
+    conn.close()
+
+def init_users_db(db_path=None):
+    """Initialize users table in database"""
+    db_path = db_path or get_db_path()
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT,
+            phone TEXT,
+            address TEXT,
+            created_at TEXT,
+            last_login TEXT,
+            is_admin INTEGER DEFAULT 0
+        )
+    """)
+    
+    # Create default admin if no users exist
+    c.execute("SELECT COUNT(*) FROM users")
+    user_count = c.fetchone()[0]
+    
+    if user_count == 0 and is_streamlit_cloud():
+        # Create default admin account
+        password_hash = hash_password("Admin@123")
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        c.execute("""
+            INSERT INTO users (username, email, password_hash, full_name, phone, address, created_at, is_admin)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        """, ("admin", "admin@glambeauty.com", password_hash, "Admin User", "+91 9999999999", "Admin Office", created_at))
+        
+        conn.commit()
+    
+    conn.commit()
+    conn.close()
+
+def hash_password(password):
+    """Hash password using SHA-256"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def validate_email(email):
+    """Validate email format"""
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+def normalize_phone(phone):
+    """Phone number without spaces and dashes"""
+    return phone.replace(" ", "").replace("-", "")
+
+def validate_phone(phone):
+    """Validate phone number format"""
+    clean_phone = normalize_phone(phone)
+    pattern = r'^(\+91)?[6-9]\d{9}$'
+    return re.match(pattern, clean_phone) is not None
+
+def validate_name(name):
+    """Validate name format"""
+    if len(name) < 2:
+        return False
+    pattern = r'^[a-zA-Z\s]+$'
+    return re.match(pattern, name) is not None
+
+def validate_address(address):
+    """Validate address format"""
+    if len(address) < 10:
+        return False
+    return True
+
+def validate_password(password):
+    """Validate password strength"""
+    if len(password) < 8:
+        return False, "Password must be at least 8 characters long"
+    if not re.search(r'[A-Z]', password):
+        return False, "Password must contain at least one uppercase letter"
+    if not re.search(r'[a-z]', password):
+        return False, "Password must contain at least one lowercase letter"
+    if not re.search(r'\d', password):
+        return False, "Password must contain at least one digit"
+    return True, "Password is strong"
+
+def register_user(username, email, password, full_name, phone, address):
+    """Register a new user"""
+    try:
+        db_path = get_db_path()
+        conn = sqlite3.connect(db_path)
+        c = conn.cursor()
+        
+        password_hash = hash_password(password)
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        c.execute("""
+            INSERT INTO users (username, email, password_hash, full_name, phone, address, created_at, is_admin)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        """, (username, email, password_hash, full_name, phone, address, created_at))
+        
+        conn.commit()
+        conn.close()
+        return True, "Registration successful!"
+    except sqlite3.IntegrityError as e:
+        # Close right away: the failed INSERT leaves a write transaction open on this connection
+        conn.close()
+        if 'username' in str(e):
+            return False, "Username already exists"
+        elif 'email' in str(e):
+            return False, "Email already registered"
+        return False, "Registration failed"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+
+def user_from_row(row):
+    """User dict as used by the app and the API"""
+    return {
+        'user_id': row[0],
+        'username': row[1],
+        'email': row[2],
+        'full_name': row[3],
+        'phone': row[4],
+        'address': row[5],
+        'is_admin': row[6]
+    }
+
+def authenticate_user(conn, username_or_email, password):
+    """Check credentials on the given connection; returns the user dict or None"""
+    c = conn.cursor()
+    c.execute("""
+        SELECT user_id, username, email, full_name, phone, address, is_admin
+        FROM users 
+        WHERE (username = ? OR email = ?) AND password_hash = ?
+    """, (username_or_email, username_or_email, hash_password(password)))
+    user = c.fetchone()
+    return user_from_row(user) if user else None
+
+def get_user_by_id(conn, user_id):
+    """Load a user's profile on the given connection, shaped like the login result"""
+    c = conn.cursor()
+    c.execute("""
+        SELECT user_id, username, email, full_name, phone, address, is_admin
+        FROM users WHERE user_id = ?
+    """, (user_id,))
+    user = c.fetchone()
+    return user_from_row(user) if user else None
+
+def update_user_profile(user_id, full_name, phone, address):
+    """Update user profile information"""
+    try:
+        db_path = get_db_path()
+        conn = sqlite3.connect(db_path)
+        c = conn.cursor()
+        
+        c.execute("""
+            UPDATE users 
+            SET full_name = ?, phone = ?, address = ?
+            WHERE user_id = ?
+        """, (full_name, phone, address, user_id))
+        
+        conn.commit()
+        conn.close()
+        return True, "Profile updated successfully!"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+
+def change_password(user_id, old_password, new_password):
+    """Change user password"""
+    try:
+        db_path = get_db_path()
+        conn = sqlite3.connect(db_path)
+        c = conn.cursor()
+        
+        old_hash = hash_password(old_password)
+        
+        c.execute("SELECT password_hash FROM users WHERE user_id = ?", (user_id,))
+        result = c.fetchone()
+        
+        if not result or result[0] != old_hash:
+            conn.close()
+            return False, "Current password is incorrect"
+        
+        new_hash = hash_password(new_password)
+        c.execute("UPDATE users SET password_hash = ? WHERE user_id = ?", (new_hash, user_id))
+        
+        conn.commit()
+        conn.close()
+        return True, "Password changed successfully!"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+
+def insert_order(c, order):
+    """Insert an order and queue its confirmation email using the caller's cursor"""
+    items_json = json.dumps(order['items'])
+    payment_details_json = json.dumps(order.get('payment_details', {}))
+    
+    c.execute("""
+        INSERT INTO orders (
+            order_id, date, customer_name, email, 
+            phone, address, items_json, total, payment_method, payment_details_json, status, user_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        order['order_id'],
+        order['order_date'],
+        order['customer_name'],
+        order['customer_email'],
+        order['customer_phone'],
+        order['customer_address'],
+        items_json,
+        order['total_amount'],
+        order['payment_method'],
+        payment_details_json,
+        order['status'],
+        order.get('user_id')
+    ))
+    # Queued in the same transaction, so a confirmation exists exactly when the order does
+    enqueue_order_confirmation(c, order)
+
+def save_order_to_db(order):
+    """Save order to database"""
+    db_path = get_db_path()
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    insert_order(c, order)
+    conn.commit()
+    conn.close()
+
+def read_products(products_path=None):
+    """Load products from the JSON catalog, creating the default catalog on first run"""
+    products_path = products_path or get_products_path()
+    if os.path.exists(products_path):
+        with open(products_path, 'r') as f:
+            products = json.load(f)
+            # Ensure all products have stock field
+            for p in products:
+                if 'stock' not in p:
+                    p['stock'] = 15
+            return products
+    else:
+        default_products = [
+            {
+                "id": 1,
+                "name": "Ruby Red Lipstick",
+                "price": 899,
+                "category": "Lips",
+                "description": "Long-lasting matte finish lipstick with rich pigmentation. Perfect for all-day wear.",
+                "image": "https://images.pexels.com/photos/14839822/pexels-photo-14839822.jpeg",
+                "stock": 15
+            },
+            {
+                "id": 2,
+                "name": "Rose Petal Blush",
+                "price": 749,
+                "category": "Face",
+                "description": "Silky smooth blush that gives you a natural rosy glow. Buildable formula.",
+                "image": "https://images.pexels.com/photos/17354882/pexels-photo-17354882.jpeg",
+                "stock": 15
+            },
+            {
+                "id": 3,
+                "name": "Midnight Black Eyeliner",
+                "price": 599,
+                "category": "Eyes",
+                "description": "Waterproof gel eyeliner with precision applicator. Smudge-proof formula.",
+                "image": "https://images.pexels.com/photos/2697787/pexels-photo-2697787.jpeg",
+                "stock": 15
+            },
+            {
+                "id": 4,
+                "name": "Hydrating Face Cream",
+                "price": 1299,
+                "category": "Skincare",
+                "description": "24-hour moisturizing cream with hyaluronic acid. Suitable for all skin types.",
+                "image": "https://images.pexels.com/photos/10221859/pexels-photo-10221859.jpeg",
+                "stock": 15
+            },
+            {
+                "id": 5,
+                "name": "Nude Matte Lipstick",
+                "price": 899,
+                "category": "Lips",
+                "description": "Everyday nude shade with comfortable matte finish. Non-drying formula.",
+                "image": "https://images.pexels.com/photos/28968376/pexels-photo-28968376.jpeg",
+                "stock": 15
+            }
+        ]
+        with open(products_path, "w") as f:
+            json.dump(default_products, f, indent=2)
+        return default_products
+
+def write_products(products, products_path=None):
+    """Save products to the JSON catalog atomically"""
+    products_path = products_path or get_products_path()
+    # Write to a temp file and swap it in, so readers never see a half-written catalog
+    tmp_path = products_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(products, f, indent=2)
+    os.replace(tmp_path, products_path)
+
+def catalog_version(products_path=None):
+    """Cheap change marker for the catalog file (mtime and size)"""
+    try:
+        stat = os.stat(products_path or get_products_path())
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+def format_order_id(number):
+    """Order id for the n-th order: ORD and the number zero-padded to four digits"""
+    return f"ORD{number:04d}"
+
+def order_units(items):
+    """{product_id: units} for an order's items.
+
+    The cart holds one entry per unit (add_to_cart appends the product again
+    for every unit), so a product's quantity is how often its id appears.
+    Sales, cancellations and the restock forecast all count units this way.
+    """
+    return Counter(item['id'] for item in items if isinstance(item, dict) and 'id' in item)
+
+def place_orders(conn, requests):
+    """Commit a batch of checkout requests: one transaction for the orders and one catalog write for the stock.
+    
+    Stock is checked against the inventory ledger and each sale is recorded in
+    it; the catalog file is rewritten with the new levels while the database
+    write lock is held, so checkouts from the Streamlit app and the API never
+    oversell each other. Returns (results, changed_products) with one order id
+    or ValueError per request.
+    """
+    results = []
+    changed = {}
+    written = False
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        products = read_products()
+        original = [dict(p) for p in products]
+        by_id = {p['id']: p for p in products}
+        ordered_ids = {item['id'] for request in requests for item in request['items']}
+        for pid, stock in stock_levels(c, ordered_ids).items():
+            if pid in by_id:
+                by_id[pid]['stock'] = stock
+        c.execute("SELECT value FROM counters WHERE name = 'order_number'")
+        order_count = c.fetchone()[0]
+        
+        for request in requests:
+            needed = order_units(request['items'])
+            short = [pid for pid, qty in needed.items() if by_id.get(pid, {}).get('stock', 0) < qty]
+            if short:
+                names = ", ".join(by_id[pid]['name'] if pid in by_id else f"Product #{pid}" for pid in short)
+                results.append(ValueError(f"Not enough stock for: {names}"))
+                continue
+            
+            order_count += 1
+            order = dict(request, order_id=format_order_id(order_count), order_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            insert_order(c, order)
+            record_movements(c, [(pid, -qty, 'sale', order['order_id']) for pid, qty in needed.items()])
+            for pid, qty in needed.items():
+                by_id[pid]['stock'] -= qty
+                changed[pid] = by_id[pid]
+            results.append(order['order_id'])
+        
+        c.execute("UPDATE counters SET value = ? WHERE name = 'order_number'", (order_count,))
+        if changed:
+            take_snapshots(c, changed)
+            write_products(products)
+            written = True
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if written:
+            write_products(original)
+        raise
+    return results, list(changed.values())
+
+def commit_catalog(conn, products, movements=(), transform=None):
+    """Write the catalog with every product's stock taken from the inventory ledger.
+    
+    `movements` ([(product_id, delta, kind, ref)]) are recorded first and
+    products that are new to the catalog are opened with their own stock, all
+    under the database write lock. Stock edited from a stale copy of the
+    catalog therefore lands as a delta and never overwrites a concurrent sale.
+    With `transform`, the catalog written is transform(current catalog), read
+    under the same lock, so other edits made meanwhile are kept; `products` is
+    then ignored. Returns the products as written.
+    """
+    c = conn.cursor()
+    written = False
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        original = read_products()
+        if transform:
+            products = transform([dict(p) for p in original])
+        known_ids = {p['id'] for p in original}
+        record_movements(c, movements)
+        levels = stock_levels(c)
+        opened = [p for p in products if p['id'] not in known_ids or p['id'] not in levels]
+        if opened:
+            open_stock(c, opened)
+            levels.update((p['id'], p.get('stock', 0)) for p in opened)
+        take_snapshots(c)
+        products = [dict(p, stock=levels[p['id']]) for p in products]
+        write_products(products)
+        written = True
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if written:
+            write_products(original)
+        raise
+    return products
+
+def sync_inventory(db_path=None):
+    """Open ledger rows for catalog products that have none, then bring the catalog's stock in line with the ledger.
+    
+    The ledger is the record of stock; the `stock` field in the catalog file is
+    a copy of it for readers. Returns how many products were opened.
+    """
+    conn = sqlite3.connect(db_path or get_db_path(), timeout=30)
+    c = conn.cursor()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        products = read_products()
+        levels = stock_levels(c)
+        opened = [p for p in products if p['id'] not in levels]
+        if opened:
+            open_stock(c, opened)
+        if any(p['stock'] != levels[p['id']] for p in products if p['id'] in levels):
+            write_products([dict(p, stock=levels.get(p['id'], p['stock'])) for p in products])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return len(opened)
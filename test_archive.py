@@ -0,0 +1,63 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from archive import archive_old_orders, archive_stats, archived_user_stats, fetch_archived_orders, init_archive
+from order_history import count_user_orders, fetch_order_details, fetch_order_summaries
+from store import init_db
+
+ORDERS = [
+    # order_id, date, status, user_id
+    ("ORD0001", "2020-01-01 10:00:00", "Delivered", 7),
+    ("ORD0002", "2020-01-02 10:00:00", "Cancelled", 7),
+    ("ORD0003", "2020-01-03 10:00:00", "Shipped", 7),
+    ("ORD0004", "2099-01-01 10:00:00", "Delivered", 7),
+    ("ORD0005", "2020-01-04 10:00:00", "Delivered", 8),
+]
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_db(self.db_path)
+        init_archive(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("""
+            INSERT INTO orders (order_id, date, customer_name, email, phone, address, items_json, total, payment_method, status, user_id)
+            VALUES (?, ?, 'A', 'a@x.com', '1', 'x', '[]', 100, 'UPI', ?, ?)
+        """, [(order_id, date, status, user_id) for order_id, date, status, user_id in ORDERS])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_only_old_finished_orders_move(self):
+        batches = []
+        self.assertEqual(archive_old_orders(self.db_path, 30, batch_size=2, progress=batches.append), 3)
+        self.assertEqual(batches, [2, 3])
+        self.assertEqual([row[0] for row in fetch_archived_orders(self.db_path)], ["ORD0005", "ORD0002", "ORD0001"])
+        hot, archived, oldest = archive_stats(self.db_path)
+        self.assertEqual((hot, archived, oldest), (2, 3, "2020-01-03 10:00:00"))
+        self.assertEqual(archive_old_orders(self.db_path, 30), 0)
+
+    def test_customer_history_continues_into_the_archive(self):
+        archive_old_orders(self.db_path, 30)
+        self.assertEqual(count_user_orders(self.db_path, 7), 2)
+        self.assertEqual(count_user_orders(self.db_path, 7, include_archived=True), 4)
+        self.assertEqual(archived_user_stats(self.db_path, 7), (2, 200))
+
+        rows, cursor = fetch_order_summaries(self.db_path, 7, limit=3, include_archived=True)
+        self.assertEqual([row[0] for row in rows], ["ORD0004", "ORD0003", "ORD0002"])
+        rows, cursor = fetch_order_summaries(self.db_path, 7, cursor=cursor, limit=3, include_archived=True)
+        self.assertEqual(([row[0] for row in rows], cursor), (["ORD0001"], None))
+
+        self.assertEqual(fetch_order_details(self.db_path, "ORD0001", 7), ("x", "1", "[]"))
+        self.assertIsNone(fetch_order_details(self.db_path, "ORD0001", 8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import json
+import unittest
+from catalog_io import diff_products, read_product_upload, validate_product_frame, DEFAULT_STOCK
+
+CATALOG = [
+    {"id": 1, "name": "Lip Tint", "price": 500, "stock": 4, "category": "Lips", "description": "Red", "image": "a.jpg"},
+    {"id": 2, "name": "Blush", "price": 700, "stock": 9, "category": "Face", "description": "Pink", "image": "b.jpg"},
+]
+
+
+def upload(text, filename):
+    return read_product_upload(io.BytesIO(text.encode("utf-8")), filename)
+
+
+class ValidateProductFrameTest(unittest.TestCase):
+
+    def test_json_nulls_are_rejected_and_missing_keys_get_defaults(self):
+        df = upload(json.dumps([
+            {"id": 1, "name": "Lip Tint", "price": 550, "stock": 4, "category": "Lips", "description": "Red", "image": "a.jpg"},
+            {"name": "New Mascara", "price": 900, "category": "Eyes", "description": "Black", "image": "c.jpg"},
+            {"name": None, "price": 300, "category": "Nails", "description": "Clear", "image": "d.jpg"},
+            {"name": "Serum", "price": 1200, "category": "Skincare", "description": None, "image": "e.jpg"},
+        ]), "products.json")
+        clean, errors = validate_product_frame(df)
+        self.assertEqual(errors, [(4, "'name' is required"), (5, "'description' is required")])
+        self.assertEqual(list(clean["_row"]), [2, 3])
+        diff = diff_products(CATALOG, clean)
+        self.assertEqual(diff["inserts"], [{
+            "id": 3, "name": "New Mascara", "price": 900, "category": "Eyes",
+            "description": "Black", "image": "c.jpg", "stock": DEFAULT_STOCK,
+        }])
+        self.assertEqual([new["price"] for _, new in diff["updates"]], [550])
+        # Everything in the diff must survive a round trip through products.json
+        json.loads(json.dumps(diff, allow_nan=False))
+
+    def test_csv_errors_are_reported_per_row(self):
+        df = upload(
+            "id,name,price,stock,category,description,image,action\n"
+            "1,Lip Tint,500,,Lips,Red,a.jpg,\n"
+            "x,Bad Id,500,1,Lips,Red,a.jpg,\n"
+            ",Cheap,0,1,Lips,Red,a.jpg,\n"
+            "2,,,,,,,delete\n"
+            ",No Id,,,,,,delete\n",
+            "products.csv",
+        )
+        clean, errors = validate_product_frame(df)
+        self.assertEqual(errors, [
+            (3, "'id' must be a positive whole number"),
+            (4, "'price' must be a whole number of at least 1"),
+            (6, "Delete rows need an 'id'"),
+        ])
+        self.assertEqual(int(clean["stock"].iloc[0]), DEFAULT_STOCK)
+        diff = diff_products(CATALOG, clean)
+        self.assertEqual([p["id"] for p in diff["deletes"]], [2])
+        self.assertEqual([(old["id"], new["stock"]) for old, new in diff["updates"]], [(1, DEFAULT_STOCK)])
+
+    def test_missing_required_column(self):
+        clean, errors = validate_product_frame(upload("name,price\nA,1\n", "products.csv"))
+        self.assertTrue(clean.empty)
+        self.assertEqual(errors, [(0, "Missing required column(s): category, description, image")])
+
+
+class DiffProductsTest(unittest.TestCase):
+
+    def test_new_rows_skip_ids_claimed_elsewhere_in_the_file(self):
+        df = upload(json.dumps([
+            {"name": "First", "price": 100, "category": "Tools", "description": "x", "image": "x.jpg"},
+            {"id": 3, "name": "Explicit", "price": 100, "category": "Tools", "description": "x", "image": "x.jpg"},
+        ]), "products.json")
+        clean, errors = validate_product_frame(df)
+        self.assertEqual(errors, [])
+        diff = diff_products(CATALOG, clean)
+        self.assertEqual([(p["id"], p["name"]) for p in diff["inserts"]], [(4, "First"), (3, "Explicit")])
+
+    def test_delete_missing(self):
+        clean, _ = validate_product_frame(upload(json.dumps([CATALOG[0]]), "products.json"))
+        diff = diff_products(CATALOG, clean, delete_missing=True)
+        self.assertEqual(diff["updates"], [])
+        self.assertEqual([p["id"] for p in diff["deletes"]], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import pandas as pd
+from events import EventCollector, funnel_report, init_events, load_events
+
+
+def frame(rows):
+    events = pd.DataFrame(rows, columns=["ts", "session_id", "user_id", "event", "product_id", "value"])
+    events["ts"] = pd.to_datetime(events["ts"])
+    return events
+
+
+class EventCollectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_events(self.db_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_events_are_buffered_until_a_flush(self):
+        collector = EventCollector(self.db_path, max_buffer=3)
+        for product_id in range(4):
+            collector.track('product_view', session_id="s1", product_id=product_id)
+        with self.assertRaises(ValueError):
+            collector.track('wishlist')
+        self.assertEqual(collector.metrics()['dropped'], 1)
+        self.assertEqual(collector.flush(), 3)
+        self.assertEqual(collector.flush(), 0)
+        events = load_events(self.db_path, "2000-01-01 00:00:00")
+        self.assertEqual(list(events["product_id"]), [1, 2, 3])
+
+    def test_failed_flush_keeps_the_batch(self):
+        collector = EventCollector(os.path.join(self.tmp, "missing", "shop.db"))
+        collector.track('purchase', session_id="s1", value=500)
+        self.assertEqual(collector.flush(), 0)
+        self.assertEqual(collector.metrics()['pending'], 1)
+        collector.db_path = self.db_path
+        self.assertEqual(collector.flush(), 1)
+
+
+class FunnelReportTest(unittest.TestCase):
+
+    def test_stages_abandonment_and_products(self):
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        old = now - timedelta(hours=2)
+        events = frame([
+            (old, "a", None, 'product_view', 1, None),
+            (old, "a", None, 'add_to_cart', 1, 500),
+            (old, "a", None, 'checkout_start', None, None),
+            (old, "b", None, 'add_to_cart', 2, 700),
+            (old, "b", None, 'checkout_start', None, None),
+            (old, "b", None, 'purchase', None, 700),
+            (now, "c", None, 'product_view', 2, None),
+            (now, "c", None, 'checkout_start', None, None),
+            (now, None, None, 'product_view', 2, None),
+        ])
+        report = funnel_report(events, now=now)
+        self.assertEqual(report['sessions'], 3)
+        # Reaching a later stage counts for every earlier one, so the funnel never widens
+        self.assertEqual(list(report['funnel']['sessions']), [3, 3, 3, 1])
+        self.assertEqual((report['checkouts_started'], report['checkouts_abandoned']), (3, 1))
+        products = report['products'].set_index('id')
+        self.assertEqual(products.loc[2, 'views'], 2)
+        self.assertEqual(products.loc[1, 'add_rate'], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
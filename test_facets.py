@@ -0,0 +1,48 @@
+import unittest
+from facets import FacetIndex, price_band
+
+PRODUCTS = [
+    {"id": 1, "price": 300, "stock": 0, "category": "Lips"},
+    {"id": 2, "price": 800, "stock": 3, "category": "Lips"},
+    {"id": 3, "price": 1500, "stock": 20, "category": "Face"},
+    {"id": 70, "price": 2500, "stock": 5, "category": "Eyes"},
+]
+
+
+class FacetIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FacetIndex(PRODUCTS, version="v1")
+
+    def test_price_bands(self):
+        self.assertEqual([price_band(p['price']) for p in PRODUCTS], ["Under ₹500", "₹500 - ₹999", "₹1000 - ₹1999", "₹2000 & above"])
+        self.assertEqual(price_band(1000), "₹1000 - ₹1999")
+
+    def test_combined_filters_and_paging(self):
+        self.assertEqual(self.index.search(), ([1, 2, 3, 70], 4))
+        self.assertEqual(self.index.search(category="Lips", in_stock_only=True), ([2], 1))
+        self.assertEqual(self.index.search(low_stock_only=True), ([2, 70], 2))
+        self.assertEqual(self.index.search(offset=1, limit=2), ([2, 3], 4))
+
+    def test_counts_apply_the_other_filters(self):
+        counts = self.index.counts(category="Lips")
+        self.assertEqual(counts['category'], {"Eyes": 1, "Face": 1, "Lips": 2, "All": 4})
+        self.assertEqual(counts['price']["All"], 2)
+        self.assertEqual((counts['in_stock'], counts['low_stock']), (1, 1))
+
+    def test_updates_refile_products(self):
+        self.index.update_products([dict(PRODUCTS[0], stock=2, category="Face")])
+        self.index.remove_products([70])
+        self.assertEqual(self.index.search(category="Face", low_stock_only=True), ([1], 1))
+        self.assertEqual(self.index.search(category="Lips"), ([2], 1))
+        self.assertEqual(self.index.counts()['category'], {"Face": 2, "Lips": 1, "All": 3})
+        self.assertEqual(len(self.index), 3)
+
+    def test_rebuild_records_the_catalog_version(self):
+        self.assertEqual(self.index.version, "v1")
+        self.index.rebuild(PRODUCTS[:1], "v2")
+        self.assertEqual((self.index.version, len(self.index)), ("v2", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
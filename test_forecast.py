@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from fulfillment import init_fulfillment, transition_orders
+from forecast import SalesHistory
+from inventory import init_inventory
+from mailer import init_outbox
+from store import init_db, place_orders, sync_inventory
+
+PRODUCTS = [
+    {"id": 1, "name": "Lip Tint", "price": 500, "stock": 20, "category": "Lips", "description": "Red", "image": "a.jpg"},
+    {"id": 2, "name": "Blush", "price": 700, "stock": 20, "category": "Face", "description": "Pink", "image": "b.jpg"},
+]
+
+
+class SalesHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        with open("products.json", "w") as f:
+            json.dump(PRODUCTS, f)
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_db(self.db_path)
+        init_outbox(self.db_path)
+        init_inventory(self.db_path)
+        init_fulfillment(self.db_path)
+        sync_inventory(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def order(self, *product_ids):
+        request = dict(
+            items=[dict(PRODUCTS[pid - 1]) for pid in product_ids], customer_name="A", customer_email="a@x.com",
+            customer_phone="1", customer_address="x", total_amount=1, payment_method="UPI", status="Confirmed",
+        )
+        results, _ = place_orders(self.conn, [request])
+        return results[0]
+
+    def units(self, history):
+        matrix, _ = history.units_matrix([1, 2])
+        return matrix.sum(axis=1).tolist()
+
+    def test_cancelling_a_counted_order_takes_its_units_back(self):
+        history = SalesHistory(self.db_path)
+        first = self.order(1, 1, 2)
+        self.order(1)
+        self.assertEqual(history.catch_up(), 2)
+        self.assertEqual(self.units(history), [3, 1])
+
+        transition_orders(self.conn, [first], 'Cancelled')
+        history.catch_up()
+        self.assertEqual(self.units(history), [1, 0])
+        history.catch_up()
+        self.assertEqual(self.units(history), [1, 0])
+
+    def test_order_cancelled_before_it_was_read_is_not_subtracted(self):
+        history = SalesHistory(self.db_path)
+        self.order(1)
+        history.catch_up()
+        cancelled = self.order(1, 2)
+        transition_orders(self.conn, [cancelled], 'Cancelled')
+        self.assertEqual(history.catch_up(), 0)
+        self.assertEqual(self.units(history), [1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
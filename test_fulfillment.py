@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from fulfillment import init_fulfillment, order_status_history, status_counts, transition_orders
+from inventory import init_inventory, stock_levels
+from mailer import init_outbox
+from store import init_db, place_orders, read_products, sync_inventory
+
+PRODUCTS = [
+    {"id": 1, "name": "Lip Tint", "price": 500, "stock": 10, "category": "Lips", "description": "Red", "image": "a.jpg"},
+    {"id": 2, "name": "Blush", "price": 700, "stock": 10, "category": "Face", "description": "Pink", "image": "b.jpg"},
+]
+
+
+class CommitFails:
+    """Connection stand-in whose commit fails after the catalog file was written"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def commit(self):
+        raise sqlite3.OperationalError("disk I/O error")
+
+
+class TransitionOrdersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        with open("products.json", "w") as f:
+            json.dump(PRODUCTS, f)
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_db(self.db_path)
+        init_outbox(self.db_path)
+        init_inventory(self.db_path)
+        init_fulfillment(self.db_path)
+        sync_inventory(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        request = dict(
+            items=[dict(PRODUCTS[0]), dict(PRODUCTS[0]), dict(PRODUCTS[1])], customer_name="A", customer_email="a@x.com",
+            customer_phone="1", customer_address="x", total_amount=1700, payment_method="UPI", status="Confirmed",
+        )
+        self.order_ids, _ = place_orders(self.conn, [request, dict(request)])
+
+    def tearDown(self):
+        self.conn.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def stock(self):
+        return {p['id']: p['stock'] for p in read_products()}
+
+    def test_moves_allowed_orders_and_reports_the_rest(self):
+        first, second = self.order_ids
+        moved, rejected, changed = transition_orders(self.conn, [first, "ORD9999"], 'Packed', changed_by="admin")
+        self.assertEqual((moved, rejected, changed), ([first], [("ORD9999", "not found")], []))
+        moved, rejected, _ = transition_orders(self.conn, [first, second], 'Shipped')
+        self.assertEqual(moved, [first])
+        self.assertEqual(rejected, [(second, "cannot go from Confirmed to Shipped")])
+        self.assertEqual(status_counts(self.db_path)['Shipped'], 1)
+        history = order_status_history(self.db_path, [first])[first]
+        self.assertEqual([(h[0], h[1], h[3]) for h in history], [('Confirmed', 'Packed', "admin"), ('Packed', 'Shipped', None)])
+
+    def test_cancelling_gives_the_stock_back(self):
+        self.assertEqual(self.stock(), {1: 6, 2: 8})
+        moved, _, changed = transition_orders(self.conn, self.order_ids[:1], 'Cancelled')
+        self.assertEqual(moved, self.order_ids[:1])
+        self.assertEqual({p['id']: p['stock'] for p in changed}, {1: 8, 2: 9})
+        self.assertEqual(self.stock(), {1: 8, 2: 9})
+        self.assertEqual(stock_levels(self.conn), {1: 8, 2: 9})
+        # Cancelled is final: a second cancel changes nothing
+        moved, rejected, _ = transition_orders(self.conn, self.order_ids[:1], 'Cancelled')
+        self.assertEqual((moved, len(rejected)), ([], 1))
+        self.assertEqual(self.stock(), {1: 8, 2: 9})
+
+    def test_failed_commit_restores_the_catalog_file(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            transition_orders(CommitFails(self.conn), self.order_ids, 'Cancelled')
+        self.assertEqual(self.stock(), {1: 6, 2: 8})
+        self.assertEqual(stock_levels(self.conn), {1: 6, 2: 8})
+        self.assertEqual(status_counts(self.db_path)['Confirmed'], 2)
+
+    def test_unknown_status(self):
+        with self.assertRaises(ValueError):
+            transition_orders(self.conn, self.order_ids, 'Lost')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import threading
+import time
+import unittest
+from group_commit import GroupCommitQueue
+
+
+class GroupCommitQueueTest(unittest.TestCase):
+
+    def test_each_caller_gets_its_own_result(self):
+        def commit(items):
+            return [ValueError("odd") if item % 2 else item * 10 for item in items]
+        writer = GroupCommitQueue(commit).start()
+        self.assertEqual(writer.submit(2), 20)
+        with self.assertRaises(ValueError):
+            writer.submit(3)
+
+    def test_timed_out_item_is_never_committed(self):
+        committed = []
+        release = threading.Event()
+
+        def commit(items):
+            release.wait(5)
+            committed.extend(items)
+            return items
+        writer = GroupCommitQueue(commit, max_wait_ms=0).start()
+        first = threading.Thread(target=writer.submit, args=("first",))
+        first.start()
+        time.sleep(0.05)  # the writer is now blocked committing "first"
+        with self.assertRaises(TimeoutError):
+            writer.submit("late", timeout=0.1)
+        release.set()
+        first.join(5)
+        self.assertEqual(writer.submit("next"), "next")
+        self.assertEqual(committed, ["first", "next"])
+        self.assertEqual(writer.metrics()['withdrawn'], 1)
+
+    def test_timeout_during_commit_waits_for_the_outcome(self):
+        def commit(items):
+            time.sleep(0.3)
+            return items
+        writer = GroupCommitQueue(commit, max_wait_ms=0).start()
+        self.assertEqual(writer.submit("slow", timeout=0.1), "slow")
+
+
+if __name__ == "__main__":
+    unittest.main()
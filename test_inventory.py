@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from inventory import init_inventory, inventory_stats, record_movements, stock_levels, stock_movements, take_snapshots
+from mailer import init_outbox
+from store import commit_catalog, init_db, place_orders, read_products, sync_inventory
+
+PRODUCTS = [
+    {"id": 1, "name": "Lip Tint", "price": 500, "stock": 10, "category": "Lips", "description": "Red", "image": "a.jpg"},
+    {"id": 2, "name": "Blush", "price": 700, "stock": 4, "category": "Face", "description": "Pink", "image": "b.jpg"},
+]
+
+
+class InventoryLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        with open("products.json", "w") as f:
+            json.dump(PRODUCTS, f)
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_db(self.db_path)
+        init_outbox(self.db_path)
+        init_inventory(self.db_path)
+        self.assertEqual(sync_inventory(self.db_path), 2)
+        self.conn = sqlite3.connect(self.db_path)
+
+    def tearDown(self):
+        self.conn.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def test_stock_is_the_snapshot_plus_the_ledger_tail(self):
+        record_movements(self.conn, [(1, -3, 'sale', "ORD0001"), (1, 5, 'restock', None), (2, 0, 'adjustment', None)])
+        self.assertEqual(stock_levels(self.conn), {1: 12, 2: 4})
+        self.assertEqual(take_snapshots(self.conn, every=2), 1)
+        self.assertEqual(stock_levels(self.conn, [1]), {1: 12})
+        self.assertEqual(inventory_stats(self.conn)['longest_tail'], 0)
+        with self.assertRaises(ValueError):
+            record_movements(self.conn, [(1, 1, 'gift', None)])
+
+    def test_stale_catalog_edit_lands_as_a_delta(self):
+        stale = read_products()
+        # A checkout sells two units after the admin loaded the catalog
+        request = dict(
+            items=[dict(PRODUCTS[0]), dict(PRODUCTS[0])], customer_name="A", customer_email="a@x.com",
+            customer_phone="1", customer_address="x", total_amount=1000, payment_method="UPI", status="Confirmed",
+        )
+        place_orders(self.conn, [request])
+        edited = [dict(p) for p in stale]
+        edited[0]['stock'] += 5
+        edited[1]['name'] = "Rose Blush"
+        written = commit_catalog(self.conn, edited, stock_movements(stale, edited, 'restock'))
+        self.assertEqual([p['stock'] for p in written], [13, 4])
+        self.assertEqual(read_products()[1]['name'], "Rose Blush")
+
+    def test_transform_edits_the_catalog_read_under_the_lock(self):
+        products = read_products()
+        products[1]['name'] = "Renamed meanwhile"
+        commit_catalog(self.conn, products)
+        commit_catalog(self.conn, None, transform=lambda current: [dict(p, price=p['price'] + 1) for p in current])
+        self.assertEqual([(p['name'], p['price']) for p in read_products()], [("Lip Tint", 501), ("Renamed meanwhile", 701)])
+
+    def test_new_products_are_opened_with_their_own_stock(self):
+        products = read_products() + [{"id": 3, "name": "Mascara", "price": 900, "stock": 7, "category": "Eyes", "description": "", "image": ""}]
+        commit_catalog(self.conn, products)
+        self.assertEqual(stock_levels(self.conn), {1: 10, 2: 4, 3: 7})
+
+
+if __name__ == "__main__":
+    unittest.main()
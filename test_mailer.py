@@ -0,0 +1,94 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+import mailer
+from mailer import (
+    MAX_ATTEMPTS, BACKOFF_BASE_SECONDS, OutboxWorker, claim_due_emails, enqueue_order_confirmation,
+    init_outbox, outbox_stats, record_results
+)
+
+
+class OutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_outbox(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        for n in range(3):
+            enqueue_order_confirmation(conn.cursor(), {
+                'order_id': f"ORD{n:04d}", 'customer_name': "A", 'customer_email': f"a{n}@x.com",
+                'customer_address': "x", 'items': [{'name': "Lip Tint", 'price': 500}],
+                'total_amount': 500, 'payment_method': "UPI",
+            })
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def row(self, email_id):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT status, attempts, next_attempt_at, claim_token, last_error FROM email_outbox WHERE id = ?", (email_id,)
+        ).fetchone()
+        conn.close()
+        return row
+
+    def test_claimed_emails_are_leased_to_one_worker(self):
+        _, rows = claim_due_emails(self.db_path, 2)
+        self.assertEqual([row[0] for row in rows], [1, 2])
+        _, rows = claim_due_emails(self.db_path, 10)
+        self.assertEqual([row[0] for row in rows], [3])
+        self.assertEqual(claim_due_emails(self.db_path, 10)[1], [])
+
+    def test_expired_claim_cannot_record_results(self):
+        with mock.patch.object(mailer, 'LEASE_SECONDS', -1):
+            stale_token, _ = claim_due_emails(self.db_path, 1)
+            token, rows = claim_due_emails(self.db_path, 1)
+        self.assertEqual(rows[0][0], 1)
+        record_results(self.db_path, stale_token, [1], {})
+        self.assertEqual(self.row(1)[0], 'pending')
+        record_results(self.db_path, stale_token, [], {1: (0, "refused")})
+        self.assertEqual(self.row(1)[1], 0)
+        record_results(self.db_path, token, [1], {})
+        self.assertEqual(self.row(1)[:2], ('sent', 0))
+
+    def test_failures_back_off_then_give_up(self):
+        token, _ = claim_due_emails(self.db_path, 1)
+        before = time.time()
+        record_results(self.db_path, token, [], {1: (0, "mailbox unavailable")})
+        status, attempts, next_attempt_at, claim, error = self.row(1)
+        self.assertEqual((status, attempts, claim, error), ('pending', 1, None, "mailbox unavailable"))
+        self.assertGreaterEqual(next_attempt_at, before + BACKOFF_BASE_SECONDS * 0.8)
+        # Not due yet, so the next claim skips it
+        self.assertNotIn(1, [row[0] for row in claim_due_emails(self.db_path, 10)[1]])
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("UPDATE email_outbox SET attempts = ?, claim_token = 'last' WHERE id = 1", (MAX_ATTEMPTS - 1,))
+        conn.commit()
+        conn.close()
+        record_results(self.db_path, 'last', [], {1: (MAX_ATTEMPTS - 1, "mailbox unavailable")})
+        self.assertEqual(self.row(1)[:2], ('failed', MAX_ATTEMPTS))
+
+    def test_worker_sends_and_retries_per_message(self):
+        def send_batch(messages):
+            return {email_id: "refused" if recipient == "a1@x.com" else None for email_id, recipient, _, _ in messages}
+        self.assertEqual(OutboxWorker(self.db_path, send_batch).drain_once(), 3)
+        self.assertEqual(outbox_stats(self.db_path), {'sent': 2, 'pending': 1})
+        self.assertEqual(self.row(2)[:2], ('pending', 1))
+
+    def test_worker_survives_a_failing_batch(self):
+        def send_batch(messages):
+            raise KeyError("host")
+        self.assertEqual(OutboxWorker(self.db_path, send_batch).drain_once(), 3)
+        self.assertEqual(outbox_stats(self.db_path), {'pending': 3})
+        self.assertEqual(self.row(1)[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from session_store import SessionStore, init_session_store, load_signing_key
+
+
+class SessionStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "shop.db")
+        init_session_store(self.db_path)
+        # Not started: the tests flush and purge by hand
+        self.store = SessionStore(self.db_path, load_signing_key(self.db_path), ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT user_id, cart_json FROM sessions").fetchall()
+        conn.close()
+        return rows
+
+    def test_saves_coalesce_into_one_row_write(self):
+        token = self.store.new_token()
+        for cart in ([1], [1, 2], [1, 2, 2]):
+            self.store.save(token, 7, cart)
+        # Readable before the flush, from the pending writes
+        self.assertEqual(self.store.load(token), (7, [1, 2, 2]))
+        self.assertEqual(self.rows(), [])
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(self.rows(), [(7, "[1, 2, 2]")])
+        self.assertEqual(self.store.stats['saves'], 3)
+        self.assertEqual(self.store.flush(), 0)
+
+    def test_tokens_must_carry_a_valid_signature(self):
+        token = self.store.new_token()
+        self.store.save(token, None, [3], flush=True)
+        session_id, _, signature = token.partition(".")
+        forged = f"{session_id}.{'0' * len(signature)}"
+        self.assertIsNone(self.store.load(forged))
+        self.assertIsNone(self.store.load(session_id))
+        other = SessionStore(self.db_path, b"another key", ttl=60)
+        self.assertIsNone(other.load(token))
+        self.assertEqual(self.store.load(token), (None, [3]))
+
+    def test_expired_sessions_are_hidden_then_purged(self):
+        old, fresh = self.store.new_token(), self.store.new_token()
+        self.store.save(old, None, [1])
+        self.store.save(fresh, None, [2], flush=True)
+        conn = sqlite3.connect(self.db_path)
+        session_id = old.partition(".")[0]
+        conn.execute("UPDATE sessions SET expires_at = ? WHERE session_id = ?", (time.time() - 1, session_id))
+        conn.commit()
+        conn.close()
+        self.assertIsNone(self.store.load(old))
+        self.assertEqual(self.store.purge_expired(), 1)
+        self.assertEqual(self.rows(), [(None, "[2]")])
+        self.assertEqual(self.store.metrics()['stored'], 1)
+
+    def test_delete_drops_pending_and_stored_state(self):
+        token = self.store.new_token()
+        self.store.save(token, 1, [1], flush=True)
+        self.store.save(token, 1, [1, 2])
+        self.store.delete(token)
+        self.assertIsNone(self.store.load(token))
+        self.assertEqual(self.store.flush(), 0)
+        self.assertEqual(self.rows(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
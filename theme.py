@@ -0,0 +1,293 @@
+import glob
+import hashlib
+import json
+import os
+from string import Template
+
+# --- THEME ENGINE ---
+# theme.json overrides any of these tokens; everything else keeps the default look.
+DEFAULT_THEME = {
+    "primary_color": "#8b4789",
+    "primary_light": "#9b5d9d",
+    "primary_dark": "#7a4a7c",
+    "title_dark": "#6b3669",
+    "shadow_rgb": "139, 71, 137",
+    "border_color": "#d4a8c8",
+    "border_hover": "#b89cc8",
+    "tag_background": "#e8d5f2",
+    "surface": "#ffffff",
+    "surface_alt": "#fef5f9",
+    "text_color": "#333",
+    "muted_color": "#666",
+    "background": "linear-gradient(135deg, #fef9f3 0%, #fef3f8 25%, #f3f9fe 50%, #fef6f0 75%, #f8f3fe 100%)",
+    "sidebar_background": "linear-gradient(180deg, #e8f4f8 0%, #f0e8f8 50%, #f8f0e8 100%)",
+    "sidebar_border": "#b8a8d8",
+    "card_shadow": "0 10px 30px rgba(139, 71, 137, 0.15)",
+    "success_color": "#2d6a4f",
+    "success_dark": "#1b4332",
+    "success_border": "#b8e6d5",
+    "welcome_background": "linear-gradient(135deg, #b8e6d5 0%, #95d5b2 100%)",
+    "welcome_border": "#74c69d",
+    "info_color": "#1e6091",
+    "info_border": "#cce3ff",
+    "danger_color": "#c9184a",
+    "danger_border": "#ffd6e8",
+    "member_border": "#f0e6f6",
+    "stock_out_color": "red",
+    "stock_low_color": "orange",
+    "stock_ok_color": "green",
+}
+
+STYLESHEET_TEMPLATE = Template("""
+.main {
+    background: $background;
+    padding: 1rem 2rem;
+}
+[data-testid="stSidebar"] {
+    background: $sidebar_background;
+    border-right: 4px solid $sidebar_border;
+}
+.product-card {
+    background: $surface !important;
+    border: 3px solid $border_color !important;
+    border-radius: 25px !important;
+    padding: 30px !important;
+    margin: 20px 10px !important;
+    box-shadow: $card_shadow !important;
+    transition: all 0.4s ease !important;
+}
+.product-card:hover {
+    transform: translateY(-8px) !important;
+    box-shadow: 0 15px 40px rgba($shadow_rgb, 0.25) !important;
+    border-color: $border_hover !important;
+}
+.price-tag {
+    font-size: 28px;
+    color: #ffffff;
+    font-weight: 900;
+    background: linear-gradient(135deg, $primary_light 0%, $primary_dark 100%);
+    padding: 10px 24px;
+    border-radius: 15px;
+    display: inline-block;
+    border: 3px solid $border_hover;
+    box-shadow: 0 6px 15px rgba($shadow_rgb, 0.3);
+}
+.header-title {
+    text-align: center;
+    background: linear-gradient(135deg, $primary_color 0%, $title_dark 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    font-size: 52px;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+.subtitle {
+    text-align: center;
+    color: $primary_dark;
+    font-size: 20px;
+    margin-bottom: 30px;
+    font-weight: 600;
+}
+.stButton > button {
+    background: linear-gradient(135deg, $primary_color 0%, $primary_light 100%) !important;
+    color: white !important;
+    border: 2px solid $border_hover !important;
+    border-radius: 12px !important;
+    padding: 12px 24px !important;
+    font-weight: 700 !important;
+    box-shadow: 0 4px 12px rgba($shadow_rgb, 0.3) !important;
+    transition: all 0.3s ease !important;
+}
+.stButton > button:hover {
+    background: linear-gradient(135deg, $primary_light 0%, $primary_color 100%) !important;
+    transform: translateY(-2px) !important;
+    box-shadow: 0 6px 16px rgba($shadow_rgb, 0.4) !important;
+}
+.stAlert {
+    border-radius: 15px !important;
+    border-left: 5px solid $primary_color !important;
+    background: $surface !important;
+    box-shadow: 0 4px 12px rgba(0,0,0,0.08) !important;
+}
+.stTabs [data-baseweb="tab-list"] {
+    background: $surface;
+    border-radius: 15px;
+    padding: 10px;
+    border: 2px solid $border_color;
+}
+.stTabs [data-baseweb="tab"] {
+    background: $surface_alt;
+    border-radius: 10px;
+    color: $primary_color;
+    font-weight: 600;
+}
+.stTabs [aria-selected="true"] {
+    background: linear-gradient(135deg, $primary_color 0%, $primary_light 100%);
+    color: white !important;
+}
+.stTextInput > div > div > input,
+.stTextArea > div > div > textarea,
+.stSelectbox > div > div > select {
+    background: $surface !important;
+    border: 2px solid $border_color !important;
+    border-radius: 12px !important;
+    padding: 12px !important;
+    color: $text_color !important;
+}
+.stTextInput > div > div > input:focus,
+.stTextArea > div > div > textarea:focus {
+    border-color: $primary_color !important;
+    box-shadow: 0 0 0 2px rgba($shadow_rgb, 0.2) !important;
+}
+.streamlit-expanderHeader {
+    background: $surface !important;
+    border: 2px solid $border_color !important;
+    border-radius: 12px !important;
+    color: $primary_color !important;
+    font-weight: 600 !important;
+}
+hr {
+    border-color: $border_color !important;
+    margin: 30px 0 !important;
+}
+.cart-item-box {
+    background: $surface;
+    border: 2px solid $border_color;
+    border-radius: 15px;
+    padding: 20px;
+    margin: 15px 0;
+    box-shadow: 0 4px 12px rgba($shadow_rgb, 0.1);
+}
+
+/* Component classes (used instead of inline styles) */
+.gb-title { color: $primary_color; }
+.gb-center { text-align: center; }
+.gb-muted { color: $muted_color; }
+.gb-lead { color: $muted_color; font-size: 18px; }
+.gb-section-heading { color: $primary_color; text-align: center; margin: 30px 0; }
+.gb-card-head { text-align: center; margin-bottom: 15px; }
+.gb-card-name { color: $primary_color; margin-bottom: 8px; }
+.gb-tag {
+    background: $tag_background;
+    padding: 5px 15px;
+    border-radius: 20px;
+    color: $primary_color;
+    font-size: 12px;
+    font-weight: 600;
+}
+.gb-product-media { padding: 0 10px; position: relative; }
+.gb-product-img {
+    width: 100%;
+    height: 280px;
+    object-fit: contain;
+    border-radius: 15px;
+    border: 2px solid $border_color;
+    background: #fefefe;
+}
+.gb-product-img.gb-faded { opacity: 0.5; }
+.gb-out-overlay {
+    position: absolute;
+    top: 50%;
+    left: 50%;
+    transform: translate(-50%, -50%);
+    background: rgba(255,0,0,0.8);
+    color: white;
+    padding: 10px 20px;
+    border-radius: 10px;
+    font-weight: bold;
+    font-size: 18px;
+}
+.gb-price-row { text-align: center; margin: 15px 0; }
+.gb-stock-out { text-align: center; color: $stock_out_color; font-weight: bold; }
+.gb-stock-low { text-align: center; color: $stock_low_color; font-weight: bold; }
+.gb-stock-ok { text-align: center; color: $stock_ok_color; }
+.gb-card-desc { text-align: center; color: $muted_color; font-size: 14px; padding: 0 10px; }
+.gb-panel {
+    padding: 40px;
+    background: $surface;
+    border-radius: 20px;
+    box-shadow: 0 8px 24px rgba(0,0,0,0.08);
+    border: 3px solid $border_color;
+}
+.gb-panel-narrow { text-align: center; margin: 40px auto; max-width: 600px; }
+.gb-brand { text-align: center; color: $primary_color; font-size: 36px; margin-bottom: 10px; }
+.gb-tagline { text-align: center; color: $muted_color; margin-bottom: 30px; }
+.gb-queue-number { color: $primary_color; font-size: 64px; margin: 20px 0; }
+.gb-welcome {
+    background: $welcome_background;
+    padding: 20px;
+    border-radius: 15px;
+    margin-bottom: 20px;
+    text-align: center;
+    border: 3px solid $welcome_border;
+}
+.gb-welcome h3 { color: $success_dark; margin: 0; }
+.gb-empty {
+    background: $surface;
+    padding: 40px;
+    border-radius: 20px;
+    text-align: center;
+    border: 3px solid $border_color;
+    margin: 40px 0;
+}
+.gb-stat {
+    background: $surface;
+    padding: 20px;
+    border-radius: 15px;
+    border: 3px solid $border_color;
+    text-align: center;
+}
+.gb-stat h4, .gb-stat h1 { color: $primary_color; }
+.gb-stat-large { padding: 25px; }
+.gb-stat-success { border-color: $success_border; }
+.gb-stat-success h4 { color: $success_color; }
+.gb-stat-info { border-color: $info_border; }
+.gb-stat-info h4 { color: $info_color; }
+.gb-stat-danger { border-color: $danger_border; }
+.gb-stat-danger h4 { color: $danger_color; }
+.gb-stat-member { border-color: $member_border; }
+""")
+
+
+def theme_version(theme_path):
+    """Change marker for theme.json (None when the file does not exist)"""
+    try:
+        stat = os.stat(theme_path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def load_theme_file(theme_path):
+    """Default tokens overridden by theme.json (unknown keys are ignored)"""
+    theme = dict(DEFAULT_THEME)
+    if os.path.exists(theme_path):
+        with open(theme_path, "r") as f:
+            overrides = json.load(f)
+        theme.update({k: str(v) for k, v in overrides.items() if k in DEFAULT_THEME})
+    return theme
+
+
+def compile_stylesheet(theme):
+    """(css, content_hash) for a theme"""
+    css = STYLESHEET_TEMPLATE.substitute(theme).strip() + "\n"
+    return css, hashlib.sha1(css.encode("utf-8")).hexdigest()[:12]
+
+
+def publish_stylesheet(css, digest, static_dir):
+    """Write theme-<hash>.css into the static folder (once) and drop older builds; returns the file name"""
+    filename = f"theme-{digest}.css"
+    path = os.path.join(static_dir, filename)
+    os.makedirs(static_dir, exist_ok=True)
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(css)
+        os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(static_dir, "theme-*.css")):
+        if os.path.basename(old) != filename:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return filename
@@ -0,0 +1,84 @@
+import sqlite3
+
+# --- USER ADMINISTRATION QUERIES ---
+USER_COLUMNS = ["user_id", "username", "email", "full_name", "phone", "created_at", "is_admin"]
+
+
+def init_user_indexes(db_path):
+    """Create the indexes behind user search and paging"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    # NOCASE indexes let case-insensitive prefix LIKE queries use an index range scan
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_username_nocase ON users(username COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users(email COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_full_name_nocase ON users(full_name COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at, user_id)")
+    conn.commit()
+    conn.close()
+
+
+def _like_prefix(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def search_users(db_path, query="", cursor=None, limit=25):
+    """Return one page of users, newest first, optionally filtered by a name prefix.
+
+    `query` is matched as a prefix of username, email or full name. `cursor` is
+    the (created_at, user_id) of the last row of the previous page; pass the
+    returned next_cursor to fetch the following page. Returns (rows, next_cursor)
+    where next_cursor is None on the last page.
+    """
+    conditions = []
+    params = []
+    query = query.strip()
+    if query:
+        pattern = _like_prefix(query)
+        conditions.append("(username LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\' OR full_name LIKE ? ESCAPE '\\')")
+        params.extend([pattern, pattern, pattern])
+    if cursor:
+        conditions.append("(created_at < ? OR (created_at = ? AND user_id < ?))")
+        params.extend([cursor[0], cursor[0], cursor[1]])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT {', '.join(USER_COLUMNS)} FROM users
+        {where}
+        ORDER BY created_at DESC, user_id DESC
+        LIMIT ?
+    """, params + [limit + 1])
+    rows = c.fetchall()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][5], rows[-1][0])
+    return rows, next_cursor
+
+
+def count_users(db_path):
+    """Return (total_users, total_admins)"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), COALESCE(SUM(is_admin), 0) FROM users")
+    total, admins = c.fetchone()
+    conn.close()
+    return total, admins
+
+
+def set_users_admin(db_path, user_ids, is_admin):
+    """Grant or revoke admin rights for many users in one transaction; returns rows changed"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.executemany(
+        "UPDATE users SET is_admin = ? WHERE user_id = ? AND is_admin != ?",
+        [(1 if is_admin else 0, user_id, 1 if is_admin else 0) for user_id in user_ids]
+    )
+    changed = c.rowcount
+    conn.commit()
+    conn.close()
+    return changed